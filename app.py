@@ -2,8 +2,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_handler import DataHandler
-from utils.financial_calculator import FinancialCalculator
+from utils.shared_resources import init_data_handler, init_calculator
 import os
 
 # Configuração da página
@@ -14,11 +13,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Inicializar manipulador de dados
-@st.cache_resource
-def init_data_handler():
-    return DataHandler()
-
 def main():
     st.title("📊 Instituto Metaforma - Sistema de Gestão Financeira")
     st.markdown("---")
@@ -53,7 +47,7 @@ def main():
     
     try:
         data_handler = init_data_handler()
-        calculator = FinancialCalculator(data_handler)
+        calculator = init_calculator()
         
         # Métricas principais
         with col1:
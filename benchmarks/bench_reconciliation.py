@@ -0,0 +1,129 @@
+"""
+Benchmark da conciliação bancária (reconcile_payments).
+
+Mede o tempo da conciliação indexada com número crescente de alunos
+(10 parcelas cada) e créditos, comparado ao laço original que pontua cada
+crédito contra todas as parcelas (medido só nos tamanhos menores, com o
+número de créditos identificados entre parênteses). O cenário
+"mensalidade única" coloca todos os alunos no mesmo valor e vencimento, o
+pior caso para os buckets de valor/data.
+
+Uso:
+    python -m benchmarks.bench_reconciliation [--sizes 500 1000 2000 4000]
+"""
+import argparse
+import logging
+import time
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from utils.bank_reconciliation import BankReconciliation, BankTransaction, StudentPayment
+
+FIRST_NAMES = [
+    'FERNANDA', 'JOAO', 'MARIA', 'PEDRO', 'ANA', 'LUCAS', 'JULIA', 'RUAN', 'PAULA', 'DIANE', 'RAFAEL', 'BRUNO',
+    'CAMILA', 'LETICIA', 'GABRIEL', 'MATEUS', 'LARISSA', 'BEATRIZ', 'RODRIGO', 'TIAGO', 'VANESSA', 'CARLOS',
+    'PATRICIA', 'ANDRE', 'RENATA', 'MARCOS', 'JESSICA', 'DIEGO', 'AMANDA', 'VINICIUS', 'BIANCA', 'FELIPE',
+    'NATALIA', 'GUSTAVO', 'ALINE', 'EDUARDO', 'CAROLINA', 'LEONARDO', 'PRISCILA', 'HENRIQUE'
+]
+LAST_NAMES = [
+    'SILVA', 'SANTOS', 'OLIVEIRA', 'COSTA', 'SOUZA', 'LIMA', 'PEREIRA', 'MACHADO', 'FARIAS', 'NUNES',
+    'RODRIGUES', 'ALVES', 'FERREIRA', 'GOMES', 'RIBEIRO', 'CARVALHO', 'ARAUJO', 'MARTINS', 'ROCHA', 'BARBOSA',
+    'MELO', 'CARDOSO', 'TEIXEIRA', 'CORREIA', 'DIAS', 'MOREIRA', 'MENDES', 'FREITAS', 'BARROS', 'PINTO',
+    'MONTEIRO', 'CAVALCANTI', 'VIEIRA', 'CAMPOS', 'REIS', 'MOURA', 'NASCIMENTO', 'ANDRADE', 'RAMOS', 'LOPES'
+]
+
+
+def build_scenario(n_students, n_credits, single_fee=False, seed=1):
+    """Parcelas mensais de n_students alunos e n_credits créditos (PIX, TED e boletos sem nome)."""
+    rng = np.random.default_rng(seed)
+    base = datetime(2025, 1, 10)
+    payments = []
+    for student in range(n_students):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        fee = 400.0 if single_fee else float(rng.choice([350.0, 400.0, 450.0]))
+        start = base if single_fee else base + timedelta(days=int(rng.integers(0, 365)))
+        for installment in range(1, 11):
+            payments.append(StudentPayment(
+                student_id=f'STU_{student:05d}', student_name=name, installment_number=installment,
+                due_date=start + timedelta(days=30 * (installment - 1)), amount=fee,
+                payment_method='PIX', status='pending'
+            ))
+    
+    credits = []
+    for _ in range(n_credits):
+        payment = payments[int(rng.integers(len(payments)))]
+        description = str(rng.choice([
+            f'PIX RECEBIDO - {payment.student_name}',
+            f'TED {rng.integers(10000, 99999)} {payment.student_name.split()[0]}',
+            f'BOLETO PAGO {rng.integers(10000, 99999)}',
+        ]))
+        credits.append(BankTransaction(
+            date=payment.due_date + timedelta(days=int(rng.integers(-4, 5))),
+            amount=payment.amount + float(rng.choice([0.0, 0.0, 1.5, -2.0, 7.0])),
+            description=description, document='', account='CC 001', type='credit'
+        ))
+    return credits, payments
+
+
+def baseline_reconcile(reconciler, credits, payments):
+    """Laço original: cada crédito pontuado contra todas as parcelas em aberto."""
+    matched = 0
+    for transaction in credits:
+        best_match, best_score = None, 0
+        for payment in payments:
+            if payment.status == 'paid':
+                continue
+            score = 0.0
+            amount_diff = abs(transaction.amount - payment.amount)
+            if amount_diff <= reconciler.tolerance_amount:
+                score += 0.4 * (1 - amount_diff / reconciler.tolerance_amount)
+            date_diff = abs((transaction.date - payment.due_date).days)
+            if date_diff <= reconciler.tolerance_days:
+                score += 0.3 * (1 - date_diff / reconciler.tolerance_days)
+            name_words = payment.student_name.upper().split()
+            name_matches = sum(1 for word in name_words if word in transaction.description.upper())
+            if name_matches > 0:
+                score += 0.3 * (name_matches / len(name_words))
+            if score > best_score and score > 0.6:
+                best_score, best_match = score, payment
+        if best_match:
+            best_match.status = 'paid'
+            matched += 1
+    return matched
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000, 4000], help='Número de alunos')
+    parser.add_argument('--baseline-limit', type=int, default=1000, help='Maior tamanho medido com o laço original')
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    reconciler = BankReconciliation()
+    
+    print(f"{'cenário':<18}{'alunos':>8}{'parcelas':>10}{'créditos':>10}{'indexada (s)':>14}{'µs/crédito':>12}{'original (s)':>18}{'identificados':>15}")
+    for single_fee in (False, True):
+        label = 'mensalidade única' if single_fee else 'valores variados'
+        for n_students in args.sizes:
+            credits, payments = build_scenario(n_students, 2 * n_students, single_fee)
+            elapsed, result = timed(reconciler.reconcile_payments, credits, deepcopy(payments), None, 'greedy')
+            
+            baseline = '-'
+            if n_students <= args.baseline_limit:
+                baseline_elapsed, baseline_matched = timed(baseline_reconcile, reconciler, credits, deepcopy(payments))
+                baseline = f'{baseline_elapsed:.2f} ({baseline_matched})'
+            
+            print(f"{label:<18}{n_students:>8}{len(payments):>10}{len(credits):>10}{elapsed:>14.3f}"
+                  f"{elapsed / len(credits) * 1e6:>12.0f}{baseline:>18}{len(result['matched_payments']):>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark da leitura de extratos em lotes (iter_bank_extract).
+
+Gera o mesmo extrato em CSV, OFX, CNAB 240 e CNAB 400 (um em cada dez
+títulos do CNAB é uma baixa, não uma liquidação) e mede, para cada
+formato, o tempo da leitura em lotes, as linhas por segundo e o pico de
+memória (tracemalloc). A última linha é a leitura do CSV inteiro com
+load_bank_extract_frame, a referência do caminho antigo.
+
+Uso:
+    python -m benchmarks.bench_statement_parsers [--rows 200000] [--batch-size 5000]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from utils.bank_reconciliation import BankReconciliation
+
+
+def _fixed_width(width, fields):
+    """Linha de largura fixa com cada valor na sua posição (base 0)."""
+    line = [' '] * width
+    for start, value in fields:
+        line[start:start + len(value)] = value
+    return ''.join(line)
+
+
+def write_statements(directory, n_rows, seed=7):
+    """
+    Grava o mesmo extrato de n_rows créditos nos quatro formatos.
+    
+    Returns:
+        Dicionário formato -> caminho do arquivo
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), 'D')
+    cents = rng.integers(10000, 90000, n_rows)
+    names = [f"ALUNO {i:06d} SILVA" for i in range(n_rows)]
+    documents = [f"{i:010d}" for i in range(n_rows)]
+    paths = {name: os.path.join(directory, file_name) for name, file_name in [
+        ('CSV', 'extrato.csv'), ('OFX', 'extrato.ofx'), ('CNAB 240', 'retorno240.ret'), ('CNAB 400', 'retorno400.ret')
+    ]}
+    
+    pd.DataFrame({
+        'data': dates.strftime('%d/%m/%Y'),
+        'valor': [f"{value / 100:.2f}".replace('.', ',') for value in cents],
+        'descricao': ['BOLETO LIQUIDADO ' + name for name in names],
+        'documento': documents,
+        'conta': '1234/56789'
+    }).to_csv(paths['CSV'], index=False)
+    
+    with open(paths['OFX'], 'w', encoding='cp1252') as file:
+        file.write(
+            "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nENCODING:USASCII\nCHARSET:1252\n\n"
+            "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>BRL\n"
+            "<BANKACCTFROM><BANKID>341<ACCTID>56789</BANKACCTFROM>\n<BANKTRANLIST>\n"
+        )
+        for date, value, name, document in zip(dates.strftime('%Y%m%d'), cents, names, documents):
+            file.write(
+                f"<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>{date}120000[-3:BRT]\n<TRNAMT>{value / 100:.2f}\n"
+                f"<FITID>{document}\n<MEMO>Pagamento José {name}\n</STMTTRN>\n"
+            )
+        file.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    
+    with open(paths['CNAB 240'], 'w', encoding='latin-1') as file:
+        file.write(_fixed_width(240, [(0, '34100000'), (52, '01234'), (58, '000000056789')]) + '\r\n')
+        for i, (date, value, name, document) in enumerate(zip(dates.strftime('%d%m%Y'), cents, names, documents)):
+            occurrence = '06' if i % 10 else '02'
+            file.write(_fixed_width(240, [
+                (7, '3'), (13, 'T'), (15, occurrence), (37, f"{i:020d}"), (58, document.ljust(15)), (148, name.ljust(40))
+            ]) + '\r\n')
+            file.write(_fixed_width(240, [(7, '3'), (13, 'U'), (15, '06'), (77, f"{value:015d}"), (137, date), (145, date)]) + '\r\n')
+        file.write(_fixed_width(240, [(7, '9')]) + '\r\n')
+    
+    with open(paths['CNAB 400'], 'w', encoding='latin-1') as file:
+        file.write(_fixed_width(400, [(0, '0'), (26, '12345678901234567890')]) + '\r\n')
+        for i, (date, value, document) in enumerate(zip(dates.strftime('%d%m%y'), cents, documents)):
+            occurrence = '06' if i % 10 else '02'
+            file.write(_fixed_width(400, [
+                (0, '1'), (62, f"{i:08d}"), (108, occurrence), (110, date), (116, document), (253, f"{value:013d}"), (295, date)
+            ]) + '\r\n')
+        file.write(_fixed_width(400, [(0, '9')]) + '\r\n')
+    
+    return paths
+
+
+def measure(function):
+    """Tempo (melhor de duas execuções), pico de memória e resultado de function()."""
+    elapsed = float('inf')
+    for _ in range(2):
+        start = time.perf_counter()
+        result = function()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='Créditos no extrato')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Transações por lote')
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    reconciler = BankReconciliation()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_statements(directory, args.rows)
+        
+        print(f"{'formato':<22}{'linhas':>9}{'lotes':>7}{'tempo (s)':>11}{'linhas/s':>11}{'pico (MB)':>11}")
+        for name, path in paths.items():
+            # Só o tamanho de cada lote é guardado, como em um consumo que não acumula o extrato
+            elapsed, peak, sizes = measure(
+                lambda: [len(batch.frame) for batch in reconciler.iter_bank_extract(path, batch_size=args.batch_size)]
+            )
+            rows = sum(sizes)
+            print(f"{name + ' (lotes)':<22}{rows:>9}{len(sizes):>7}{elapsed:>11.2f}{rows / elapsed:>11.0f}{peak / 1e6:>11.1f}")
+        
+        elapsed, peak, frame = measure(lambda: reconciler.load_bank_extract_frame(file_path=paths['CSV']))
+        print(f"{'CSV (inteiro)':<22}{len(frame):>9}{1:>7}{elapsed:>11.2f}{len(frame) / elapsed:>11.0f}{peak / 1e6:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
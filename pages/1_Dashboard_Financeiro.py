@@ -2,11 +2,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_handler import DataHandler
-from utils.financial_calculator import FinancialCalculator
+from utils.shared_resources import init_calculator
 
 st.set_page_config(page_title="Dashboard Financeiro", page_icon="📊", layout="wide")
 
+# Rótulos das métricas de FinancialCalculator.calculate_metrics_table
+METRIC_LABELS = {
+    'receita_realizada': 'Receita Realizada',
+    'receita_orcada': 'Receita Orçada',
+    'taxa_conversao': 'Conversão (%)',
+    'roi': 'ROI (%)',
+    'margem_lucro': 'Margem de Lucro (%)',
+    'taxa_inadimplencia': 'Inadimplência (%)',
+    'eficiencia_operacional': 'Eficiência Operacional (%)',
+    'crescimento_receita': 'Crescimento da Receita (%)'
+}
+
 def main():
     st.title("📊 Dashboard Financeiro")
     st.markdown("---")
@@ -271,6 +282,35 @@ def main():
                 )
                 st.plotly_chart(fig_despesas, use_container_width=True)
         
+        # Indicadores de todos os períodos, calculados de uma vez pela calculadora compartilhada
+        st.markdown("---")
+        st.subheader("📐 Indicadores por Período")
+        
+        metricas = init_calculator().calculate_metrics_table()
+        
+        if metricas.empty:
+            st.info("Nenhum dado financeiro disponível para calcular os indicadores.")
+        else:
+            indicadores = metricas.pivot(index='Periodo', columns='Metrica', values='Valor')
+            # pivot ordena os períodos pelo texto; volta à ordem cronológica da tabela
+            indicadores = indicadores.reindex(index=metricas['Periodo'].unique(), columns=list(METRIC_LABELS))
+            indicadores = indicadores.rename(columns=METRIC_LABELS)
+            if periodo_selecionado != "Todos":
+                indicadores = indicadores[indicadores.index == periodo_selecionado]
+            
+            st.dataframe(indicadores.round(2), use_container_width=True)
+            
+            percentuais = [label for label in METRIC_LABELS.values() if label.endswith('(%)')]
+            metrica_grafico = st.selectbox("Indicador no gráfico:", percentuais)
+            fig_indicador = px.bar(
+                indicadores.reset_index(),
+                x='Periodo',
+                y=metrica_grafico,
+                title=f"{metrica_grafico} por Período"
+            )
+            fig_indicador.update_layout(xaxis_title='Período', yaxis_title='%')
+            st.plotly_chart(fig_indicador, use_container_width=True)
+        
     except Exception as e:
         st.error(f"Erro ao carregar dados financeiros: {str(e)}")
         st.info("Verifique se os dados foram importados corretamente na seção 'Importar Dados'.")
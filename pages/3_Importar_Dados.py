@@ -1,10 +1,40 @@
 import streamlit as st
 import pandas as pd
 import io
-from utils.data_handler import DataHandler
+from utils.shared_resources import init_data_handler
+from utils.streaming_import import StreamingImporter
 
 st.set_page_config(page_title="Importar Dados", page_icon="📤", layout="wide")
 
+def processar_dados_financeiros(importer: StreamingImporter, arquivo):
+    """Importa o arquivo em blocos, mostrando o progresso e o resultado."""
+    barra_progresso = st.progress(0.0, text="Iniciando importação...")
+    
+    def atualizar_progresso(fracao, linhas):
+        barra_progresso.progress(fracao, text=f"{linhas:,} linhas processadas".replace(',', '.'))
+    
+    resultado = importer.import_financial_data(
+        arquivo, arquivo.name, init_data_handler(), progress_callback=atualizar_progresso
+    )
+    barra_progresso.progress(1.0, text="Importação concluída")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📏 Linhas Lidas", resultado['total_rows'])
+    with col2:
+        st.metric("✅ Importadas", resultado['imported_rows'])
+    with col3:
+        st.metric("❌ Rejeitadas", resultado['rejected_rows'])
+    
+    if resultado['imported_rows'] > 0:
+        st.success(f"✅ {resultado['imported_rows']} linhas de dados financeiros processadas e salvas!")
+    
+    if resultado['unknown_columns']:
+        st.warning(f"⚠️ Colunas novas incorporadas aos dados financeiros: {', '.join(map(str, resultado['unknown_columns']))}")
+    
+    for erro in resultado['errors']:
+        st.error(f"❌ Linhas {erro['rows']}: {'; '.join(erro['errors'])}")
+
 def main():
     st.title("📤 Importar Dados")
     st.markdown("---")
@@ -41,6 +71,8 @@ def main():
             )
             
             if arquivo_financeiro is not None:
+                importer = StreamingImporter()
+                
                 try:
                     if arquivo_financeiro.type == "application/pdf":
                         st.info("📄 Arquivo PDF detectado. Exibindo informações do arquivo:")
@@ -49,37 +81,35 @@ def main():
                         st.warning("💡 Para PDFs, use a funcionalidade de visualização na aba 'Arquivos Existentes'")
                         
                     elif arquivo_financeiro.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-                        # Arquivo Excel
-                        df = pd.read_excel(arquivo_financeiro)
+                        # Arquivo Excel (somente as primeiras linhas são lidas para a prévia)
+                        df = importer.preview(arquivo_financeiro, arquivo_financeiro.name)
                         st.success("✅ Arquivo Excel carregado com sucesso!")
                         
                         st.subheader("👁️ Prévia dos Dados")
-                        st.dataframe(df.head(10), use_container_width=True)
+                        st.dataframe(df, use_container_width=True)
                         
                         st.subheader("📊 Informações do Dataset")
                         col1, col2, col3 = st.columns(3)
                         with col1:
-                            st.metric("📏 Linhas", len(df))
+                            st.metric("📏 Linhas", importer.count_rows(arquivo_financeiro, arquivo_financeiro.name))
                         with col2:
                             st.metric("📐 Colunas", len(df.columns))
                         with col3:
                             st.metric("💾 Tamanho", f"{arquivo_financeiro.size} bytes")
                         
                         if st.button("💾 Processar e Salvar Dados"):
-                            st.success("✅ Dados financeiros processados e salvos!")
-                            st.info("💡 Em um sistema real, os dados seriam salvos em banco de dados.")
+                            processar_dados_financeiros(importer, arquivo_financeiro)
                     
                     elif arquivo_financeiro.type == "text/csv":
-                        # Arquivo CSV
-                        df = pd.read_csv(arquivo_financeiro)
+                        # Arquivo CSV (somente as primeiras linhas são lidas para a prévia)
+                        df = importer.preview(arquivo_financeiro, arquivo_financeiro.name)
                         st.success("✅ Arquivo CSV carregado com sucesso!")
                         
                         st.subheader("👁️ Prévia dos Dados")
-                        st.dataframe(df.head(10), use_container_width=True)
+                        st.dataframe(df, use_container_width=True)
                         
                         if st.button("💾 Processar e Salvar Dados"):
-                            st.success("✅ Dados financeiros processados e salvos!")
-                            st.info("💡 Em um sistema real, os dados seriam salvos em banco de dados.")
+                            processar_dados_financeiros(importer, arquivo_financeiro)
                 
                 except Exception as e:
                     st.error(f"❌ Erro ao processar arquivo: {str(e)}")
@@ -137,15 +167,13 @@ def main():
             
             if arquivo_alunos is not None:
                 try:
-                    if arquivo_alunos.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-                        df = pd.read_excel(arquivo_alunos)
-                    else:
-                        df = pd.read_csv(arquivo_alunos)
+                    importer = StreamingImporter()
+                    df = importer.preview(arquivo_alunos, arquivo_alunos.name)
                     
                     st.success("✅ Arquivo carregado com sucesso!")
                     
                     st.subheader("👁️ Prévia dos Dados")
-                    st.dataframe(df.head(10), use_container_width=True)
+                    st.dataframe(df, use_container_width=True)
                     
                     st.subheader("📊 Validação dos Dados")
                     
@@ -170,7 +198,8 @@ def main():
                     
                     if len(colunas_encontradas) >= 3:
                         if st.button("💾 Importar Alunos"):
-                            st.success(f"✅ {len(df)} alunos importados com sucesso!")
+                            total_alunos = importer.count_rows(arquivo_alunos, arquivo_alunos.name)
+                            st.success(f"✅ {total_alunos} alunos importados com sucesso!")
                             st.info("💡 Em um sistema real, os dados seriam salvos em banco de dados.")
                     else:
                         st.warning("⚠️ Arquivo não possui todas as colunas essenciais.")
@@ -4,6 +4,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import io
+from utils.shared_resources import init_calculator
 
 st.set_page_config(page_title="Relatórios", page_icon="📋", layout="wide")
 
@@ -324,24 +325,43 @@ def main():
             
             st.plotly_chart(fig_efic, use_container_width=True)
         
-        # Análise de tendências
+        # Análise de tendências (regressão por indicador ao longo dos períodos, via TrendEngine)
         st.subheader("📊 Análise de Tendências")
         
-        tendencias_dados = {
-            'Métrica': ['Receita', 'Despesas', 'Resultado', 'Inadimplência'],
-            'Tendência': ['📉 Declinante', '📈 Crescente', '📉 Negativa', '📈 Alta'],
-            'Variação_Mensal': ['-15.2%', '+8.5%', '-85.3%', '+22.7%'],
-            'Status': ['⚠️ Atenção', '⚠️ Atenção', '🚨 Crítico', '🚨 Crítico'],
-            'Ação_Recomendada': ['Revisar estratégia de vendas', 'Otimizar custos operacionais', 'Reestruturar modelo financeiro', 'Implementar política de cobrança']
+        # Indicador -> (nome, direção desfavorável, ação recomendada)
+        indicadores_tendencia = {
+            'Receita_Bruta': ('Receita', 'Declinante', 'Revisar estratégia de vendas'),
+            'Total_Despesas': ('Despesas', 'Crescente', 'Otimizar custos operacionais'),
+            'Resultado_Liquido': ('Resultado', 'Declinante', 'Reestruturar modelo financeiro'),
+            'Inadimplencia': ('Inadimplência', 'Crescente', 'Implementar política de cobrança')
         }
         
-        df_tendencias = pd.DataFrame(tendencias_dados)
+        tendencias = init_calculator().analyze_financial_trends()
+        tendencias = tendencias.reindex([indicador for indicador in indicadores_tendencia if indicador in tendencias.index])
         
-        st.dataframe(
-            df_tendencias,
-            use_container_width=True,
-            hide_index=True
-        )
+        if tendencias.empty:
+            st.info("Nenhum dado financeiro disponível para analisar tendências.")
+        else:
+            df_tendencias = pd.DataFrame({
+                'Métrica': [indicadores_tendencia[indicador][0] for indicador in tendencias.index],
+                'Tendência': tendencias['trend'].to_numpy(),
+                'Inclinação_por_Período': tendencias['slope'].round(2).to_numpy(),
+                'Variação_Total': [f"{variacao:+.1f}%" if pd.notna(variacao) else "N/A" for variacao in tendencias['total_variation']],
+                'Status': [
+                    '🚨 Crítico' if direcao == indicadores_tendencia[indicador][1] else '✅ Adequado'
+                    for indicador, direcao in tendencias['direction'].items()
+                ],
+                'Ação_Recomendada': [
+                    indicadores_tendencia[indicador][2] if direcao == indicadores_tendencia[indicador][1] else '-'
+                    for indicador, direcao in tendencias['direction'].items()
+                ]
+            })
+            
+            st.dataframe(
+                df_tendencias,
+                use_container_width=True,
+                hide_index=True
+            )
     
     with tab3:
         st.subheader("👥 Relatório de Inadimplência")
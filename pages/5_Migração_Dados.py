@@ -10,6 +10,10 @@ from utils.advanced_data_handler import AdvancedDataHandler
 
 st.set_page_config(page_title="Migração de Dados", page_icon="🔄", layout="wide")
 
+@st.cache_resource
+def get_sqlite_reader(db_path: str):
+    return SQLiteReader(db_path)
+
 def main():
     st.title("🔄 Migração de Dados do Sistema Anterior")
     st.markdown("---")
@@ -36,7 +40,7 @@ def main():
         st.subheader("🔍 Análise do Banco de Dados Anterior")
         
         try:
-            reader = SQLiteReader(db_path)
+            reader = get_sqlite_reader(db_path)
             
             col1, col2 = st.columns(2)
             
@@ -371,7 +375,7 @@ def main():
         """)
         
         try:
-            reader = SQLiteReader(db_path)
+            reader = get_sqlite_reader(db_path)
             
             col1, col2 = st.columns(2)
             
@@ -436,7 +440,7 @@ def main():
         """)
         
         try:
-            reader = SQLiteReader(db_path)
+            reader = get_sqlite_reader(db_path)
             
             col1, col2 = st.columns(2)
             
@@ -494,57 +498,60 @@ def main():
         """)
         
         try:
-            reader = SQLiteReader(db_path)
+            reader = get_sqlite_reader(db_path)
             
             if st.button("🚀 Executar Análise Completa", use_container_width=True):
                 with st.spinner("Analisando todo o banco de dados..."):
-                    # Obter resumo completo
-                    summary = reader.get_database_summary()
-                    all_data = reader.export_all_data()
+                    # Obter resumo completo (apenas metadados e algumas linhas de exemplo)
+                    summary = reader.get_database_summary(include_sample=True, sample_limit=5)
+                    tables_info = {
+                        name: info for name, info in summary.get('tables', {}).items() if info['rows'] > 0
+                    }
                     
-                    if 'error' not in summary and all_data:
+                    if 'error' not in summary and tables_info:
                         st.success("✅ Análise completa finalizada!")
                         
                         # Métricas gerais
                         st.subheader("📊 Métricas Gerais")
                         col1, col2, col3, col4 = st.columns(4)
                         
-                        total_records = sum(len(df) for df in all_data.values())
-                        total_tables = len(all_data)
+                        total_records = sum(info['rows'] for info in tables_info.values())
+                        total_tables = len(tables_info)
                         
                         with col1:
                             st.metric("📋 Total de Tabelas", total_tables)
                         with col2:
                             st.metric("📏 Total de Registros", total_records)
                         with col3:
-                            st.metric("💾 Tamanho Total (KB)", 
-                                    round(sum(df.memory_usage(deep=True).sum() for df in all_data.values()) / 1024, 2))
+                            st.metric("💾 Tamanho Total (KB)", round(summary['size_bytes'] / 1024, 2))
                         with col4:
                             st.metric("📊 Status", "✅ Pronto para Migrar")
                         
                         # Detalhes por tabela
                         st.subheader("📋 Detalhes por Tabela")
                         
-                        for table_name, df in all_data.items():
-                            with st.expander(f"📊 {table_name} ({len(df)} registros)"):
+                        for table_name, info in tables_info.items():
+                            with st.expander(f"📊 {table_name} ({info['rows']} registros)"):
                                 col1, col2 = st.columns(2)
                                 
                                 with col1:
                                     st.write("**Informações da Tabela:**")
-                                    st.write(f"• Registros: {len(df)}")
-                                    st.write(f"• Colunas: {len(df.columns)}")
-                                    st.write(f"• Tamanho: {round(df.memory_usage(deep=True).sum() / 1024, 2)} KB")
+                                    st.write(f"• Registros: {info['rows']}")
+                                    st.write(f"• Colunas: {info['columns']}")
+                                    if info['size_bytes'] is not None:
+                                        st.write(f"• Tamanho: {round(info['size_bytes'] / 1024, 2)} KB")
+                                    st.write(f"• Índices: {len(info['indexes'])}")
                                 
                                 with col2:
                                     st.write("**Colunas Encontradas:**")
-                                    for col in df.columns[:10]:  # Mostrar apenas primeiras 10 colunas
+                                    for col in info['column_names'][:10]:  # Mostrar apenas primeiras 10 colunas
                                         st.write(f"• {col}")
-                                    if len(df.columns) > 10:
-                                        st.write(f"... e mais {len(df.columns) - 10} colunas")
+                                    if len(info['column_names']) > 10:
+                                        st.write(f"... e mais {len(info['column_names']) - 10} colunas")
                                 
                                 # Botão para ver dados
                                 if st.button(f"👁️ Ver Dados de {table_name}", key=f"view_{table_name}"):
-                                    st.dataframe(df.head(), use_container_width=True)
+                                    st.dataframe(info['sample'], use_container_width=True)
                         
                         # Recomendações de migração
                         st.subheader("💡 Recomendações de Migração")
@@ -552,17 +559,17 @@ def main():
                         recommendations = []
                         
                         # Verificar tabelas de alunos
-                        student_tables = [name for name in all_data.keys() if any(keyword in name.lower() for keyword in ['student', 'aluno'])]
+                        student_tables = [name for name in tables_info.keys() if any(keyword in name.lower() for keyword in ['student', 'aluno'])]
                         if student_tables:
                             recommendations.append(f"✅ Encontradas tabelas de alunos: {', '.join(student_tables)}")
                         
                         # Verificar tabelas financeiras
-                        financial_tables = [name for name in all_data.keys() if any(keyword in name.lower() for keyword in ['payment', 'pagamento', 'financial', 'expense'])]
+                        financial_tables = [name for name in tables_info.keys() if any(keyword in name.lower() for keyword in ['payment', 'pagamento', 'financial', 'expense'])]
                         if financial_tables:
                             recommendations.append(f"✅ Encontradas tabelas financeiras: {', '.join(financial_tables)}")
                         
                         # Verificar tabelas de cursos
-                        course_tables = [name for name in all_data.keys() if any(keyword in name.lower() for keyword in ['course', 'curso', 'fac'])]
+                        course_tables = [name for name in tables_info.keys() if any(keyword in name.lower() for keyword in ['course', 'curso', 'fac'])]
                         if course_tables:
                             recommendations.append(f"✅ Encontradas tabelas de cursos: {', '.join(course_tables)}")
                         
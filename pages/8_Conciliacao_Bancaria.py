@@ -4,9 +4,21 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import json
-from utils.bank_reconciliation import BankReconciliation
+from utils.bank_reconciliation import BankReconciliation, BankTransactionTable
+from utils.reconciliation_state import ReconciliationState
+from utils.reconciliation_cache import ReconciliationCache
 from utils.advanced_data_handler import AdvancedDataHandler
 
+@st.cache_resource
+def get_reconciliation_state():
+    """Estado persistido da conciliação incremental (compartilhado entre sessões)."""
+    return ReconciliationState()
+
+@st.cache_resource
+def get_reconciliation_cache():
+    """Cache LRU de resultados do dashboard (compartilhado entre sessões)."""
+    return ReconciliationCache()
+
 def main():
     """Página principal de conciliação bancária."""
     
@@ -61,16 +73,24 @@ def show_adimplencia_dashboard(reconciler, data_handler):
         st.warning("⚠️ Nenhum aluno cadastrado. Acesse 'Gestão Avançada de Alunos' para adicionar dados.")
         return
     
-    # Gerar pagamentos esperados
-    expected_payments = reconciler.generate_expected_payments(students_data)
-    
-    if not expected_payments:
-        st.error("❌ Erro ao gerar pagamentos esperados")
-        return
-    
-    # Simular conciliação com dados bancários de exemplo
+    # Simular conciliação com dados bancários de exemplo; o resultado só é
+    # recalculado se extrato, dados dos alunos ou parâmetros mudarem
     bank_transactions = reconciler.load_bank_extract()
-    reconciliation_result = reconciler.reconcile_payments(bank_transactions, expected_payments)
+    reference_date = datetime.now()
+    cache = get_reconciliation_cache()
+    cache_key = cache.make_key(bank_transactions.frame, data_handler.data_version(), reconciler, reference_date)
+    reconciliation_result = cache.get(cache_key)
+    
+    if reconciliation_result is None:
+        # Gerar pagamentos esperados
+        expected_payments = reconciler.generate_expected_payments(students_data, reference_date=reference_date)
+        
+        if not expected_payments:
+            st.error("❌ Erro ao gerar pagamentos esperados")
+            return
+        
+        reconciliation_result = reconciler.reconcile_payments(bank_transactions, expected_payments, students_data)
+        cache.put(cache_key, reconciliation_result)
     
     if not reconciliation_result:
         st.error("❌ Erro na conciliação bancária")
@@ -125,7 +145,7 @@ def show_adimplencia_dashboard(reconciler, data_handler):
         # Dados para gráfico de pizza
         paid_count = dashboard_metrics['adimplencia']['count']
         overdue_count = dashboard_metrics['inadimplencia']['count']
-        pending_count = len(expected_payments) - paid_count - overdue_count
+        pending_count = reconciliation_result['metrics']['total_expected'] - paid_count - overdue_count
         
         fig_pie = go.Figure(data=[
             go.Pie(
@@ -178,23 +198,21 @@ def show_adimplencia_dashboard(reconciler, data_handler):
     # Análise temporal
     st.subheader("📅 Análise Temporal de Pagamentos")
     
-    # Criar dados para gráfico temporal
-    date_analysis = {}
-    for payment in expected_payments:
-        month_key = payment.due_date.strftime('%Y-%m')
-        if month_key not in date_analysis:
-            date_analysis[month_key] = {'expected': 0, 'paid': 0, 'overdue': 0}
-        
-        date_analysis[month_key]['expected'] += payment.amount
-        if payment.status == 'paid':
-            date_analysis[month_key]['paid'] += payment.amount
-        elif payment.status == 'overdue':
-            date_analysis[month_key]['overdue'] += payment.amount
-    
-    dates = sorted(date_analysis.keys())
-    expected_values = [date_analysis[date]['expected'] for date in dates]
-    paid_values = [date_analysis[date]['paid'] for date in dates]
-    overdue_values = [date_analysis[date]['overdue'] for date in dates]
+    # Criar dados para gráfico temporal a partir das parcelas da tabela de resultado
+    result_table = reconciliation_result['table']
+    installments = result_table[result_table['student_id'].notna()]
+    amounts = installments['expected_amount']
+    date_analysis = pd.DataFrame({
+        'month': installments['due_date'].dt.strftime('%Y-%m'),
+        'expected': amounts,
+        'paid': amounts.where(installments['status'].isin(['matched', 'paid']), 0.0),
+        'overdue': amounts.where(installments['status'] == 'overdue', 0.0)
+    }).groupby('month').sum()
+    
+    dates = date_analysis.index.tolist()
+    expected_values = date_analysis['expected'].tolist()
+    paid_values = date_analysis['paid'].tolist()
+    overdue_values = date_analysis['overdue'].tolist()
     
     fig_timeline = go.Figure()
     
@@ -239,35 +257,23 @@ def show_adimplencia_dashboard(reconciler, data_handler):
     
     with col1:
         # Alunos com mais atraso
-        overdue_students = {}
-        for payment in expected_payments:
-            if payment.status == 'overdue':
-                if payment.student_name not in overdue_students:
-                    overdue_students[payment.student_name] = {
-                        'count': 0,
-                        'amount': 0,
-                        'days_overdue': 0
-                    }
-                overdue_students[payment.student_name]['count'] += 1
-                overdue_students[payment.student_name]['amount'] += payment.amount
-                days_overdue = (datetime.now() - payment.due_date).days
-                overdue_students[payment.student_name]['days_overdue'] = max(
-                    overdue_students[payment.student_name]['days_overdue'],
-                    days_overdue
-                )
+        overdue_rows = installments[installments['status'] == 'overdue']
+        overdue_students = pd.DataFrame({
+            'student_name': overdue_rows['student_name'],
+            'amount': overdue_rows['expected_amount'],
+            'days_overdue': (pd.Timestamp(datetime.now()) - overdue_rows['due_date']).dt.days
+        }).groupby('student_name', sort=False).agg(
+            count=('amount', 'size'), amount=('amount', 'sum'), days_overdue=('days_overdue', 'max')
+        )
         
-        if overdue_students:
+        if not overdue_students.empty:
             st.write("**🔴 Alunos com Maior Inadimplência:**")
             
             # Ordenar por valor em atraso
-            sorted_students = sorted(
-                overdue_students.items(),
-                key=lambda x: x[1]['amount'],
-                reverse=True
-            )[:5]
+            sorted_students = overdue_students.sort_values('amount', ascending=False, kind='stable').head(5)
             
-            for student_name, info in sorted_students:
-                st.write(f"• **{student_name}**: R$ {info['amount']:.2f} ({info['count']} parcelas, {info['days_overdue']} dias)")
+            for info in sorted_students.itertuples():
+                st.write(f"• **{info.Index}**: R$ {info.amount:.2f} ({info.count} parcelas, {info.days_overdue} dias)")
         else:
             st.success("✅ Nenhum aluno em situação crítica")
     
@@ -297,7 +303,7 @@ def show_bank_reconciliation(reconciler, data_handler):
     st.markdown("""
     ### 📋 Como Funciona
     
-    1. **Carregue seu extrato bancário** (CSV ou Excel)
+    1. **Carregue seu extrato bancário** (CSV, Excel, OFX ou retorno CNAB 240/400)
     2. **Configure os parâmetros** de conciliação
     3. **Execute a conciliação** automática
     4. **Analise os resultados** e faça ajustes manuais
@@ -306,8 +312,8 @@ def show_bank_reconciliation(reconciler, data_handler):
     # Upload de arquivo
     uploaded_file = st.file_uploader(
         "📁 Carregar Extrato Bancário",
-        type=['csv', 'xlsx', 'xls'],
-        help="Arquivo deve conter colunas: Data, Valor, Descrição"
+        type=['csv', 'xlsx', 'xls', 'ofx', 'ret', 'txt'],
+        help="CSV/Excel com colunas Data, Valor, Descrição; OFX; ou arquivo de retorno CNAB 240/400 (.ret/.txt)"
     )
     
     col1, col2 = st.columns(2)
@@ -336,6 +342,24 @@ def show_bank_reconciliation(reconciler, data_handler):
         # Atualizar tolerâncias no reconciler
         reconciler.tolerance_amount = tolerance_amount
         reconciler.tolerance_days = tolerance_days
+        
+        incremental = st.checkbox(
+            "♻️ Conciliação incremental",
+            value=False,
+            help="Processa apenas lançamentos ainda não conciliados; os já identificados são mantidos. "
+                 "Use \"Limpar Histórico\" ao trocar de conta ou de extrato"
+        )
+        
+        partitioned = st.checkbox(
+            "⚡ Processamento paralelo (por conta e mês)",
+            value=False,
+            disabled=incremental,
+            help="Divide o extrato por conta e mês e concilia as partes em paralelo; indicado para reconciliar o ano inteiro"
+        )
+        
+        if st.button("🗑️ Limpar Histórico de Conciliação"):
+            get_reconciliation_state().clear()
+            st.success("✅ Histórico apagado. A próxima conciliação processará o extrato inteiro.")
     
     with col2:
         st.subheader("📊 Dados dos Alunos")
@@ -355,33 +379,57 @@ def show_bank_reconciliation(reconciler, data_handler):
             
             # Carregar extrato
             if uploaded_file:
-                try:
-                    if uploaded_file.name.endswith('.csv'):
-                        bank_data = pd.read_csv(uploaded_file)
-                    else:
-                        bank_data = pd.read_excel(uploaded_file)
-                    
-                    bank_transactions = reconciler.load_bank_extract(data=bank_data)
-                    st.success(f"✅ Extrato carregado: {len(bank_transactions)} transações")
-                    
-                except Exception as e:
-                    st.error(f"❌ Erro ao carregar extrato: {str(e)}")
-                    return
+                # Lido em lotes: na conciliação em lotes só o lote atual fica em memória
+                batches = reconciler.iter_bank_extract(uploaded_file, uploaded_file.name)
             else:
                 # Usar dados de exemplo
                 st.info("💡 Usando dados bancários de exemplo para demonstração")
-                bank_transactions = reconciler.load_bank_extract()
+                batches = [reconciler.load_bank_extract()]
             
             # Gerar pagamentos esperados
             expected_payments = reconciler.generate_expected_payments(students_data)
             
             # Executar conciliação
-            reconciliation_result = reconciler.reconcile_payments(bank_transactions, expected_payments)
+            try:
+                if not incremental and (partitioned or reconciler.matching_mode == 'optimal'):
+                    # A divisão por conta e mês e a atribuição global precisam do extrato inteiro
+                    frames = [batch.frame for batch in batches]
+                    bank_transactions = BankTransactionTable(
+                        pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=BankTransactionTable.COLUMNS)
+                    )
+                    if partitioned:
+                        reconciliation_result = reconciler.reconcile_partitioned(bank_transactions, expected_payments, students_data)
+                    else:
+                        reconciliation_result = reconciler.reconcile_payments(bank_transactions, expected_payments, students_data)
+                else:
+                    # Sem conciliação incremental o histórico é descartável e fica só em memória
+                    state = get_reconciliation_state() if incremental else ReconciliationState(':memory:')
+                    reconciliation_result = reconciler.reconcile_stream(batches, expected_payments, state, students_data)
+                    if not incremental:
+                        state.close()
+                        reconciliation_result.pop('incremental', None)
+            except Exception as e:
+                st.error(f"❌ Erro ao carregar extrato: {str(e)}")
+                return
+            
+            if reconciliation_result:
+                total_transactions = (
+                    len(reconciliation_result['matched_payments']) + len(reconciliation_result['unmatched_transactions'])
+                )
+                st.success(f"✅ Extrato conciliado: {total_transactions} créditos")
             
             if reconciliation_result:
                 st.session_state['reconciliation_result'] = reconciliation_result
                 st.session_state['reconciliation_timestamp'] = datetime.now()
                 
+                if 'incremental' in reconciliation_result:
+                    incremental_info = reconciliation_result['incremental']
+                    st.info(
+                        f"♻️ {incremental_info['new_transactions']} lançamentos novos e "
+                        f"{incremental_info['reprocessed_transactions']} reprocessados; "
+                        f"{incremental_info['kept_matches']} identificações mantidas do histórico"
+                    )
+                
                 # Mostrar resultados resumidos
                 metrics = reconciliation_result['metrics']
                 
@@ -396,7 +444,7 @@ def show_bank_reconciliation(reconciler, data_handler):
                     st.metric("❌ Pagamentos em Atraso", metrics['total_overdue'])
                 
                 with col3:
-                    st.metric("⚠️ Transações Não Identificadas", len(reconciliation_result['unmatched_transactions']))
+                    st.metric("⚠️ Transações Não Identificadas", metrics['unmatched_transactions_count'])
                 
                 with col4:
                     st.metric("📈 Taxa de Adimplência", f"{metrics['adimplencia_rate']:.1f}%")
@@ -404,31 +452,29 @@ def show_bank_reconciliation(reconciler, data_handler):
                 # Prévia do relatório
                 st.subheader("👁️ Prévia dos Resultados")
                 
-                # Pagamentos identificados
-                if reconciliation_result['matched_payments']:
+                result_table = reconciliation_result['table']
+                
+                # Pagamentos identificados (só as linhas exibidas são formatadas)
+                matched_rows = result_table[result_table['status'] == 'matched'].head(5)
+                if not matched_rows.empty:
                     st.write("**✅ Pagamentos Identificados:**")
-                    matched_df = pd.DataFrame([
-                        {
-                            'Aluno': match['payment'].student_name,
-                            'Valor': f"R$ {match['transaction'].amount:.2f}",
-                            'Data': match['transaction'].date.strftime('%d/%m/%Y'),
-                            'Score': f"{match['match_score']:.1%}"
-                        }
-                        for match in reconciliation_result['matched_payments'][:5]
-                    ])
+                    matched_df = pd.DataFrame({
+                        'Aluno': matched_rows['student_name'],
+                        'Valor': matched_rows['received_amount'].map('R$ {:.2f}'.format),
+                        'Data': matched_rows['transaction_date'].dt.strftime('%d/%m/%Y'),
+                        'Score': matched_rows['match_score'].map('{:.1%}'.format)
+                    })
                     st.dataframe(matched_df, use_container_width=True)
                 
                 # Transações não identificadas
-                if reconciliation_result['unmatched_transactions']:
+                unmatched_rows = result_table[result_table['status'] == 'unmatched'].head(5)
+                if not unmatched_rows.empty:
                     st.write("**⚠️ Transações Não Identificadas:**")
-                    unmatched_df = pd.DataFrame([
-                        {
-                            'Data': tx.date.strftime('%d/%m/%Y'),
-                            'Valor': f"R$ {tx.amount:.2f}",
-                            'Descrição': tx.description[:50]
-                        }
-                        for tx in reconciliation_result['unmatched_transactions'][:5]
-                    ])
+                    unmatched_df = pd.DataFrame({
+                        'Data': unmatched_rows['transaction_date'].dt.strftime('%d/%m/%Y'),
+                        'Valor': unmatched_rows['received_amount'].map('R$ {:.2f}'.format),
+                        'Descrição': unmatched_rows['description'].str[:50]
+                    })
                     st.dataframe(unmatched_df, use_container_width=True)
                 
                 st.success("✅ Conciliação executada com sucesso! Acesse a aba 'Relatórios Detalhados' para ver o resultado completo.")
@@ -494,6 +540,13 @@ def show_detailed_reports(reconciler, data_handler):
     # Mostrar relatório filtrado
     st.subheader(f"📊 Relatório Filtrado ({len(filtered_df)} registros)")
     
+    # Paginação: apenas a página visível é formatada
+    page_size = 100
+    total_pages = max(1, -(-len(filtered_df) // page_size))
+    page = st.number_input("📄 Página", min_value=1, max_value=total_pages, value=1, step=1)
+    visible_df = reconciler.format_report(filtered_df.iloc[(page - 1) * page_size:page * page_size])
+    st.caption(f"Página {page} de {total_pages}")
+    
     # Formatação condicional
     def format_status(val):
         if '✅' in str(val):
@@ -514,7 +567,7 @@ def show_detailed_reports(reconciler, data_handler):
             pass
         return ''
     
-    styled_df = filtered_df.style.applymap(format_status, subset=['Status']).applymap(format_diferenca, subset=['Diferenca'])
+    styled_df = visible_df.style.applymap(format_status, subset=['Status']).applymap(format_diferenca, subset=['Diferenca'])
     
     st.dataframe(styled_df, use_container_width=True)
     
@@ -526,15 +579,15 @@ def show_detailed_reports(reconciler, data_handler):
         st.metric("📊 Total de Registros", total_records)
     
     with col2:
-        pagos = len(filtered_df[filtered_df['Status'].str.contains('✅', na=False)])
+        pagos = int((filtered_df['Tipo'] == 'Pagamento Identificado').sum())
         st.metric("✅ Pagamentos Identificados", pagos)
     
     with col3:
-        atrasados = len(filtered_df[filtered_df['Status'].str.contains('❌', na=False)])
+        atrasados = int((filtered_df['Tipo'] == 'Inadimplência').sum())
         st.metric("❌ Pagamentos em Atraso", atrasados)
     
     with col4:
-        nao_identificados = len(filtered_df[filtered_df['Status'].str.contains('⚠️', na=False)])
+        nao_identificados = int((filtered_df['Tipo'] == 'Recebimento Não Identificado').sum())
         st.metric("⚠️ Não Identificados", nao_identificados)
     
     # Opções de exportação
@@ -545,7 +598,7 @@ def show_detailed_reports(reconciler, data_handler):
     
     with col1:
         if st.button("📊 Exportar Excel", use_container_width=True):
-            excel_data = filtered_df.to_csv(index=False)
+            excel_data = reconciler.format_report(filtered_df).to_csv(index=False)
             st.download_button(
                 label="⬇️ Baixar Excel",
                 data=excel_data,
@@ -556,7 +609,7 @@ def show_detailed_reports(reconciler, data_handler):
     with col2:
         if st.button("📄 Exportar JSON", use_container_width=True):
             json_data = {
-                'relatorio': filtered_df.to_dict('records'),
+                'relatorio': reconciler.format_report(filtered_df).to_dict('records'),
                 'resumo': reconciliation_result['metrics'],
                 'timestamp': timestamp.isoformat()
             }
@@ -630,9 +683,20 @@ def show_reconciliation_settings(reconciler):
             help="Score mínimo para considerar uma correspondência válida"
         )
         
+        # Estratégia de atribuição
+        matching_modes = {'greedy': "Sequencial (ordem do extrato)", 'optimal': "Ótima (atribuição global)"}
+        matching_mode = st.selectbox(
+            "🧩 Modo de Correspondência",
+            options=list(matching_modes),
+            index=list(matching_modes).index(reconciler.matching_mode),
+            format_func=matching_modes.get,
+            help="A atribuição global maximiza o score total e não depende da ordem das transações"
+        )
+        
         if st.button("💾 Salvar Configurações", use_container_width=True):
             reconciler.tolerance_amount = tolerance_amount
             reconciler.tolerance_days = tolerance_days
+            reconciler.matching_mode = matching_mode
             st.success("✅ Configurações salvas com sucesso!")
     
     with col2:
@@ -640,8 +704,9 @@ def show_reconciliation_settings(reconciler):
         
         st.write("**Padrões atuais para identificar pagamentos:**")
         
-        for i, pattern in enumerate(reconciler.payment_patterns):
-            st.code(pattern, language="regex")
+        for channel, pattern in reconciler.pattern_engine.channel_patterns.items():
+            st.code(f"{channel}: {pattern}", language="regex")
+        st.code(f"CPF/CNPJ: {reconciler.pattern_engine.document_pattern}", language="regex")
         
         st.info("💡 Estes padrões são usados para identificar automaticamente os pagamentos nas descrições bancárias")
         
@@ -655,17 +720,13 @@ def show_reconciliation_settings(reconciler):
         )
         
         if test_description:
-            matches_found = []
-            for pattern in reconciler.payment_patterns:
-                import re
-                match = re.search(pattern, test_description.upper())
-                if match:
-                    matches_found.append(f"✅ Padrão '{pattern}' encontrou: {match.group()}")
+            extracted = reconciler.pattern_engine.extract([test_description]).iloc[0]
             
-            if matches_found:
+            if extracted['channel'] or extracted['document']:
                 st.success("🎯 Correspondências encontradas:")
-                for match in matches_found:
-                    st.write(match)
+                st.write(f"✅ Canal: {extracted['channel'] or '-'}")
+                st.write(f"✅ Referência: {extracted['reference'] or '-'}")
+                st.write(f"✅ CPF/CNPJ: {extracted['document'] or '-'}")
             else:
                 st.warning("⚠️ Nenhuma correspondência encontrada")
     
@@ -10,6 +10,11 @@ import uuid
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Handler compartilhado entre reruns (dados persistidos em SQLite)
+@st.cache_resource
+def get_data_handler():
+    return AdvancedDataHandler()
+
 def validate_cpf(cpf):
     """Valida CPF brasileiro"""
     cpf = re.sub(r'[^\d]', '', cpf)
@@ -140,7 +145,7 @@ def main():
             st.subheader("📊 Estatísticas")
             
             # Carregar dados
-            data_handler = AdvancedDataHandler()
+            data_handler = get_data_handler()
             students = data_handler.get_all_students()
             
             st.metric("Total de Alunos", len(students))
@@ -156,7 +161,7 @@ def main():
     if st.session_state.admin_mode and st.session_state.get('show_all_students', False):
         st.subheader("📋 Alunos Cadastrados")
         
-        data_handler = AdvancedDataHandler()
+        data_handler = get_data_handler()
         students = data_handler.get_all_students()
         
         if not students.empty:
@@ -352,7 +357,7 @@ def main():
                     else:
                         # Cadastrar aluno
                         try:
-                            data_handler = AdvancedDataHandler()
+                            data_handler = get_data_handler()
                             
                             # Preparar dados do aluno
                             student_data = {
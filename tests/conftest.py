@@ -0,0 +1,136 @@
+import logging
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from utils.bank_reconciliation import BankReconciliation, BankTransaction, StudentPayment
+
+logging.disable(logging.CRITICAL)
+
+# Palavras sem acento, sem preposições e sem uma estar contida em outra, para
+# que a busca por substring do baseline e a busca por palavra inteira coincidam
+FIRST_NAMES = ['FERNANDA', 'JOAO', 'PEDRO', 'LUCAS', 'JULIA', 'PAULA', 'RICARDO', 'BEATRIZ']
+LAST_NAMES = ['SANTOS', 'OLIVEIRA', 'COSTA', 'SOUZA', 'LIMA', 'PEREIRA', 'MACHADO', 'FARIAS', 'NUNES', 'BARROS']
+
+BASE_DATE = datetime(2025, 3, 1)
+
+
+def make_payment(student_id='STU_1', student_name='JOAO SANTOS', installment_number=1,
+                 due_date=BASE_DATE, amount=400.0, status='pending'):
+    return StudentPayment(
+        student_id=student_id,
+        student_name=student_name,
+        installment_number=installment_number,
+        due_date=due_date,
+        amount=amount,
+        payment_method='PIX',
+        status=status
+    )
+
+
+def make_credit(date=BASE_DATE, amount=400.0, description='PIX RECEBIDO - JOAO SANTOS',
+                document='', account='CC 001'):
+    return BankTransaction(
+        date=date,
+        amount=amount,
+        description=description,
+        document=document,
+        account=account,
+        type='credit'
+    )
+
+
+def baseline_score(transaction, payment, tolerance_amount=5.0, tolerance_days=3):
+    """Score par a par do conciliador original."""
+    score = 0.0
+    
+    amount_diff = abs(transaction.amount - payment.amount)
+    if amount_diff <= tolerance_amount:
+        score += 0.4 * (1 - amount_diff / tolerance_amount)
+    
+    date_diff = abs((transaction.date - payment.due_date).days)
+    if date_diff <= tolerance_days:
+        score += 0.3 * (1 - date_diff / tolerance_days)
+    
+    name_words = payment.student_name.upper().split()
+    description_upper = transaction.description.upper()
+    name_matches = sum(1 for word in name_words if word in description_upper)
+    if name_matches > 0:
+        score += 0.3 * (name_matches / len(name_words))
+    
+    return min(score, 1.0)
+
+
+def baseline_reconcile(credits, expected_payments, tolerance_amount=5.0, tolerance_days=3):
+    """
+    Laço guloso O(transações x parcelas) do conciliador original.
+    
+    Returns:
+        Dicionário posição_do_crédito -> (student_id, installment_number, score)
+    """
+    payments = deepcopy(expected_payments)
+    matches = {}
+    for position, transaction in enumerate(credits):
+        best_match, best_score = None, 0
+        for payment in payments:
+            if payment.status == 'paid':
+                continue
+            score = baseline_score(transaction, payment, tolerance_amount, tolerance_days)
+            if score > best_score and score > 0.6:
+                best_score, best_match = score, payment
+        if best_match:
+            best_match.status = 'paid'
+            matches[position] = (best_match.student_id, best_match.installment_number, best_score)
+    return matches
+
+
+def random_scenario(seed, n_students=40, n_credits=120):
+    """Parcelas mensais de vários alunos e créditos com valor, data e descrição perturbados."""
+    rng = np.random.default_rng(seed)
+    payments = []
+    names = []
+    for student in range(n_students):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        names.append(name)
+        fee = float(rng.choice([350.0, 400.0, 450.0]))
+        start = BASE_DATE + timedelta(days=int(rng.integers(0, 28)))
+        for installment in range(1, 7):
+            payments.append(make_payment(
+                student_id=f'STU_{student:03d}', student_name=name, installment_number=installment,
+                due_date=start + timedelta(days=30 * (installment - 1)), amount=fee
+            ))
+    
+    credits = []
+    for _ in range(n_credits):
+        payment = payments[int(rng.integers(len(payments)))]
+        words = payment.student_name.split()
+        description = str(rng.choice([
+            f'PIX RECEBIDO - {payment.student_name}',
+            f'TED {rng.integers(10000, 99999)} {words[0]} {words[-1]}',
+            f'BOLETO PAGO {rng.integers(10000, 99999)}',
+            f'PIX RECEBIDO - {rng.choice(names)}',
+        ]))
+        credits.append(make_credit(
+            date=payment.due_date + timedelta(days=int(rng.integers(-6, 7))),
+            amount=payment.amount + float(rng.choice([0.0, 0.0, 1.5, -2.0, 4.5, 7.0])),
+            description=description
+        ))
+    return credits, payments
+
+
+def match_summary(result):
+    """Crédito (data, valor, descrição) -> parcela atribuída, para comparar resultados."""
+    return {
+        (match['transaction'].date, match['transaction'].amount, match['transaction'].description):
+            (match['payment'].student_id, match['payment'].installment_number)
+        for match in result['matched_payments']
+    }
+
+
+@pytest.fixture
+def reconciler():
+    reconciliation = BankReconciliation()
+    reconciliation.max_workers = 1
+    return reconciliation
@@ -0,0 +1,115 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from utils.advanced_data_handler import AdvancedDataHandler
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return AdvancedDataHandler(str(tmp_path / 'metaforma.db'))
+
+
+def add_students(handler, count, fac_code):
+    return handler.add_students_bulk([
+        {'fullName': f'ALUNO {i}', 'email': f'aluno{i}@example.com', 'phone': '11999999999',
+         'courseFee': 1200, 'totalInstallments': 3, 'facCode': fac_code}
+        for i in range(count)
+    ])['added']
+
+
+def test_installments_are_a_slice_of_the_payments_table(handler):
+    student_id = add_students(handler, 3, 'FAC_1')[1]
+
+    installments = handler.get_payment_installments(student_id)
+
+    expected = handler.payments_df[handler.payments_df['student_id'] == student_id]
+    assert installments.equals(expected)
+    assert np.shares_memory(installments['amount'].to_numpy(), handler.payments_df['amount'].to_numpy())
+
+
+def test_lookups_follow_deletes_and_fac_moves(handler):
+    first, second, third = add_students(handler, 3, 'FAC_1')
+    handler.delete_student(first)
+    handler.update_student(second, {'facCode': 'FAC_2'})
+    add_students(handler, 1, 'FAC_1')
+
+    for fac_code in ['FAC_1', 'FAC_2']:
+        students = handler.get_students_by_fac(fac_code)
+        assert students.equals(handler.students_df[handler.students_df['facCode'] == fac_code])
+    assert handler.get_payment_installments(first).empty
+    assert len(handler.get_payment_installments(third)) == 3
+
+
+def test_reload_from_database_keeps_changes(handler, tmp_path):
+    first, second = add_students(handler, 2, 'FAC_1')
+    handler.update_student(second, {'facCode': 'FAC_2'})
+    handler.delete_student(first)
+    payment_id = handler.get_payment_installments(second)['id'].iloc[0]
+    handler.update_payment_status(payment_id, 'Pago', '2025-01-10')
+
+    reloaded = AdvancedDataHandler(str(tmp_path / 'metaforma.db'))
+
+    assert reloaded.get_student_by_id(first) is None
+    assert reloaded.get_student_by_id(second)['facCode'] == 'FAC_2'
+    installments = reloaded.get_payment_installments(second)
+    assert installments.set_index('id').at[payment_id, 'status'] == 'Pago'
+    assert len(reloaded.get_all_students()) == len(handler.get_all_students())
+
+
+def test_changes_from_another_instance_are_reloaded(handler, tmp_path):
+    other = AdvancedDataHandler(str(tmp_path / 'metaforma.db'))
+    before = len(handler.get_all_students())
+
+    student_id = add_students(other, 1, 'FAC_3')[0]
+
+    assert len(handler.get_all_students()) == before + 1
+    assert len(handler.get_students_by_fac('FAC_3')) == 1
+    assert len(handler.get_payment_installments(student_id)) == 3
+
+
+def test_concurrent_sessions_keep_frames_and_indexes_consistent(handler):
+    handler.APPEND_CHUNK_SIZE = 7
+    seeded = add_students(handler, 20, 'FAC_1')
+    errors = []
+    previous_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def writer(worker):
+        try:
+            for round_number in range(10):
+                add_students(handler, 3, f'FAC_W{worker}')
+                handler.update_student(seeded[worker * 4 + round_number % 4], {'facCode': f'FAC_M{worker}'})
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(60):
+                for fac_code in ['FAC_1', 'FAC_W0', 'FAC_M1']:
+                    students = handler.get_students_by_fac(fac_code)
+                    assert (students['facCode'] == fac_code).all()
+                handler.get_financial_summary()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(previous_interval)
+
+    assert errors == []
+    students = handler.get_all_students()
+    assert students['id'].is_unique
+    assert len(handler.get_payment_installments(seeded[0])) == 3
+    for fac_code, group in students.groupby('facCode'):
+        assert handler.get_students_by_fac(fac_code).equals(group)
+    assert sorted(handler._student_rows) == sorted(students['id'])
+    assert sorted(handler._payment_rows) == sorted(handler.payments_df['id'])
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils.backend_migrator import BackendMigrator, MigrationCheckpoint
+
+
+def write_backend(path, ids, id_type='INTEGER'):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE students (id {id_type}, name TEXT, email TEXT, phone TEXT, birthDate TEXT, course TEXT)")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, password TEXT, role TEXT)")
+    conn.executemany(
+        "INSERT INTO students VALUES (?, ?, ?, ?, ?, ?)",
+        [(i, f'ALUNO {i}', f'aluno{i}@example.com', '11999999999', '2000-01-01', 'Curso A') for i in ids]
+    )
+    conn.execute("INSERT INTO users (username, password, role) VALUES ('admin', 'x', 'admin')")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def backend(tmp_path):
+    path = str(tmp_path / 'backend.db')
+    write_backend(path, list(range(1, 26)) + [None])
+    return path
+
+
+def make_migrator(backend, tmp_path, batch_size=10):
+    return BackendMigrator(backend, batch_size=batch_size, checkpoint_path=str(tmp_path / 'checkpoint.db'))
+
+
+def test_students_are_read_in_batches(backend, tmp_path, monkeypatch):
+    loads = []
+    monkeypatch.setattr(MigrationCheckpoint, 'load_rows', lambda self: loads.append(self) or pytest.fail('recarga'))
+    migrator = make_migrator(backend, tmp_path)
+
+    report = migrator.migrate_all_data()
+
+    assert [batch['rows'] for batch in migrator.batch_stats] == [10, 10, 5]
+    assert [batch['last_id'] for batch in migrator.batch_stats] == ['10', '20', '25']
+    assert report['students_migrated'] == 26
+    assert migrator.students_data['id'].iloc[:25].tolist() == list(range(1, 26))
+    assert migrator.students_data['migrated_from_backend'].dtype == bool
+    assert loads == []
+    assert not os.path.exists(migrator.checkpoint_path)
+
+
+@pytest.mark.parametrize('id_type', ['INTEGER', '', 'TEXT'])
+def test_interrupted_migration_resumes_after_the_last_batch(tmp_path, id_type):
+    backend = str(tmp_path / 'backend.db')
+    ids = list(range(1, 26)) if id_type != 'TEXT' else [f'S{i:03d}' for i in range(1, 26)]
+    write_backend(backend, ids, id_type)
+
+    interrupted = make_migrator(backend, tmp_path)
+    transform = interrupted._transform_students_data
+    calls = []
+
+    def failing_transform(students):
+        calls.append(len(students))
+        if len(calls) == 3:
+            raise RuntimeError('conexão perdida')
+        return transform(students)
+
+    interrupted._transform_students_data = failing_transform
+    interrupted.migrate_all_data()
+    assert interrupted.students_data.empty
+    assert os.path.exists(interrupted.checkpoint_path)
+
+    resumed = make_migrator(backend, tmp_path)
+    report = resumed.migrate_all_data()
+
+    assert resumed.resumed_from == ids[19]
+    assert type(resumed.resumed_from) is type(ids[19])
+    assert report['batches']['count'] == 3
+    assert resumed.students_data['id'].astype(type(ids[0])).tolist() == ids
+    assert resumed.students_data['email'].is_unique
+    assert not os.path.exists(resumed.checkpoint_path)
+
+
+def test_checkpoint_of_another_database_is_discarded(backend, tmp_path):
+    checkpoint = MigrationCheckpoint(str(tmp_path / 'checkpoint.db'), str(tmp_path / 'other.db'))
+    checkpoint._set('last_id', 20)
+    checkpoint.conn.commit()
+    checkpoint.close()
+
+    migrator = make_migrator(backend, tmp_path)
+    migrator.migrate_all_data()
+
+    assert migrator.resumed_from is None
+    assert len(migrator.students_data) == 26
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('R$ 1.234,56', 1234.56),
+    ('R$ 400.00', 400.0),
+    ('400,5', 400.5),
+    ('-1.000,00', -1000.0),
+    (' 12 ', 12.0),
+    ('abc', np.nan),
+])
+def test_brl_amounts(reconciler, raw, expected):
+    parsed = reconciler._parse_brl_amounts(pd.Series([raw]))
+
+    assert parsed.iloc[0] == pytest.approx(expected, nan_ok=True)
+
+
+def test_numeric_amount_column_is_kept(reconciler):
+    parsed = reconciler._parse_brl_amounts(pd.Series([400, 12.5]))
+
+    assert parsed.tolist() == [400.0, 12.5]
+
+
+def test_mixed_date_formats_are_parsed_per_row(reconciler):
+    raw = pd.Series(['2025-03-01', '05/03/2025', '2025-03-10', '10/03/25', '2025-03-12 14:30:00', 'lixo', None])
+
+    parsed = reconciler._parse_extract_dates(raw)
+
+    assert parsed.tolist()[:5] == [
+        pd.Timestamp('2025-03-01'), pd.Timestamp('2025-03-05'), pd.Timestamp('2025-03-10'),
+        pd.Timestamp('2025-03-10'), pd.Timestamp('2025-03-12 14:30:00')
+    ]
+    assert parsed.iloc[5:].isna().all()
+
+
+def test_extract_with_mixed_dates_keeps_every_row(reconciler):
+    extract = pd.DataFrame({
+        'data': ['2025-03-01', '05/03/2025', '2025-03-10'],
+        'valor': ['R$ 400,00', 'R$ 1.200,50', '-35,90'],
+        'descricao': ['PIX RECEBIDO - JOAO SANTOS', 'TED PEDRO LIMA', 'TARIFA'],
+    })
+
+    frame = reconciler.load_bank_extract_frame(data=extract)
+
+    assert frame['date'].dt.strftime('%Y-%m-%d').tolist() == ['2025-03-01', '2025-03-05', '2025-03-10']
+    assert frame['amount'].tolist() == [400.0, 1200.5, 35.9]
+    assert frame['type'].tolist() == ['credit', 'credit', 'debit']
@@ -0,0 +1,114 @@
+from copy import deepcopy
+from itertools import permutations
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from tests.conftest import (
+    BASE_DATE, baseline_score, make_credit, make_payment, match_summary, random_scenario
+)
+from utils.bank_reconciliation import _solve_assignment
+
+
+def best_total(weights):
+    """Maior soma de scores de um emparelhamento, por força bruta (linhas = créditos)."""
+    def search(row, used):
+        if row == len(weights):
+            return 0.0
+        best = search(row + 1, used)
+        for col, weight in enumerate(weights[row]):
+            if weight > 0.6 and col not in used:
+                best = max(best, weight + search(row + 1, used | {col}))
+        return best
+    return search(0, frozenset())
+
+
+def total_score(result):
+    return sum(match['match_score'] for match in result['matched_payments'])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_optimal_scores_at_least_greedy(reconciler, seed):
+    credits, payments = random_scenario(seed)
+    
+    greedy = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='greedy')
+    optimal = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    
+    assert total_score(optimal) >= total_score(greedy) - 1e-9
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_optimal_matches_brute_force_on_small_instances(reconciler, seed):
+    credits, payments = random_scenario(seed, n_students=2, n_credits=6)
+    payments = payments[:7]
+    weights = [[baseline_score(credit, payment) for payment in payments] for credit in credits]
+    
+    result = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    
+    assert total_score(result) == pytest.approx(best_total(weights))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_optimal_does_not_depend_on_extract_order(reconciler, seed):
+    credits, payments = random_scenario(seed)
+    shuffled = [credits[i] for i in np.random.default_rng(seed).permutation(len(credits))]
+    
+    first = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    second = reconciler.reconcile_payments(shuffled, deepcopy(payments), matching_mode='optimal')
+    
+    assert match_summary(first) == match_summary(second)
+
+
+def test_optimal_uses_every_installment_of_a_same_value_group(reconciler):
+    # Créditos sem nome só dependem de valor e data: o grupo precisa oferecer várias parcelas
+    payments = [make_payment(student_id=f'STU_{i}', student_name=f'ALUNO {chr(65 + i)}') for i in range(5)]
+    credits = [make_credit(description='BOLETO PAGO 123') for _ in range(3)]
+    credits.append(make_credit(date=BASE_DATE + timedelta(days=1), description='PIX RECEBIDO - ALUNO C'))
+    
+    result = reconciler.reconcile_payments(credits, payments, matching_mode='optimal')
+    
+    assert len(result['matched_payments']) == 4
+    assert len({id(match['payment']) for match in result['matched_payments']}) == 4
+    named = [match for match in result['matched_payments'] if 'ALUNO C' in match['transaction'].description]
+    assert named[0]['payment'].student_id == 'STU_2'
+
+
+def test_optimal_runs_components_in_a_process_pool(reconciler):
+    reconciler.max_workers = 2
+    reconciler.parallel_min_edges = 2
+    credits, payments = random_scenario(7)
+    
+    pooled = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    reconciler.max_workers = 1
+    sequential = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    
+    assert match_summary(pooled) == match_summary(sequential)
+
+
+def test_optimal_solves_small_components_without_a_pool(reconciler, monkeypatch):
+    pools = []
+    monkeypatch.setattr('utils.bank_reconciliation.ProcessPoolExecutor', lambda *args, **kwargs: pools.append(kwargs))
+    reconciler.max_workers = 2
+    credits, payments = random_scenario(7)
+    
+    result = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    reconciler.max_workers = 1
+    sequential = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='optimal')
+    
+    assert pools == []
+    assert match_summary(result) == match_summary(sequential)
+
+
+def test_solve_assignment_is_minimum_cost():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        cost = rng.random((4, 6))
+        assignment = _solve_assignment(cost)
+        
+        best = min(
+            sum(cost[row, col] for row, col in enumerate(columns))
+            for columns in permutations(range(6), 4)
+        )
+        assert len(set(assignment.tolist())) == 4
+        assert cost[np.arange(4), assignment].sum() == pytest.approx(best)
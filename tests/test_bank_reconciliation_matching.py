@@ -0,0 +1,146 @@
+from copy import deepcopy
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from tests.conftest import (
+    BASE_DATE, baseline_reconcile, baseline_score, make_credit, make_payment, match_summary, random_scenario
+)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_candidate_pairs_cover_every_pair_above_threshold(reconciler, seed):
+    credits, payments = random_scenario(seed)
+    transactions = reconciler._build_transaction_arrays(credits)
+    arrays = reconciler._build_payment_arrays(payments)
+    
+    (tx_idx, pay_idx), window = reconciler._build_candidate_pairs(transactions, arrays)
+    name_pairs = set(zip(tx_idx.tolist(), pay_idx.tolist()))
+    
+    # Parcelas sem nome em comum são representadas pelo grupo (valor, vencimento)
+    group_of = {}
+    for group in range(len(window['bounds']) - 1):
+        for member in window['members'][window['bounds'][group]:window['bounds'][group + 1]]:
+            group_of[int(member)] = group
+    above_groups = {
+        (int(t), int(g)) for t, g, score in zip(window['tx'], window['group'], window['score']) if score > 0.6
+    }
+    
+    for t, credit in enumerate(credits):
+        for p, payment in enumerate(payments):
+            if baseline_score(credit, payment) <= 0.6:
+                continue
+            if any(word in credit.description for word in payment.student_name.split()):
+                assert (t, p) in name_pairs
+            else:
+                assert (t, group_of[p]) in above_groups
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_greedy_matches_baseline(reconciler, seed):
+    credits, payments = random_scenario(seed)
+    expected = baseline_reconcile(credits, payments)
+    
+    result = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='greedy')
+    positions = {id(credit): position for position, credit in enumerate(credits)}
+    matched = {
+        positions[id(match['transaction'])]: (
+            match['payment'].student_id, match['payment'].installment_number, match['match_score']
+        )
+        for match in result['matched_payments']
+    }
+    
+    assert matched.keys() == expected.keys()
+    for position, (student_id, installment_number, score) in expected.items():
+        assert matched[position][:2] == (student_id, installment_number)
+        assert matched[position][2] == pytest.approx(score)
+    assert len(result['unmatched_transactions']) == len(credits) - len(expected)
+
+
+@pytest.mark.parametrize('due_offset', range(8))
+def test_late_full_name_credit_matches_across_bucket_boundary(reconciler, due_offset):
+    # Valor exato + nome completo = 0.7, mesmo 5 dias fora da tolerância de data
+    due_date = BASE_DATE + timedelta(days=due_offset)
+    payments = [make_payment(due_date=due_date)]
+    credits = [make_credit(date=due_date + timedelta(days=5))]
+    
+    result = reconciler.reconcile_payments(credits, payments)
+    
+    assert len(result['matched_payments']) == 1
+    assert result['matched_payments'][0]['match_score'] == pytest.approx(0.7)
+
+
+@pytest.mark.parametrize('due_offset', range(8))
+@pytest.mark.parametrize('base_amount', [400.0, 402.5, 404.99, 405.0])
+def test_tolerance_windows_do_not_depend_on_bucket_position(reconciler, due_offset, base_amount):
+    due_date = BASE_DATE + timedelta(days=due_offset)
+    
+    # Sem nome: precisa das duas tolerâncias (valor exato + mesmo dia = 0.7)
+    inside = [make_credit(date=due_date, amount=base_amount, description='BOLETO PAGO 123')]
+    result = reconciler.reconcile_payments(inside, [make_payment(due_date=due_date, amount=base_amount)])
+    assert len(result['matched_payments']) == 1
+    
+    # Diferença de valor 1,00 no limite da data: 0.32 + 0 + 0.3 = 0.62
+    edge = [make_credit(date=due_date + timedelta(days=3), amount=base_amount + 1.0)]
+    result = reconciler.reconcile_payments(edge, [make_payment(due_date=due_date, amount=base_amount)])
+    assert len(result['matched_payments']) == 1
+    assert result['matched_payments'][0]['match_score'] == pytest.approx(0.62)
+    
+    # Diferença de valor igual à tolerância: 0 + 0.3 + 0.3 = 0.6, não passa
+    outside = [make_credit(date=due_date, amount=base_amount + 5.0)]
+    result = reconciler.reconcile_payments(outside, [make_payment(due_date=due_date, amount=base_amount)])
+    assert result['matched_payments'] == []
+
+
+def test_partitioned_sees_name_candidates_from_other_months(reconciler):
+    payments = [
+        make_payment(installment_number=1, due_date=BASE_DATE),
+        make_payment(student_id='STU_2', student_name='PAULA COSTA', due_date=BASE_DATE + timedelta(days=40)),
+    ]
+    credits = [make_credit(date=BASE_DATE + timedelta(days=40), description='PIX RECEBIDO - JOAO SANTOS')]
+    
+    full = reconciler.reconcile_payments(credits, deepcopy(payments))
+    partitioned = reconciler.reconcile_partitioned(credits, deepcopy(payments))
+    
+    assert len(full['matched_payments']) == 1
+    assert [
+        (match['payment'].student_id, match['payment'].installment_number) for match in partitioned['matched_payments']
+    ] == [(match['payment'].student_id, match['payment'].installment_number) for match in full['matched_payments']]
+
+
+@pytest.mark.parametrize('matching_mode', ['greedy', 'optimal'])
+def test_partitioned_pool_matches_sequential_run(reconciler, matching_mode):
+    credits, payments = random_scenario(8)
+    reconciler.max_workers = 2
+    reconciler.parallel_min_credits = 0
+    
+    pooled = reconciler.reconcile_partitioned(credits, deepcopy(payments), matching_mode=matching_mode)
+    reconciler.max_workers = 1
+    sequential = reconciler.reconcile_partitioned(credits, deepcopy(payments), matching_mode=matching_mode)
+    
+    assert len(pooled['matched_payments']) > 0
+    assert match_summary(pooled) == match_summary(sequential)
+
+
+def test_partitioned_runs_small_extracts_without_a_pool(reconciler, monkeypatch):
+    pools = []
+    monkeypatch.setattr('utils.bank_reconciliation.ProcessPoolExecutor', lambda *args, **kwargs: pools.append(kwargs))
+    credits, payments = random_scenario(8)
+    reconciler.max_workers = 2
+    
+    result = reconciler.reconcile_partitioned(credits, deepcopy(payments))
+    
+    assert pools == []
+    assert len(result['matched_payments']) > 0
+
+
+def test_result_structure_is_unchanged(reconciler):
+    payments = [make_payment(installment_number=i, due_date=BASE_DATE + timedelta(days=30 * i)) for i in range(3)]
+    credits = [make_credit(date=BASE_DATE + timedelta(days=30))]
+    
+    result = reconciler.reconcile_payments(credits, payments)
+    
+    assert {'matched_payments', 'unmatched_transactions', 'unpaid_installments', 'metrics'} <= result.keys()
+    assert result['matched_payments'][0]['payment'].installment_number == 1
+    assert [payment.installment_number for payment in result['unpaid_installments']] == [0, 2]
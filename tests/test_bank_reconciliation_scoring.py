@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from tests.conftest import BASE_DATE, baseline_score, make_credit, make_payment, random_scenario
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_batch_scores_match_pairwise_baseline(reconciler, seed):
+    credits, payments = random_scenario(seed, n_students=15, n_credits=40)
+    transactions = reconciler._build_transaction_arrays(credits)
+    arrays = reconciler._build_payment_arrays(payments)
+
+    tx_idx, pay_idx = np.divmod(np.arange(len(credits) * len(payments)), len(payments))
+    scores = reconciler._score_pairs(transactions, arrays, tx_idx, pay_idx)
+
+    expected = [baseline_score(credits[t], payments[p]) for t, p in zip(tx_idx, pay_idx)]
+    np.testing.assert_allclose(scores, expected, atol=1e-12)
+
+
+@pytest.mark.parametrize('amount, expected', [
+    (400.0, 1.0),
+    (402.5, 0.8),
+    (405.0, 0.6),
+    (405.01, 0.6),
+    (395.0, 0.6),
+])
+def test_amount_tolerance_boundaries(reconciler, amount, expected):
+    credit = make_credit(amount=amount)
+    payment = make_payment()
+
+    assert reconciler._calculate_match_score(credit, payment) == pytest.approx(expected)
+    assert reconciler._calculate_match_score(credit, payment) == pytest.approx(baseline_score(credit, payment))
+
+
+@pytest.mark.parametrize('days, expected', [
+    (0, 1.0),
+    (1, 0.9),
+    (-2, 0.8),
+    (3, 0.7),
+    (4, 0.7),
+])
+def test_date_tolerance_boundaries(reconciler, days, expected):
+    credit = make_credit(date=BASE_DATE + timedelta(days=days))
+    payment = make_payment()
+
+    assert reconciler._calculate_match_score(credit, payment) == pytest.approx(expected)
+    assert reconciler._calculate_match_score(credit, payment) == pytest.approx(baseline_score(credit, payment))
+
+
+def test_partial_name_counts_each_word(reconciler):
+    credit = make_credit(description='TED 12345 JOAO')
+    payment = make_payment(student_name='JOAO SANTOS LIMA')
+
+    assert reconciler._calculate_match_score(credit, payment) == pytest.approx(0.8)
+
+
+def test_custom_tolerances_are_used(reconciler):
+    reconciler.tolerance_amount = 10.0
+    reconciler.tolerance_days = 5
+    payment = make_payment()
+    near = make_credit(date=BASE_DATE + timedelta(days=1), amount=405.0, description='BOLETO PAGO')
+    edge = make_credit(date=BASE_DATE + timedelta(days=5), amount=410.0, description='BOLETO PAGO')
+
+    assert reconciler._calculate_match_score(near, payment) == pytest.approx(baseline_score(near, payment, 10.0, 5))
+    assert reconciler._calculate_match_score(edge, payment) == pytest.approx(0.0)
@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from benchmarks.bench_statement_parsers import write_statements
+from utils.bank_statement_parsers import CNABParser, OFXParser, detect_statement_parser
+
+
+@pytest.fixture(scope='module')
+def statements(tmp_path_factory):
+    return write_statements(str(tmp_path_factory.mktemp('extratos')), 23)
+
+
+def read_all(reconciler, path, batch_size=5):
+    batches = [batch.frame for batch in reconciler.iter_bank_extract(path, batch_size=batch_size)]
+    return batches, pd.concat(batches, ignore_index=True)
+
+
+def test_detect_parser_by_extension():
+    assert isinstance(detect_statement_parser('extrato.OFX'), OFXParser)
+    assert isinstance(detect_statement_parser('retorno.ret'), CNABParser)
+    assert detect_statement_parser('extrato.csv') is None
+
+
+@pytest.mark.parametrize('file_format', ['CSV', 'OFX', 'CNAB 240', 'CNAB 400'])
+def test_batches_have_fixed_size(reconciler, statements, file_format):
+    batches, frame = read_all(reconciler, statements[file_format])
+
+    assert all(len(batch) == 5 for batch in batches[:-1])
+    assert 0 < len(batches[-1]) <= 5
+    assert (frame['type'] == 'credit').all()
+
+
+def test_ofx_matches_csv(reconciler, statements):
+    _, csv = read_all(reconciler, statements['CSV'])
+    _, ofx = read_all(reconciler, statements['OFX'], batch_size=7)
+
+    assert len(ofx) == len(csv)
+    assert (ofx['date'] == csv['date']).all()
+    assert ofx['amount'].to_numpy() == pytest.approx(csv['amount'].to_numpy())
+    assert (ofx['document'] == [f'{i:010d}' for i in range(len(csv))]).all()
+    assert (ofx['account'] == '56789').all()
+    assert ofx['description'].iloc[0].startswith('Pagamento José ALUNO 000000')
+
+
+@pytest.mark.parametrize('file_format, account', [('CNAB 240', '1234/56789'), ('CNAB 400', '12345678901234567890')])
+def test_cnab_keeps_only_liquidations(reconciler, statements, file_format, account):
+    _, csv = read_all(reconciler, statements['CSV'])
+    _, cnab = read_all(reconciler, statements[file_format], batch_size=4)
+
+    # Um em cada dez títulos do arquivo gerado é uma baixa (ocorrência 02)
+    liquidated = csv[csv.index % 10 != 0].reset_index(drop=True)
+    assert len(cnab) == len(liquidated)
+    assert (cnab['date'] == liquidated['date']).all()
+    assert cnab['amount'].to_numpy() == pytest.approx(liquidated['amount'].to_numpy())
+    assert (cnab['document'].str.strip() == [f'{i:010d}' for i in range(len(csv)) if i % 10]).all()
+    assert (cnab['account'] == account).all()
+
+
+def test_ofx_2_xml_in_a_single_line(reconciler, tmp_path):
+    path = tmp_path / 'extrato.ofx'
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?><OFX><BANKACCTFROM><ACCTID>999</ACCTID></BANKACCTFROM>'
+        '<STMTTRN><DTPOSTED>20250310</DTPOSTED><TRNAMT>-50.00</TRNAMT><NAME>TARIFA</NAME><FITID>1</FITID></STMTTRN>'
+        '<STMTTRN><DTPOSTED>20250311</DTPOSTED><TRNAMT>400,00</TRNAMT><NAME>PIX JOÃO</NAME><FITID>2</FITID></STMTTRN>'
+        '</OFX>',
+        encoding='utf-8'
+    )
+
+    _, frame = read_all(reconciler, str(path))
+
+    assert frame['type'].tolist() == ['debit', 'credit']
+    assert frame['amount'].tolist() == [50.0, 400.0]
+    assert frame['description'].iloc[1] == 'PIX JOÃO'
+    assert (frame['account'] == '999').all()
+
+
+def test_cnab_rejects_unknown_layout(reconciler, tmp_path):
+    path = tmp_path / 'retorno.ret'
+    path.write_text('CURTO\r\n', encoding='latin-1')
+
+    assert list(reconciler.iter_bank_extract(str(path))) == []
+
+
+def test_parser_base_requires_every_hook():
+    from utils.bank_statement_parsers import _StatementParser
+
+    class Incomplete(_StatementParser):
+        def _iter_chunks(self, stream):
+            return iter([])
+
+    with pytest.raises(TypeError):
+        Incomplete()
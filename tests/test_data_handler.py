@@ -0,0 +1,85 @@
+import pandas as pd
+
+from utils.data_handler import DataHandler
+
+
+def test_empty_period_summarizes_all_periods():
+    handler = DataHandler()
+
+    assert handler.get_financial_summary('') == handler.get_financial_summary()
+    assert 'error' not in handler.get_financial_summary('')
+
+
+def test_unknown_period_reports_error():
+    assert 'error' in DataHandler().get_financial_summary('FAC_999')
+
+
+def per_course_loop(handler):
+    """Cálculo anterior da performance: um filtro do DataFrame financeiro por curso."""
+    financial_df = handler.financial_data[handler.financial_data['Tipo'] == 'Realizado']
+    performance = []
+    for _, course in handler.courses_data.iterrows():
+        rows = financial_df[financial_df['Periodo'] == course['Codigo']]
+        if not rows.empty:
+            performance.append({
+                'codigo': course['Codigo'],
+                'nome': course['Nome'],
+                'total_alunos': course['Total_Alunos'],
+                'receita_realizada': rows['Receita_Bruta'].iloc[0],
+                'resultado_liquido': rows['Resultado_Liquido'].iloc[0],
+                'inadimplencia': rows['Inadimplencia'].iloc[0],
+                'ticket_medio': rows['Receita_Bruta'].iloc[0] / course['Total_Alunos'] if course['Total_Alunos'] > 0 else 0,
+                'status': course['Status']
+            })
+    return performance
+
+
+def test_course_performance_matches_per_course_loop():
+    handler = DataHandler(imports_dir=None)
+    handler.courses_data = pd.DataFrame({
+        'Codigo': ['FAC_3', 'FAC_1', 'FAC_2', 'FAC_4'],
+        'Nome': ['Curso C', 'Curso A', 'Curso B', 'Curso D'],
+        'Total_Alunos': [10, 0, 25, 8],
+        'Status': ['Concluído', 'Em Andamento', 'Concluído', 'Planejado']
+    })
+    handler.financial_data = pd.DataFrame({
+        'Periodo': ['FAC_1', 'FAC_2', 'FAC_2', 'FAC_3', 'FAC_4'],
+        'Tipo': ['Realizado', 'Realizado', 'Realizado', 'Realizado', 'Orcamento'],
+        'Receita_Bruta': [1000.0, 2500.0, 9999.0, 3000.0, 5000.0],
+        'Resultado_Liquido': [100.0, 250.0, 0.0, -30.0, 500.0],
+        'Inadimplencia': [0.0, 120.0, 0.0, 300.0, 0.0]
+    })
+
+    performance = handler.get_course_performance()['courses']
+
+    assert performance == per_course_loop(handler)
+    assert [course['codigo'] for course in performance] == ['FAC_3', 'FAC_1', 'FAC_2']
+
+
+def test_course_performance_of_sample_data_matches_per_course_loop():
+    handler = DataHandler(imports_dir=None)
+
+    assert handler.get_course_performance()['courses'] == per_course_loop(handler)
+
+
+def test_course_performance_cache_follows_data_version():
+    handler = DataHandler(imports_dir=None)
+    first = handler.get_course_performance_frame()
+    cached = handler._course_performance[1]
+
+    first.loc[0, 'receita_realizada'] = -1.0
+    assert handler.get_course_performance_frame().equals(cached)
+    assert handler._course_performance[1] is cached
+
+    handler.append_financial_data(pd.DataFrame({
+        'Periodo': ['FAC_99'], 'Tipo': ['Realizado'], 'Receita_Bruta': [500.0],
+        'Resultado_Liquido': [50.0], 'Inadimplencia': [0.0]
+    }))
+    handler.courses_data = pd.concat([handler.courses_data, pd.DataFrame({
+        'Codigo': ['FAC_99'], 'Nome': ['Nova Turma'], 'Total_Alunos': [5], 'Status': ['Em Andamento']
+    })], ignore_index=True)
+
+    updated = handler.get_course_performance_frame()
+    assert handler._course_performance[0] == handler.data_version()
+    assert updated.set_index('codigo').loc['FAC_99', 'ticket_medio'] == 100.0
+    assert updated.to_dict('records') == per_course_loop(handler)
@@ -0,0 +1,94 @@
+from copy import deepcopy
+from datetime import timedelta
+
+import pandas as pd
+
+from tests.conftest import BASE_DATE, make_credit, make_payment, random_scenario
+
+
+def students(*rows):
+    return pd.DataFrame(rows, columns=['id', 'fullName', 'cpfCnpj'])
+
+
+def matched(result):
+    return [
+        (match['payment'].student_id, match['payment'].installment_number, match['match_type'], match['match_score'])
+        for match in result['matched_payments']
+    ]
+
+
+def test_document_in_description_matches_the_nearest_open_installment(reconciler):
+    payments = [
+        make_payment(student_id='STU_1', student_name='JOAO SANTOS', installment_number=1, due_date=BASE_DATE),
+        make_payment(student_id='STU_1', student_name='JOAO SANTOS', installment_number=2, due_date=BASE_DATE + timedelta(days=31)),
+        make_payment(student_id='STU_2', student_name='PAULA COSTA', due_date=BASE_DATE + timedelta(days=30)),
+    ]
+    # Valor e nome apontariam para a PAULA; o CPF identifica o JOAO
+    credits = [
+        make_credit(date=BASE_DATE + timedelta(days=30), description='PIX RECEBIDO PAULA COSTA CPF 123.456.789-09'),
+        make_credit(date=BASE_DATE + timedelta(days=30), description='PIX 12345678909'),
+    ]
+    data = students(('STU_1', 'JOAO SANTOS', '123.456.789-09'), ('STU_2', 'PAULA COSTA', '987.654.321-00'))
+
+    result = reconciler.reconcile_payments(credits, payments, students_data=data)
+
+    assert matched(result) == [('STU_1', 2, 'documento', 1.0), ('STU_1', 1, 'documento', 1.0)]
+
+
+def test_cnpj_and_unformatted_student_documents_are_normalized(reconciler):
+    payments = [make_payment(student_id='STU_9', student_name='EMPRESA ALFA', amount=900.0)]
+    credits = [make_credit(amount=120.0, description='TED RECEBIDA 12.345.678/0001-90')]
+
+    result = reconciler.reconcile_payments(
+        credits, payments, students_data=students(('STU_9', 'EMPRESA ALFA', '12345678000190'))
+    )
+
+    assert matched(result) == [('STU_9', 1, 'documento', 1.0)]
+
+
+def test_shared_or_invalid_documents_fall_back_to_scoring(reconciler):
+    payments = [
+        make_payment(student_id='STU_1', student_name='JOAO SANTOS'),
+        make_payment(student_id='STU_2', student_name='PEDRO LIMA', amount=700.0),
+    ]
+    credits = [make_credit(description='PIX RECEBIDO - JOAO SANTOS 111.222.333-44')]
+    data = students(
+        ('STU_1', 'JOAO SANTOS', '111.222.333-44'),
+        ('STU_2', 'PEDRO LIMA', '111.222.333-44'),
+        ('STU_3', 'ANA SOUZA', '1234'),
+    )
+
+    result = reconciler.reconcile_payments(credits, deepcopy(payments), students_data=data)
+
+    assert [item[:3] for item in matched(result)] == [('STU_1', 1, 'score')]
+
+
+def test_credits_beyond_the_open_installments_go_to_scoring(reconciler):
+    payments = [make_payment(student_id='STU_1', student_name='JOAO SANTOS', status='paid'),
+                make_payment(student_id='STU_2', student_name='JOAO SANTOS', installment_number=1)]
+    credits = [make_credit(description='PIX 123.456.789-09 JOAO SANTOS')]
+
+    result = reconciler.reconcile_payments(
+        credits, payments, students_data=students(('STU_1', 'JOAO SANTOS', '123.456.789-09'))
+    )
+
+    assert [item[:3] for item in matched(result)] == [('STU_2', 1, 'score')]
+
+
+def test_document_matches_are_not_scored(reconciler, monkeypatch):
+    credits, payments = random_scenario(3, n_students=10, n_credits=30)
+    student_ids = list(dict.fromkeys(payment.student_id for payment in payments))
+    documents = {student_id: f'{index + 1:011d}' for index, student_id in enumerate(student_ids)}
+    for position, credit in enumerate(credits[::2]):
+        credit.description += f' CPF {documents[student_ids[position % len(student_ids)]]}'
+    data = students(*((student_id, '', document) for student_id, document in documents.items()))
+
+    scored = []
+    score_pairs = reconciler._score_pairs
+    monkeypatch.setattr(reconciler, '_score_pairs', lambda *args: scored.append(len(args[0]['amount'])) or score_pairs(*args))
+    result = reconciler.reconcile_payments(credits, deepcopy(payments), students_data=data)
+
+    by_document = [match for match in result['matched_payments'] if match['match_type'] == 'documento']
+    assert len(by_document) > 0
+    assert scored == [len(credits) - len(by_document)]
+    assert len(result['matched_payments']) + len(result['unmatched_transactions']) == len(credits)
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from utils.calculation_cache import CalculationCache
+from utils.data_handler import DataHandler
+from utils.financial_calculator import FinancialCalculator
+
+
+def test_cache_is_keyed_by_data_handler():
+    first, second = DataHandler(), DataHandler()
+    first.financial_data = first.financial_data.copy()
+    second.financial_data = second.financial_data.assign(Receita_Bruta=0.0)
+    assert first.data_version() == second.data_version()
+
+    cache = CalculationCache()
+    calculator = FinancialCalculator(first, cache=cache)
+    before = calculator.calculate_metrics_table()
+    calculator.data_handler = second
+    after = calculator.calculate_metrics_table()
+
+    assert not before.equals(after)
+    pd.testing.assert_frame_equal(FinancialCalculator(second).calculate_metrics_table(), after)
+
+
+
+def test_new_version_only_drops_results_of_the_same_data_handler():
+    first, second = DataHandler(), DataHandler()
+    cache = CalculationCache()
+    first_calculator = FinancialCalculator(first, cache=cache)
+    second_calculator = FinancialCalculator(second, cache=cache)
+    first_calculator.calculate_metrics_table()
+    second_calculator.calculate_metrics_table()
+
+    first.financial_data = first.financial_data.assign(Receita_Bruta=0.0)
+    first_calculator.calculate_metrics_table()
+    second_calculator.calculate_metrics_table()
+
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 3}
+    first_calculator.calculate_metrics_table()
+    assert cache.stats()['hits'] == 2
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_handler import DataHandler
+from utils.financial_calculator import FinancialCalculator
+
+
+def financial_frame(n_periods=12, seed=0):
+    """Linhas Realizado/Orcamento de FAC_1..FAC_n em ordem embaralhada, com um período sem receita."""
+    rng = np.random.default_rng(seed)
+    periods = [f'FAC_{i}' for i in range(1, n_periods + 1)]
+    rows = []
+    for kind in ['Realizado', 'Orcamento']:
+        for period in periods:
+            receita = 0.0 if (period == 'FAC_5' and kind == 'Realizado') else float(rng.integers(1000, 30000))
+            despesas = float(rng.integers(0, 8000))
+            rows.append({
+                'Periodo': period, 'Tipo': kind, 'Receita_Bruta': receita,
+                'Inadimplencia': float(rng.integers(0, 3000)) if kind == 'Realizado' else 0.0,
+                'Total_Despesas': despesas, 'Resultado_Liquido': receita - despesas
+            })
+    return pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+@pytest.fixture
+def calculator():
+    handler = DataHandler(imports_dir=None)
+    handler.financial_data = financial_frame()
+    return FinancialCalculator(handler)
+
+
+def test_metrics_table_matches_per_period_calculations(calculator):
+    table = calculator.calculate_metrics_table().pivot(index='Periodo', columns='Metrica', values='Valor')
+    periods = [f'FAC_{i}' for i in range(1, 13)]
+
+    previous = None
+    for period in periods:
+        summary = calculator.generate_financial_summary(period)
+        expected = {
+            'receita_realizada': summary['receita_realizada'],
+            'receita_orcada': summary['receita_orcada'],
+            'taxa_conversao': summary['taxa_conversao'],
+            'roi': summary['roi'],
+            'margem_lucro': summary['margem_lucro'],
+            'eficiencia_operacional': summary['eficiencia_operacional'],
+            'taxa_inadimplencia': calculator.calculate_default_rate(
+                summary['inadimplencia_total'], summary['receita_realizada']
+            ),
+            'crescimento_receita': 0.0 if previous is None else calculator.calculate_growth_rate(
+                summary['receita_realizada'], previous
+            )
+        }
+        previous = summary['receita_realizada']
+
+        assert table.loc[period].to_dict() == pytest.approx(expected), period
+
+
+def test_metrics_table_orders_periods_by_number(calculator):
+    table = calculator.calculate_metrics_table()
+
+    assert table['Periodo'].unique().tolist() == [f'FAC_{i}' for i in range(1, 13)]
+
+
+@pytest.mark.parametrize('method, arguments', [
+    ('calculate_roi', ([120.0, 50.0, 10.0, np.nan], [100.0, 0.0, 40.0, 10.0])),
+    ('calculate_conversion_rate', ([80.0, 5.0, 0.0], [100.0, 0.0, 30.0])),
+    ('calculate_default_rate', ([10.0, 3.0], [200.0, 0.0])),
+    ('calculate_profit_margin', ([-50.0, 20.0], [400.0, 0.0])),
+    ('calculate_operational_efficiency', ([1000.0, 0.0, 300.0], [250.0, 10.0, 450.0])),
+    ('calculate_growth_rate', ([110.0, 0.0, 5.0, 40.0], [100.0, 0.0, 0.0, 80.0])),
+    ('calculate_break_even_point', ([1000.0, 1000.0, 999.0], [10.0, 30.0, 5.0], [30.0, 20.0, 15.0])),
+])
+def test_batch_methods_match_scalar_methods(method, arguments):
+    calculator = FinancialCalculator()
+    batch = getattr(calculator, f'{method}_batch')(*arguments)
+
+    for position, values in enumerate(zip(*arguments)):
+        if any(np.isnan(value) for value in values):
+            assert batch[position] == 0
+            continue
+        assert batch[position] == pytest.approx(getattr(calculator, method)(*values)), values
@@ -0,0 +1,104 @@
+from copy import deepcopy
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from tests.conftest import (
+    BASE_DATE, FIRST_NAMES, LAST_NAMES, baseline_reconcile, make_credit, make_payment
+)
+from utils.bank_reconciliation import NameTokenIndex
+
+
+def test_tokens_are_accent_folded_whole_words_without_stop_words():
+    index = NameTokenIndex(['A', 'B'], ['José da Silva', 'SILVANA DOS SANTOS'])
+    descriptions = ['PIX JOSE SILVA', 'TED SILVANA', 'PIX DA DOS']
+    
+    desc_idx = np.array([0, 0, 1, 1, 2, 2])
+    student_idx = np.array([0, 1, 0, 1, 0, 1])
+    
+    assert index.shared_tokens(descriptions, desc_idx, student_idx).tolist() == [2, 0, 0, 1, 0, 0]
+    assert index.token_count.tolist() == [2, 2]
+
+
+def test_repeated_name_words_count_once_per_occurrence():
+    index = NameTokenIndex(['A'], ['PEDRO LIMA LIMA'])
+    
+    shared = index.shared_tokens(['TED LIMA'], np.array([0]), np.array([0]))
+    
+    assert index.token_count.tolist() == [3]
+    assert shared.tolist() == [2]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_strong_candidates_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    names = [' '.join(rng.choice(FIRST_NAMES + LAST_NAMES, int(rng.integers(1, 5)))) for _ in range(60)]
+    descriptions = [' '.join(rng.choice(FIRST_NAMES + LAST_NAMES + ['PIX', 'TED'], 4)) for _ in range(80)]
+    index = NameTokenIndex([f'S{i}' for i in range(len(names))], names)
+    
+    desc_idx, student_idx = index.strong_candidates(descriptions)
+    
+    expected = set()
+    for d, description in enumerate(descriptions):
+        words = set(description.split())
+        for s, name in enumerate(names):
+            name_words = name.split()
+            if 3 * sum(word in words for word in name_words) > 2 * len(name_words):
+                expected.add((d, s))
+    assert set(zip(desc_idx.tolist(), student_idx.tolist())) == expected
+
+
+def single_fee_scenario(n_students, seed=0):
+    """Todos os alunos com a mesma mensalidade e o mesmo vencimento."""
+    rng = np.random.default_rng(seed)
+    payments, credits = [], []
+    for student in range(n_students):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        payments.append(make_payment(student_id=f'STU_{student:04d}', student_name=name))
+        words = name.split()
+        credits.append(make_credit(
+            date=BASE_DATE + timedelta(days=int(rng.integers(-2, 3))),
+            description=str(rng.choice([f'PIX RECEBIDO - {name}', f'TED {words[0]}', 'BOLETO PAGO 123']))
+        ))
+    return credits, payments
+
+
+def test_single_fee_greedy_matches_baseline(reconciler):
+    credits, payments = single_fee_scenario(80)
+    expected = baseline_reconcile(credits, payments)
+    
+    result = reconciler.reconcile_payments(credits, deepcopy(payments), matching_mode='greedy')
+    positions = {id(credit): position for position, credit in enumerate(credits)}
+    matched = {
+        positions[id(match['transaction'])]: (match['payment'].student_id, match['payment'].installment_number)
+        for match in result['matched_payments']
+    }
+    
+    assert matched == {position: match[:2] for position, match in expected.items()}
+
+
+def test_single_fee_candidates_grow_with_token_overlap_not_bucket_size(reconciler):
+    # Nomes sem palavras em comum: cada descrição só compartilha palavras com o próprio aluno
+    word = lambda value: 'K' + ''.join(chr(ord('A') + (value // 26 ** power) % 26) for power in range(3))
+    payments = [
+        make_payment(student_id=f'STU_{student:04d}', student_name=f'{word(2 * student)} {word(2 * student + 1)}')
+        for student in range(2000)
+    ]
+    credits = [
+        make_credit(description=f'PIX RECEBIDO - {payment.student_name}' if position % 2 else 'BOLETO PAGO 123')
+        for position, payment in enumerate(payments)
+    ]
+    transactions = reconciler._build_transaction_arrays(credits)
+    arrays = reconciler._build_payment_arrays(payments)
+    
+    (tx_idx, pay_idx), window = reconciler._build_candidate_pairs(transactions, arrays)
+    
+    # O produto da janela seria 2000 x 2000 pares; sobra um grupo por crédito e um par por nome
+    assert len(window['members']) == len(payments)
+    assert len(window['tx']) == len(credits)
+    assert tx_idx.tolist() == list(range(1, len(credits), 2))
+    assert pay_idx.tolist() == list(range(1, len(credits), 2))
+    
+    result = reconciler.reconcile_payments(credits, payments)
+    assert len(result['matched_payments']) == len(credits)
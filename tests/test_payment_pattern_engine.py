@@ -0,0 +1,77 @@
+import re
+
+import pytest
+
+from utils.bank_reconciliation import DOCUMENT_PATTERN, PaymentPatternEngine
+
+
+@pytest.fixture
+def engine():
+    return PaymentPatternEngine()
+
+
+@pytest.mark.parametrize('description, channel, reference, document', [
+    ('PIX RECEBIDO - João 123.456.789-09', 'PIX', '123', '12345678909'),
+    ('TED 4455 CNPJ 12.345.678/0001-90', 'TED', '4455', '12345678000190'),
+    ('PAGAMENTO CARTÃO 9988', 'CARTAO', '9988', ''),
+    ('BOLETO LIQUIDADO 0001 12345678909', 'BOLETO', '0001', '12345678909'),
+    ('TRANSFERENCIA TED 77', 'TRANSFERENCIA', '77', ''),
+    ('TRANSF RECEBIDA', 'TRANSFERENCIA', '', ''),
+    # O canal que aparece primeiro na descrição vence, qualquer que seja a ordem dos padrões
+    ('TRANSF VIA PIX 55', 'TRANSFERENCIA', '55', ''),
+    ('CPF 111.222.333-44 VIA PIX', 'PIX', '', '11122233344'),
+    # Canal só como palavra inteira; documento com dígitos a mais não é CPF
+    ('PIXEL LTDA', '', '', ''),
+    ('DEPOSITO 1234567890123', '', '', ''),
+    ('', '', '', ''),
+])
+def test_extract_channel_reference_and_document(engine, description, channel, reference, document):
+    extracted = engine.extract([description]).iloc[0]
+
+    assert extracted.to_dict() == {'channel': channel, 'reference': reference, 'document': document}
+
+
+def test_extract_keeps_one_row_per_description_in_order(engine):
+    descriptions = ['BOLETO 1', None, 'PIX 2', 'nada', 'TED 3']
+
+    extracted = engine.extract(descriptions)
+
+    assert extracted['channel'].tolist() == ['BOLETO', '', 'PIX', '', 'TED']
+    assert extracted['reference'].tolist() == ['1', '', '2', '', '3']
+    assert engine.extract([]).columns.tolist() == ['channel', 'reference', 'document']
+
+
+def test_custom_patterns_map_to_their_own_groups():
+    engine = PaymentPatternEngine({'TRANSF': r'TRANSF', 'TRANSFERENCIA': r'TRANSFERENCIA', 'DOC': r'DOC\w*'})
+
+    extracted = engine.extract(['TRANSFERENCIA 10', 'TRANSF 20', 'DOCUMENTO 30', 'PIX 40'])
+
+    # Na mesma posição o primeiro padrão é tentado antes, mas precisa terminar em fim de palavra
+    assert extracted['channel'].tolist() == ['TRANSFERENCIA', 'TRANSF', 'DOC', '']
+    assert extracted['reference'].tolist() == ['10', '20', '30', '']
+
+
+def test_same_position_ties_follow_pattern_order():
+    first = PaymentPatternEngine({'CARTAO': r'CARTAO\s+\w+', 'DEBITO': r'CARTAO DEBITO'})
+    second = PaymentPatternEngine({'DEBITO': r'CARTAO DEBITO', 'CARTAO': r'CARTAO\s+\w+'})
+
+    assert first.extract(['CARTAO DEBITO 12']).at[0, 'channel'] == 'CARTAO'
+    assert second.extract(['CARTAO DEBITO 12']).at[0, 'channel'] == 'DEBITO'
+
+
+def test_compiled_expression_is_cached_per_pattern_set(engine):
+    assert engine.compiled is PaymentPatternEngine().compiled
+    assert engine.compiled is not PaymentPatternEngine({'PIX': r'PIX'}).compiled
+    assert set(engine.compiled.groupindex) == set(engine.channel_patterns) | {'reference', 'document'}
+
+
+def test_documents_match_the_standalone_pattern(engine):
+    descriptions = ['PIX 123.456.789-09', 'X 12345678909 Y', 'CNPJ 12345678000190', 'NUM 123456789091', 'A1234567890']
+
+    extracted = engine.extract(descriptions)['document']
+
+    expected = [
+        re.sub(r'\D', '', match.group()) if (match := re.search(DOCUMENT_PATTERN, text)) else ''
+        for text in descriptions
+    ]
+    assert extracted.tolist() == expected
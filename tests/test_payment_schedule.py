@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from utils.advanced_data_handler import AdvancedDataHandler
+from utils.payment_schedule import PaymentScheduleBuilder
+
+
+def test_schedule_splits_fee_over_installments():
+    students = pd.DataFrame({
+        'id': ['STU_1'], 'fullName': ['JOAO SANTOS'], 'courseFee': [1200.0],
+        'totalInstallments': [3], 'boletoDueDate': [31], 'data_cadastro': ['2025-01-05']
+    })
+
+    schedule = PaymentScheduleBuilder().build(students)
+
+    assert schedule['installment_number'].tolist() == [1, 2, 3]
+    assert schedule['amount'].tolist() == [400.0, 400.0, 400.0]
+    assert schedule['due_date'].dt.strftime('%Y-%m-%d').tolist() == ['2025-01-31', '2025-02-28', '2025-03-31']
+
+
+@pytest.mark.parametrize('installments', [0, -2])
+def test_students_without_installments_are_skipped(installments, caplog):
+    students = pd.DataFrame({
+        'id': ['STU_1', 'STU_2'], 'fullName': ['JOAO SANTOS', 'PEDRO LIMA'],
+        'courseFee': [1200.0, 800.0], 'totalInstallments': [installments, 2],
+        'data_cadastro': ['2025-01-01', '2025-01-01']
+    })
+
+    with caplog.at_level('WARNING', logger='PaymentScheduleBuilder'):
+        schedule = PaymentScheduleBuilder().build(students)
+
+    assert schedule['student_id'].tolist() == ['STU_2', 'STU_2']
+    assert 'STU_1' in caplog.text
+
+
+def test_students_without_enrollment_date_are_skipped(caplog):
+    students = pd.DataFrame({
+        'id': ['STU_1', 'STU_2', 'STU_3'], 'fullName': ['JOAO SANTOS', 'PEDRO LIMA', 'ANA COSTA'],
+        'courseFee': [1200.0, 800.0, 600.0], 'totalInstallments': [3, 2, 2],
+        'data_cadastro': [None, None, '2025-01-05'],
+        'timestamp': [None, '2025-02-20T09:30:00', None]
+    })
+
+    with caplog.at_level('WARNING', logger='PaymentScheduleBuilder'):
+        schedule = PaymentScheduleBuilder().build(students)
+
+    assert schedule['student_id'].tolist() == ['STU_2', 'STU_2', 'STU_3', 'STU_3']
+    assert schedule['due_date'].dt.strftime('%Y-%m-%d').tolist() == [
+        '2025-03-10', '2025-04-10', '2025-01-10', '2025-02-10'
+    ]
+    assert 'STU_1' in caplog.text
+    assert 'STU_2' not in caplog.text
+
+
+def test_bulk_enrollment_rejects_non_positive_installments(tmp_path):
+    handler = AdvancedDataHandler(str(tmp_path / 'metaforma.db'))
+    record = {'fullName': 'JOAO SANTOS', 'email': 'joao@example.com', 'phone': '11999999999', 'courseFee': 1200}
+
+    result = handler.add_students_bulk([
+        dict(record, totalInstallments=0),
+        dict(record, totalInstallments=-1),
+        dict(record, totalInstallments=3),
+    ])
+
+    assert len(result['added']) == 1
+    assert [error['record'] for error in result['errors']] == [0, 1]
+    assert all('totalInstallments' in error['error'] for error in result['errors'])
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from utils.advanced_data_handler import AdvancedDataHandler
+from utils.reconciliation_cache import ReconciliationCache
+
+
+def extract(*amounts):
+    return pd.DataFrame({
+        'date': pd.date_range('2025-03-01', periods=len(amounts)),
+        'amount': list(amounts),
+        'description': [f'PIX {i}' for i in range(len(amounts))]
+    })
+
+
+def test_key_depends_on_extract_content_not_index(reconciler):
+    version = ('/tmp/a.db', 1)
+    key = ReconciliationCache.make_key(extract(100.0, 200.0), version, reconciler, datetime(2025, 3, 10, 8))
+
+    reindexed = extract(100.0, 200.0).set_axis([7, 9])
+    assert ReconciliationCache.make_key(reindexed, version, reconciler, '2025-03-10') == key
+    assert ReconciliationCache.make_key(extract(100.0, 201.0), version, reconciler, '2025-03-10') != key
+    assert ReconciliationCache.make_key(extract(100.0, 200.0), version, reconciler, '2025-03-11') != key
+    assert ReconciliationCache.make_key(extract(100.0, 200.0), ('/tmp/a.db', 2), reconciler, '2025-03-10') != key
+    assert ReconciliationCache.extract_hash(extract()) != ReconciliationCache.extract_hash(pd.DataFrame())
+
+
+@pytest.mark.parametrize('setting, value', [
+    ('tolerance_amount', 10.0), ('tolerance_days', 7), ('matching_mode', 'optimal')
+])
+def test_key_depends_on_reconciler_settings(reconciler, setting, value):
+    key = ReconciliationCache.make_key(extract(100.0), ('/tmp/a.db', 1), reconciler, '2025-03-10')
+
+    setattr(reconciler, setting, value)
+
+    assert ReconciliationCache.make_key(extract(100.0), ('/tmp/a.db', 1), reconciler, '2025-03-10') != key
+
+
+def test_get_counts_hits_and_misses():
+    cache = ReconciliationCache()
+    key = ('hash', ('a.db', 1), 5.0, 3, 'greedy', '2025-03-10')
+
+    assert cache.get(key) is None
+    cache.put(key, {'metrics': {}})
+    cache.put(('hash', ('a.db', 1), 5.0, 3, 'greedy', '2025-03-11'), {})
+
+    assert cache.get(key) == {'metrics': {}}
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReconciliationCache(max_entries=2)
+    first, second, third = (('hash', ('a.db', 1), 5.0, 3, 'greedy', day) for day in ['01', '02', '03'])
+    cache.put(first, {'n': 1})
+    cache.put(second, {'n': 2})
+
+    cache.get(first)
+    cache.put(third, {'n': 3})
+
+    assert cache.get(second) is None
+    assert cache.get(first) == {'n': 1}
+    assert cache.get(third) == {'n': 3}
+
+
+def test_new_version_drops_older_versions_of_the_same_database_only():
+    cache = ReconciliationCache()
+    old = ('hash', ('a.db', 1), 5.0, 3, 'greedy', '01')
+    other = ('hash', ('b.db', 1), 5.0, 3, 'greedy', '01')
+    cache.put(old, {'n': 1})
+    cache.put(other, {'n': 2})
+
+    cache.put(('hash', ('a.db', 2), 5.0, 3, 'greedy', '01'), {'n': 3})
+
+    assert cache.get(old) is None
+    assert cache.get(other) == {'n': 2}
+    cache.invalidate('b.db')
+    assert cache.stats()['entries'] == 1
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+
+def test_student_changes_invalidate_cached_results(tmp_path, reconciler):
+    handler = AdvancedDataHandler(str(tmp_path / 'metaforma.db'))
+    other_session = AdvancedDataHandler(str(tmp_path / 'metaforma.db'))
+    cache = ReconciliationCache()
+    student_id = handler.get_all_students()['id'].iloc[0]
+    key = cache.make_key(extract(100.0), handler.data_version(), reconciler, '2025-03-10')
+    cache.put(key, {'n': 1})
+
+    assert cache.get(cache.make_key(extract(100.0), other_session.data_version(), reconciler, '2025-03-10')) == {'n': 1}
+
+    handler.update_student(student_id, {'fullName': 'NOME ALTERADO'})
+
+    new_key = cache.make_key(extract(100.0), other_session.data_version(), reconciler, '2025-03-10')
+    assert new_key != key
+    assert cache.get(new_key) is None
+    cache.put(new_key, {'n': 2})
+    assert cache.get(key) is None
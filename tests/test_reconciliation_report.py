@@ -0,0 +1,123 @@
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.conftest import BASE_DATE, make_credit, make_payment, random_scenario
+
+
+def loop_report(result):
+    """Relatório do conciliador original: um dicionário formatado por linha."""
+    rows = []
+    for match in result['matched_payments']:
+        transaction, payment = match['transaction'], match['payment']
+        rows.append({
+            'Tipo': 'Pagamento Identificado', 'Aluno': payment.student_name,
+            'Parcela': f"{payment.installment_number}/{payment.amount:.2f}",
+            'Data_Vencimento': payment.due_date.strftime('%d/%m/%Y'),
+            'Data_Pagamento': transaction.date.strftime('%d/%m/%Y'),
+            'Valor_Esperado': payment.amount, 'Valor_Recebido': transaction.amount,
+            'Diferenca': transaction.amount - payment.amount,
+            'Score_Match': f"{match['match_score']:.2%}", 'Status': '✅ Pago',
+            'Observacoes': transaction.description[:50]
+        })
+    for payment in result['unpaid_installments']:
+        if payment.status == 'overdue':
+            days_overdue = (datetime.now() - payment.due_date).days
+            rows.append({
+                'Tipo': 'Inadimplência', 'Aluno': payment.student_name,
+                'Parcela': f"{payment.installment_number}/{payment.amount:.2f}",
+                'Data_Vencimento': payment.due_date.strftime('%d/%m/%Y'), 'Data_Pagamento': '',
+                'Valor_Esperado': payment.amount, 'Valor_Recebido': 0, 'Diferenca': -payment.amount,
+                'Score_Match': '', 'Status': f'❌ Atraso ({days_overdue}d)',
+                'Observacoes': f'Vencido há {days_overdue} dias'
+            })
+    for transaction in result['unmatched_transactions']:
+        rows.append({
+            'Tipo': 'Recebimento Não Identificado', 'Aluno': 'Não Identificado', 'Parcela': '',
+            'Data_Vencimento': '', 'Data_Pagamento': transaction.date.strftime('%d/%m/%Y'),
+            'Valor_Esperado': 0, 'Valor_Recebido': transaction.amount, 'Diferenca': transaction.amount,
+            'Score_Match': '', 'Status': '⚠️ Não Identificado', 'Observacoes': transaction.description[:50]
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def result(reconciler):
+    credits, payments = random_scenario(11)
+    # Metade das parcelas sem crédito fica em atraso
+    for payment in payments[::2]:
+        payment.status = 'overdue'
+    credits.append(make_credit(amount=12345.0, description='DEPOSITO SEM IDENTIFICACAO ' + 'X' * 60))
+    return reconciler.reconcile_payments(credits, deepcopy(payments))
+
+
+def test_formatted_report_matches_the_row_by_row_report(reconciler, result):
+    report = reconciler.generate_reconciliation_report(result)
+
+    formatted = reconciler.format_report(report)
+
+    expected = loop_report(result)
+    assert formatted.columns.tolist() == expected.columns.tolist()
+    assert set(report['Tipo']) == {'Pagamento Identificado', 'Inadimplência', 'Recebimento Não Identificado'}
+    for column in expected.columns:
+        if column.startswith(('Valor', 'Diferenca')):
+            np.testing.assert_allclose(formatted[column].astype(float), expected[column].astype(float), err_msg=column)
+        else:
+            assert formatted[column].tolist() == expected[column].tolist(), column
+
+
+def test_report_keeps_raw_values_until_formatted(reconciler, result):
+    report = reconciler.generate_reconciliation_report(result)
+
+    overdue = report[report['Tipo'] == 'Inadimplência']
+    assert pd.api.types.is_datetime64_any_dtype(report['Data_Vencimento'])
+    assert pd.api.types.is_float_dtype(report['Score_Match'])
+    assert (overdue['Dias_Atraso'] == (pd.Timestamp(datetime.now()) - overdue['Data_Vencimento']).dt.days).all()
+    assert report['Dias_Atraso'].isna().sum() == len(report) - len(overdue)
+    assert report['Observacoes'].str.len().max() <= 50
+
+
+def test_formatting_a_page_equals_the_same_rows_of_the_full_report(reconciler, result):
+    report = reconciler.generate_reconciliation_report(result)
+
+    page = reconciler.format_report(report.iloc[10:20])
+
+    pd.testing.assert_frame_equal(page, reconciler.format_report(report).iloc[10:20])
+
+
+def test_metrics_match_the_match_lists(reconciler, result):
+    matched, unmatched = result['matched_payments'], result['unmatched_transactions']
+    unpaid = result['unpaid_installments']
+    metrics = result['metrics']
+    total_expected = len(matched) + len(unpaid) + sum(
+        1 for status in result['table']['status'] if status == 'paid'
+    )
+
+    assert metrics['total_expected'] == total_expected
+    assert metrics['total_paid'] == len(matched)
+    assert metrics['total_overdue'] == sum(payment.status == 'overdue' for payment in unpaid)
+    assert metrics['unmatched_transactions_count'] == len(unmatched)
+    assert metrics['total_amount_received'] == pytest.approx(
+        sum(match['transaction'].amount for match in matched) + sum(tx.amount for tx in unmatched)
+    )
+    assert metrics['total_amount_overdue'] == pytest.approx(
+        sum(payment.amount for payment in unpaid if payment.status == 'overdue')
+    )
+
+    dashboard = reconciler.generate_dashboard_metrics(result)
+    assert dashboard['adimplencia']['amount'] == pytest.approx(sum(match['transaction'].amount for match in matched))
+    assert dashboard['conciliacao']['transacoes_identificadas'] == len(matched)
+
+
+def test_report_without_table_is_rebuilt_from_the_lists(reconciler):
+    payments = [make_payment(status='overdue', due_date=BASE_DATE - timedelta(days=60)), make_payment(installment_number=2)]
+    result = reconciler.reconcile_payments([make_credit()], payments)
+    legacy = {key: value for key, value in result.items() if key != 'table'}
+
+    pd.testing.assert_frame_equal(
+        reconciler.format_report(reconciler.generate_reconciliation_report(legacy)),
+        reconciler.format_report(reconciler.generate_reconciliation_report(result))
+    )
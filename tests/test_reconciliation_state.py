@@ -0,0 +1,112 @@
+import threading
+from copy import deepcopy
+
+import pytest
+
+from tests.conftest import make_credit, make_payment, match_summary, random_scenario
+from utils.reconciliation_state import ReconciliationState
+
+
+@pytest.fixture
+def state(tmp_path):
+    reconciliation_state = ReconciliationState(str(tmp_path / 'state.db'))
+    yield reconciliation_state
+    reconciliation_state.close()
+
+
+def test_first_run_matches_full_reconciliation(reconciler, state):
+    credits, payments = random_scenario(0)
+
+    full = reconciler.reconcile_payments(credits, deepcopy(payments))
+    incremental = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    assert match_summary(incremental) == match_summary(full)
+    assert incremental['incremental']['new_transactions'] == len(credits)
+
+
+def test_rerun_with_same_extract_processes_nothing(reconciler, state):
+    credits, payments = random_scenario(1)
+    first = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    second = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    assert second['incremental']['new_transactions'] == 0
+    assert second['incremental']['reprocessed_transactions'] == 0
+    assert second['incremental']['kept_matches'] == len(first['matched_payments'])
+    assert match_summary(second) == match_summary(first)
+
+
+def test_new_credits_only_are_processed(reconciler, state):
+    credits, payments = random_scenario(2)
+    reconciler.reconcile_incremental(credits[:60], deepcopy(payments), state)
+
+    result = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    assert result['incremental']['new_transactions'] == 60
+    assert len(result['matched_payments']) + len(result['unmatched_transactions']) == len(credits)
+
+
+def test_changed_installment_releases_its_credit(reconciler, state):
+    payments = [make_payment(amount=400.0)]
+    credits = [make_credit(amount=400.0)]
+    first = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+    assert len(first['matched_payments']) == 1
+
+    changed = [make_payment(amount=600.0)]
+    result = reconciler.reconcile_incremental(credits, changed, state)
+
+    assert result['incremental']['changed_installments'] == 1
+    assert result['incremental']['reprocessed_transactions'] == 1
+    assert result['matched_payments'] == []
+
+
+def test_duplicate_credits_in_one_extract_are_kept_apart(reconciler, state):
+    payments = [make_payment(installment_number=1), make_payment(installment_number=2)]
+    credits = [make_credit(), make_credit()]
+
+    result = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    assert len(result['matched_payments']) == 2
+    assert len(state.load_transactions()) == 2
+
+
+def test_settings_change_discards_state(reconciler, state):
+    credits, payments = random_scenario(3)
+    reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    reconciler.tolerance_days = 5
+    result = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    assert result['incremental']['new_transactions'] == len(credits)
+    assert result['incremental']['kept_matches'] == 0
+
+
+def test_clear_resets_history(reconciler, state):
+    credits, payments = random_scenario(4)
+    reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+
+    state.clear()
+
+    assert state.load_transactions().empty
+    assert state.load_installments().empty
+
+
+def test_concurrent_runs_share_one_connection(reconciler, state):
+    credits, payments = random_scenario(5)
+    errors = []
+
+    def run():
+        try:
+            result = reconciler.reconcile_incremental(credits, deepcopy(payments), state)
+            assert result
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(state.load_transactions()) == len(credits)
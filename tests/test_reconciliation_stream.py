@@ -0,0 +1,104 @@
+from copy import deepcopy
+
+import pandas as pd
+import pytest
+
+from tests.conftest import make_credit, make_payment, match_summary, random_scenario
+from utils.reconciliation_state import ReconciliationState
+
+
+@pytest.fixture
+def state(tmp_path):
+    reconciliation_state = ReconciliationState(str(tmp_path / 'state.db'))
+    yield reconciliation_state
+    reconciliation_state.close()
+
+
+def in_batches(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def test_duplicate_credits_across_batches_are_all_processed(reconciler, state):
+    # Quatro alunos com o mesmo valor e vencimento pagos por boletos idênticos
+    payments = [make_payment(student_id=f'STU_{i}', student_name=f'ALUNO {i}') for i in range(4)]
+    credits = [make_credit(description='BOLETO PAGO') for _ in range(4)]
+
+    result = reconciler.reconcile_stream(in_batches(credits, 3), deepcopy(payments), state)
+
+    assert result['incremental']['new_transactions'] == 4
+    assert len(result['matched_payments']) == 4
+    assert len(state.load_transactions()) == 4
+
+
+def test_batched_keys_equal_keys_of_whole_extract():
+    frame = pd.DataFrame([vars(make_credit(description='BOLETO PAGO')) for _ in range(5)])
+    whole = ReconciliationState.transaction_keys(frame)
+
+    occurrences = {}
+    batched = pd.concat([
+        ReconciliationState.transaction_keys(frame.iloc[:2], occurrences),
+        ReconciliationState.transaction_keys(frame.iloc[2:], occurrences),
+    ])
+
+    assert whole.is_unique
+    assert batched.tolist() == whole.tolist()
+
+
+@pytest.mark.parametrize('batch_size', [7, 50])
+def test_stream_equals_single_incremental_run(reconciler, tmp_path, batch_size):
+    credits, payments = random_scenario(6)
+    credits += credits[:30]
+    whole_state = ReconciliationState(str(tmp_path / 'whole.db'))
+    stream_state = ReconciliationState(str(tmp_path / 'stream.db'))
+
+    whole = reconciler.reconcile_incremental(credits, deepcopy(payments), whole_state)
+    streamed = reconciler.reconcile_stream(in_batches(credits, batch_size), deepcopy(payments), stream_state)
+
+    assert streamed['incremental']['new_transactions'] == len(credits)
+    assert len(streamed['matched_payments']) + len(streamed['unmatched_transactions']) == len(credits)
+    assert sorted(stream_state.load_transactions().index) == sorted(whole_state.load_transactions().index)
+    assert len(streamed['matched_payments']) == len(whole['matched_payments'])
+
+
+def test_restreaming_the_same_file_processes_nothing(reconciler, state, tmp_path):
+    credits = [make_credit(description='BOLETO PAGO') for _ in range(3)] + [make_credit(description='PIX - JOAO SANTOS')]
+    path = tmp_path / 'extrato.csv'
+    pd.DataFrame({
+        'data': [credit.date.strftime('%d/%m/%Y') for credit in credits],
+        'valor': [f'{credit.amount:.2f}'.replace('.', ',') for credit in credits],
+        'descricao': [credit.description for credit in credits],
+    }).to_csv(path, index=False)
+    payments = [make_payment(student_id=f'STU_{i}', student_name=name) for i, name in enumerate(
+        ['JOAO SANTOS', 'ALUNO A', 'ALUNO B', 'ALUNO C']
+    )]
+
+    first = reconciler.reconcile_stream(reconciler.iter_bank_extract(str(path), batch_size=2), deepcopy(payments), state)
+    second = reconciler.reconcile_stream(reconciler.iter_bank_extract(str(path), batch_size=2), deepcopy(payments), state)
+
+    assert first['incremental']['new_transactions'] == 4
+    assert second['incremental']['new_transactions'] == 0
+    assert match_summary(second) == match_summary(first)
+
+
+def test_stream_reads_history_once(reconciler, state, monkeypatch):
+    credits, payments = random_scenario(7)
+    reconciler.reconcile_incremental(credits[:40], deepcopy(payments), state)
+    calls = []
+    load_transactions = state.load_transactions
+    monkeypatch.setattr(state, 'load_transactions', lambda: calls.append(1) or load_transactions())
+
+    result = reconciler.reconcile_stream(in_batches(credits, 10), deepcopy(payments), state)
+
+    assert calls == [1]
+    assert result['incremental']['new_transactions'] == len(credits) - 40
+    assert result['incremental']['kept_matches'] > 0
+
+
+def test_stream_on_memory_state_matches_full_reconciliation(reconciler):
+    credits, payments = random_scenario(8)
+    memory_state = ReconciliationState(':memory:')
+
+    streamed = reconciler.reconcile_stream(in_batches(credits, 25), deepcopy(payments), memory_state)
+    full = reconciler.reconcile_payments(credits, deepcopy(payments))
+
+    assert match_summary(streamed) == match_summary(full)
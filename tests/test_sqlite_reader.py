@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils.sqlite_reader import SQLiteReader
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, email TEXT)")
+    conn.execute("CREATE UNIQUE INDEX students_email ON students (email)")
+    conn.execute("CREATE TABLE payments (id INTEGER PRIMARY KEY, student_id INTEGER, amount REAL)")
+    conn.executemany(
+        "INSERT INTO students (name, email) VALUES (?, ?)",
+        [(f'ALUNO {i}', f'aluno{i}@example.com') for i in range(500)]
+    )
+    conn.executemany("INSERT INTO payments (student_id, amount) VALUES (?, ?)", [(i % 500, 100.0) for i in range(2000)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def reader(db_path):
+    sqlite_reader = SQLiteReader(db_path, max_connections=2)
+    yield sqlite_reader
+    sqlite_reader.close()
+
+
+def test_connections_are_read_only_and_reused(reader):
+    with reader.pool.connection() as conn:
+        first = conn
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM students")
+
+    reader.get_tables()
+    reader.read_table('students')
+
+    with reader.pool.connection() as conn:
+        assert conn is first
+    assert reader.pool._opened == 1
+
+
+def test_pool_never_opens_more_than_max_connections(reader):
+    results = []
+
+    def read():
+        results.append(len(reader.read_table('payments')))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [2000] * 8
+    assert reader.pool._opened <= 2
+
+
+def test_read_only_uri_failure_falls_back_to_query_only(reader, monkeypatch):
+    connect = sqlite3.connect
+
+    def connect_without_uri(database, *args, uri=False, **kwargs):
+        if uri:
+            raise sqlite3.OperationalError('unable to open database file')
+        return connect(database, *args, **kwargs)
+
+    monkeypatch.setattr('utils.sqlite_reader.sqlite3.connect', connect_without_uri)
+
+    with reader.pool.connection() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM students")
+    assert len(reader.read_table('students')) == 500
+
+
+def test_catalog_is_cached_until_the_schema_changes(reader, db_path):
+    assert sorted(reader.get_tables()) == ['payments', 'students']
+    assert [column[1] for column in reader.get_table_schema('students')] == ['id', 'name', 'email']
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE students ADD COLUMN phone TEXT")
+    conn.execute("CREATE TABLE courses (id INTEGER PRIMARY KEY)")
+    conn.commit()
+    conn.close()
+
+    assert sorted(reader.get_tables()) == ['courses', 'payments', 'students']
+    assert [column[1] for column in reader.get_table_schema('students')] == ['id', 'name', 'email', 'phone']
+
+
+def test_summary_uses_metadata_only(reader, db_path, monkeypatch):
+    monkeypatch.setattr(reader, 'read_table', lambda table_name: pytest.fail('read_table chamado no resumo'))
+
+    summary = reader.get_database_summary()
+
+    students = summary['tables']['students']
+    assert summary['total_tables'] == 2
+    assert students['rows'] == 500
+    assert students['column_names'] == ['id', 'name', 'email']
+    assert students['indexes'] == [{'name': 'students_email', 'unique': True, 'columns': ['email']}]
+    assert summary['tables']['payments']['rows'] == 2000
+    assert 'sample' not in students
+
+    conn = sqlite3.connect(db_path)
+    try:
+        expected_pages = dict(conn.execute(
+            "SELECT m.tbl_name, COUNT(*) FROM dbstat s JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name"
+        ).fetchall())
+    except sqlite3.OperationalError:
+        pytest.skip('SQLite sem dbstat')
+    finally:
+        conn.close()
+    assert {table: info['pages'] for table, info in summary['tables'].items()} == expected_pages
+    assert students['size_bytes'] == expected_pages['students'] * summary['page_size']
+
+
+def test_summary_sample_respects_the_limit(reader):
+    summary = reader.get_database_summary(include_sample=True, sample_limit=3)
+
+    assert len(summary['tables']['students']['sample']) == 3
+    assert list(summary['tables']['payments']['sample'].columns) == ['id', 'student_id', 'amount']
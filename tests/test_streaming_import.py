@@ -0,0 +1,101 @@
+import io
+
+import pandas as pd
+import pytest
+
+from utils.data_handler import DataHandler
+from utils.streaming_import import StreamingImporter
+
+
+def financial_rows(count, start=100):
+    return pd.DataFrame({
+        'Periodo': [f'FAC_{start + i % 3}' for i in range(count)],
+        'Tipo': 'Realizado',
+        'Receita_Bruta': [1000.0 + i for i in range(count)],
+        'Resultado_Liquido': [100.0] * count,
+        'Total_Despesas': [900.0] * count,
+        'Inadimplencia': [10.0] * count,
+    })
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return DataHandler(imports_dir=str(tmp_path / 'imports'))
+
+
+def csv_file(df):
+    return io.BytesIO(df.to_csv(index=False).encode())
+
+
+def test_csv_is_imported_in_chunks(handler):
+    rows = financial_rows(23)
+    before = len(handler.financial_data)
+    fractions = []
+
+    result = StreamingImporter(chunk_size=5).import_financial_data(
+        csv_file(rows), 'dados.csv', handler, progress_callback=lambda fraction, _: fractions.append(fraction)
+    )
+
+    assert result['chunks'] == 5
+    assert result['imported_rows'] == 23
+    assert len(handler.financial_data) == before + 23
+    assert fractions == sorted(fractions) and fractions[-1] == pytest.approx(1.0)
+    summary = handler.get_financial_summary('FAC_100')
+    assert summary['receita_realizada'] == pytest.approx(rows.loc[rows['Periodo'] == 'FAC_100', 'Receita_Bruta'].sum())
+
+
+def test_chunks_are_concatenated_once_on_read(handler):
+    StreamingImporter(chunk_size=4).import_financial_data(csv_file(financial_rows(12)), 'dados.csv', handler)
+
+    assert len(handler._financial_buffer) == 3
+    handler.financial_data
+    assert handler._financial_buffer == []
+
+
+def test_invalid_chunk_is_rejected_and_reported(handler):
+    rows = financial_rows(10)
+    rows.loc[7, 'Receita_Bruta'] = -1.0
+
+    result = StreamingImporter(chunk_size=5).import_financial_data(csv_file(rows), 'dados.csv', handler)
+
+    assert result['imported_rows'] == 5
+    assert result['rejected_rows'] == 5
+    assert result['errors'][0]['rows'] == '6-10'
+
+
+def test_unknown_columns_are_kept_and_reported(handler):
+    rows = financial_rows(6).assign(Centro_Custo='ADM')
+
+    result = StreamingImporter(chunk_size=4).import_financial_data(csv_file(rows), 'dados.csv', handler)
+
+    assert result['unknown_columns'] == ['Centro_Custo']
+    assert (handler.financial_data['Centro_Custo'].tail(6) == 'ADM').all()
+
+
+def test_imports_survive_a_new_handler(handler):
+    StreamingImporter(chunk_size=5).import_financial_data(csv_file(financial_rows(12)), 'dados.csv', handler)
+
+    reloaded = DataHandler(imports_dir=handler.imports_dir)
+
+    assert len(reloaded.financial_data) == len(handler.financial_data)
+    assert reloaded.get_financial_summary('FAC_101') == handler.get_financial_summary('FAC_101')
+
+
+def test_excel_is_imported_in_chunks(handler, tmp_path):
+    path = tmp_path / 'dados.xlsx'
+    financial_rows(9).to_excel(path, index=False)
+
+    result = StreamingImporter(chunk_size=4).import_financial_data(str(path), 'dados.xlsx', handler)
+
+    assert result['chunks'] == 3
+    assert result['imported_rows'] == 9
+
+
+def test_without_imports_dir_nothing_is_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handler = DataHandler(imports_dir=None)
+
+    result = StreamingImporter().import_financial_data(csv_file(financial_rows(3)), 'dados.csv', handler)
+
+    assert result['imported_rows'] == 3
+    assert list(tmp_path.iterdir()) == []
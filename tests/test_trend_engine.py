@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_handler import DataHandler
+from utils.financial_calculator import FinancialCalculator
+from utils.trend_engine import TrendEngine
+
+
+def random_series(seed, n_series=20, n_points=12, gap_share=0.25):
+    """Séries com tendência, ruído e lacunas (NaN) em posições aleatórias."""
+    rng = np.random.default_rng(seed)
+    x = np.arange(n_points)
+    values = rng.normal(1000, 300, (n_series, 1)) + rng.normal(0, 50, (n_series, 1)) * x + rng.normal(0, 80, (n_series, n_points))
+    values[rng.random(values.shape) < gap_share] = np.nan
+    return values
+
+
+def polyfit_reference(row):
+    """Inclinação, variação total e média só com os pontos válidos, nas posições originais."""
+    valid = ~np.isnan(row)
+    x, y = np.arange(len(row))[valid], row[valid]
+    if len(y) < 2:
+        return None
+    slope = np.polyfit(x, y, 1)[0]
+    variation = (y[-1] - y[0]) / abs(y[0]) * 100 if y[0] != 0 else 0.0
+    return slope, variation, y.mean()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_fit_matches_polyfit_with_gaps(seed):
+    values = random_series(seed)
+
+    result = TrendEngine.fit(values)
+
+    for position, row in enumerate(values):
+        reference = polyfit_reference(row)
+        fitted = result.iloc[position]
+        assert fitted['points'] == (~np.isnan(row)).sum()
+        if reference is None:
+            assert fitted['trend'] == 'Dados insuficientes'
+            continue
+        assert fitted['slope'] == pytest.approx(reference[0])
+        assert fitted['total_variation'] == pytest.approx(reference[1])
+        assert fitted['average_value'] == pytest.approx(reference[2])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_update_matches_polyfit_after_every_point(seed):
+    values = random_series(seed, n_series=5)
+    engine = TrendEngine()
+
+    for series, row in enumerate(values):
+        for end in range(1, len(row) + 1):
+            value = row[end - 1]
+            # Lacunas chegam ora como None, ora como NaN
+            trend = engine.update(series, None if np.isnan(value) and end % 2 else value)
+            reference = polyfit_reference(row[:end])
+            if reference is None:
+                assert trend['trend'] == 'Dados insuficientes'
+                continue
+            assert trend == TrendEngine.describe(*reference)
+
+
+def test_extend_matches_fit_and_reset_drops_the_series():
+    values = random_series(7, n_series=4)
+    engine = TrendEngine()
+    fitted = TrendEngine.fit(values)
+
+    for series, row in enumerate(values):
+        trend = engine.extend(series, row.tolist())
+        expected = fitted.iloc[series]
+        assert trend == TrendEngine.describe(expected['slope'], expected['total_variation'], expected['average_value'])
+
+    engine.reset(0)
+    assert engine.trend(0)['trend'] == 'Dados insuficientes'
+    assert engine.trend(1) != engine.trend(0)
+    engine.reset()
+    assert engine.states == {}
+
+
+def test_analyze_trend_matches_the_engine():
+    values = [100.0, np.nan, 130.0, 120.0, np.nan, 180.0]
+
+    result = FinancialCalculator().analyze_trend(values)
+
+    slope, variation, average = polyfit_reference(np.asarray(values))
+    assert result == TrendEngine.describe(slope, variation, average)
+    assert result['direction'] == 'Crescente'
+
+
+def test_financial_trends_follow_chronological_periods():
+    handler = DataHandler(imports_dir=None)
+    handler.financial_data = pd.DataFrame({
+        'Periodo': ['FAC_10', 'FAC_9', 'FAC_11', 'FAC_9'],
+        'Tipo': ['Realizado', 'Realizado', 'Realizado', 'Orcamento'],
+        'Receita_Bruta': [200.0, 100.0, 300.0, 999.0],
+        'Total_Despesas': [50.0, 80.0, np.nan, 0.0]
+    })
+
+    trends = FinancialCalculator(handler).analyze_financial_trends()
+
+    assert trends.loc['Receita_Bruta', 'slope'] == pytest.approx(100.0)
+    assert trends.loc['Receita_Bruta', 'direction'] == 'Crescente'
+    assert trends.loc['Total_Despesas', 'slope'] == pytest.approx(-30.0)
+    assert trends.loc['Total_Despesas', 'points'] == 2
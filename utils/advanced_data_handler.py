@@ -1,8 +1,13 @@
 import pandas as pd
+import numpy as np
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import uuid
+import os
+import threading
+from utils.payment_schedule import PaymentScheduleBuilder
+from utils.student_store import StudentStore
 
 class AdvancedDataHandler:
     """
@@ -10,9 +15,23 @@ class AdvancedDataHandler:
     Inclui funcionalidades completas de gestão de alunos, cursos e pagamentos.
     """
     
-    def __init__(self):
-        """Inicializa o manipulador avançado de dados."""
+    DEFAULT_DB_PATH = 'data/metaforma.db'
+    APPEND_CHUNK_SIZE = 500  # Alunos no buffer antes de incorporar aos DataFrames
+    
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Inicializa o manipulador avançado de dados.
+        
+        Args:
+            db_path: Caminho do banco SQLite onde os dados são persistidos
+        """
         self.logger = self._setup_logger()
+        self.store = StudentStore(db_path)
+        self._store_version = None
+        
+        # A instância é compartilhada entre sessões (st.cache_resource): DataFrames,
+        # índices e buffer só são lidos e alterados com este lock
+        self._lock = threading.RLock()
         
         # DataFrames principais
         self.students_df = pd.DataFrame()
@@ -21,6 +40,20 @@ class AdvancedDataHandler:
         self.payments_df = pd.DataFrame()
         self.users_df = pd.DataFrame()
         
+        # Índices mantidos a cada alteração (chave -> rótulos das linhas)
+        self._student_rows: Dict[str, Any] = {}
+        self._payment_rows: Dict[str, Any] = {}
+        self._payment_rows_by_student: Dict[str, List[Any]] = {}
+        self._student_rows_by_fac: Dict[str, List[Any]] = {}
+        
+        # Buffer de inclusões ainda não incorporadas aos DataFrames
+        self._student_buffer: List[pd.DataFrame] = []
+        self._payment_buffer: List[pd.DataFrame] = []
+        self._buffered_rows = 0
+        
+        # Gerador de cronograma compartilhado com a conciliação bancária
+        self.schedule_builder = PaymentScheduleBuilder()
+        
         # Constantes baseadas no sistema React
         self.HOW_FOUND_OPTIONS = [
             'Facebook', 'Instagram', 'Google', 'Indicação', 'YouTube', 
@@ -65,20 +98,145 @@ class AdvancedDataHandler:
     def _initialize_data(self):
         """Inicializa os dados básicos do sistema."""
         try:
-            # Inicializar cursos
-            self._create_courses_data()
-            
-            # Inicializar FACs (turmas)
-            self._create_facs_data()
-            
-            # Inicializar alguns alunos de exemplo
-            self._create_sample_students()
+            if self.store.is_seeded():
+                # Banco existente: apenas carregar
+                self._load_from_store()
+            else:
+                # Inicializar cursos
+                self._create_courses_data()
+                
+                # Inicializar FACs (turmas)
+                self._create_facs_data()
+                
+                # Inicializar alguns alunos de exemplo
+                self._create_sample_students()
+                
+                self.store.seed({
+                    'courses': self.courses_df,
+                    'facs': self.facs_df,
+                    'students': self.students_df,
+                    'payments': self.payments_df
+                })
+                self._store_version = self.store.data_version()
+                self._rebuild_indexes()
             
             self.logger.info("Dados inicializados com sucesso")
             
         except Exception as e:
             self.logger.error(f"Erro ao inicializar dados: {str(e)}")
     
+    def _load_from_store(self):
+        """Carrega os DataFrames a partir do banco."""
+        self.courses_df = self.store.load_table('courses')
+        self.facs_df = self.store.load_table('facs')
+        self.students_df = self.store.load_table('students')
+        self.payments_df = self.store.load_table('payments')
+        self._store_version = self.store.data_version()
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstrói os índices de busca a partir dos DataFrames."""
+        self._student_rows = {}
+        self._payment_rows = {}
+        self._payment_rows_by_student = {}
+        self._student_rows_by_fac = {}
+        self._index_students(self.students_df)
+        self._index_payments(self.payments_df)
+    
+    def _index_students(self, students_df: pd.DataFrame):
+        """Adiciona alunos aos índices por ID e por turma."""
+        if students_df.empty:
+            return
+        
+        for label, student_id, fac_code in zip(students_df.index, students_df['id'], students_df['facCode']):
+            self._student_rows[student_id] = label
+            self._student_rows_by_fac.setdefault(fac_code, []).append(label)
+    
+    def _index_payments(self, payments_df: pd.DataFrame):
+        """Adiciona parcelas aos índices por ID e por aluno."""
+        if payments_df.empty:
+            return
+        
+        for label, payment_id, student_id in zip(payments_df.index, payments_df['id'], payments_df['student_id']):
+            self._payment_rows[payment_id] = label
+            self._payment_rows_by_student.setdefault(student_id, []).append(label)
+    
+    @staticmethod
+    def _select_rows(df: pd.DataFrame, labels: List[Any]) -> pd.DataFrame:
+        """
+        Seleciona as linhas de rótulos guardados nos índices, na ordem da tabela.
+        
+        Os rótulos são crescentes (_append_rows), então as posições vêm de uma
+        busca binária. Linhas contíguas (caso das parcelas de um aluno)
+        voltam como fatia iloc, que compartilha os dados com a tabela; as
+        demais, com take nas posições ordenadas.
+        """
+        if not labels:
+            return df.iloc[0:0]
+        
+        positions = np.sort(df.index.searchsorted(labels))
+        if positions[-1] - positions[0] + 1 == len(positions):
+            return df.iloc[positions[0]:positions[-1] + 1]
+        return df.take(positions)
+    
+    def _unindex_fac(self, fac_code: str, label):
+        """Remove um aluno do índice por turma."""
+        labels = self._student_rows_by_fac.get(fac_code, [])
+        if label in labels:
+            labels.remove(label)
+    
+    def _append_rows(self, df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Anexa linhas com rótulos novos, sem renumerar as existentes.
+        
+        Os índices guardam rótulos de linha, por isso os rótulos atuais
+        precisam permanecer estáveis.
+        """
+        start = int(df.index.max()) + 1 if not df.empty else 0
+        new_rows = new_rows.set_axis(range(start, start + len(new_rows)))
+        if df.empty:
+            return new_rows
+        return pd.concat([df, new_rows])
+    
+    def _flush_append_buffer(self):
+        """Incorpora o buffer de inclusões aos DataFrames com um único concat."""
+        if not self._buffered_rows:
+            return
+        
+        new_students = pd.concat(self._student_buffer, ignore_index=True)
+        new_payments = pd.concat(self._payment_buffer, ignore_index=True)
+        self._clear_append_buffer()
+        
+        self.students_df = self._append_rows(self.students_df, new_students)
+        self.payments_df = self._append_rows(self.payments_df, new_payments)
+        self._index_students(self.students_df.tail(len(new_students)))
+        self._index_payments(self.payments_df.tail(len(new_payments)))
+    
+    def _clear_append_buffer(self):
+        """Esvazia o buffer de inclusões."""
+        self._student_buffer = []
+        self._payment_buffer = []
+        self._buffered_rows = 0
+    
+    def _refresh_if_changed(self):
+        """
+        Garante que os DataFrames refletem o banco.
+        
+        Recarrega tudo se outra instância gravou no banco (o buffer já está
+        persistido e vem junto); caso contrário incorpora o buffer de inclusões.
+        """
+        if not self._reload_if_external_change():
+            self._flush_append_buffer()
+    
+    def _reload_if_external_change(self) -> bool:
+        """Recarrega os DataFrames se outra instância gravou no banco."""
+        if self.store.data_version() == self._store_version:
+            return False
+        
+        self._clear_append_buffer()
+        self._load_from_store()
+        return True
+    
     def _create_courses_data(self):
         """Cria dados dos cursos disponíveis."""
         courses_data = [
@@ -201,75 +359,40 @@ class AdvancedDataHandler:
         
         self.students_df = pd.DataFrame(sample_students)
         
-        # Gerar parcelas para os alunos de exemplo
-        for student in sample_students:
-            self._generate_payment_installments(student)
+        # Gerar parcelas de todos os alunos de exemplo de uma vez
+        self.payments_df = self._build_payment_installments(self.students_df)
     
     def _generate_student_id(self) -> str:
         """Gera um ID único para o aluno."""
         return f"STU_{str(uuid.uuid4())[:8].upper()}"
     
-    def _generate_payment_installments(self, student_data: Dict) -> List[Dict]:
+    def _build_payment_installments(self, students_df: pd.DataFrame) -> pd.DataFrame:
         """
-        Gera as parcelas de pagamento para um aluno.
+        Gera as parcelas de pagamento de vários alunos em uma única passagem.
         
         Args:
-            student_data: Dados do aluno
+            students_df: DataFrame com os alunos
             
         Returns:
-            Lista de parcelas geradas
+            DataFrame com as parcelas no formato de payments_df
         """
-        try:
-            installments = []
-            student_id = student_data['id']
-            total_fee = student_data['courseFee']
-            num_installments = student_data['totalInstallments']
-            due_day = int(student_data['boletoDueDate'])
-            
-            # Calcular valor da parcela
-            installment_value = total_fee / num_installments
-            
-            # Data base para primeira parcela (próximo dia de vencimento)
-            today = datetime.now()
-            if today.day <= due_day:
-                first_due = today.replace(day=due_day)
-            else:
-                if today.month == 12:
-                    first_due = today.replace(year=today.year + 1, month=1, day=due_day)
-                else:
-                    first_due = today.replace(month=today.month + 1, day=due_day)
-            
-            # Gerar cada parcela
-            for i in range(num_installments):
-                due_date = first_due + timedelta(days=30 * i)
-                
-                installment = {
-                    'id': f"PAY_{student_id}_{i+1:02d}",
-                    'student_id': student_id,
-                    'installment_number': i + 1,
-                    'total_installments': num_installments,
-                    'amount': round(installment_value, 2),
-                    'due_date': due_date.strftime('%Y-%m-%d'),
-                    'payment_date': None,
-                    'status': 'Pendente',  # Pendente, Pago, Atrasado, Cancelado
-                    'payment_method': student_data['paymentMethod'],
-                    'barcode': None,  # Para boletos
-                    'transaction_id': None,
-                    'created_at': datetime.now().isoformat()
-                }
-                
-                installments.append(installment)
-            
-            # Adicionar ao DataFrame de pagamentos
-            new_payments = pd.DataFrame(installments)
-            self.payments_df = pd.concat([self.payments_df, new_payments], ignore_index=True)
-            
-            self.logger.info(f"Geradas {len(installments)} parcelas para {student_data['fullName']}")
-            return installments
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao gerar parcelas: {str(e)}")
-            return []
+        schedule = self.schedule_builder.build(students_df)
+        created_at = datetime.now().isoformat()
+        
+        return pd.DataFrame({
+            'id': 'PAY_' + schedule['student_id'] + '_' + schedule['installment_number'].map('{:02d}'.format),
+            'student_id': schedule['student_id'],
+            'installment_number': schedule['installment_number'],
+            'total_installments': schedule['total_installments'],
+            'amount': schedule['amount'].round(2),
+            'due_date': schedule['due_date'].dt.strftime('%Y-%m-%d'),
+            'payment_date': None,
+            'status': 'Pendente',  # Pendente, Pago, Atrasado, Cancelado
+            'payment_method': schedule['payment_method'],
+            'barcode': None,  # Para boletos
+            'transaction_id': None,
+            'created_at': created_at
+        })
     
     def create_student(self, student_data: Dict) -> bool:
         """
@@ -325,58 +448,118 @@ class AdvancedDataHandler:
             True se adicionado com sucesso
         """
         try:
-            # Validar dados obrigatórios
-            required_fields = ['fullName', 'email', 'phone']
-            for field in required_fields:
-                if not student_data.get(field):
-                    raise ValueError(f"Campo obrigatório '{field}' não fornecido")
+            result = self.add_students_bulk([student_data])
             
-            # Gerar ID único
-            student_id = self._generate_student_id()
+            if result['errors']:
+                raise ValueError(result['errors'][0]['error'])
             
-            # Dados completos do aluno
-            complete_student = {
-                'id': student_id,
-                'fullName': student_data.get('fullName', ''),
-                'email': student_data.get('email', ''),
-                'cpfCnpj': student_data.get('cpfCnpj', ''),
-                'certificateName': student_data.get('certificateName', student_data.get('fullName', '')),
-                'profession': student_data.get('profession', ''),
-                'phone': student_data.get('phone', ''),
-                'whatsapp': student_data.get('whatsapp', student_data.get('phone', '')),
-                'cep': student_data.get('cep', ''),
-                'address': student_data.get('address', ''),
-                'addressNumber': student_data.get('addressNumber', ''),
-                'addressComplement': student_data.get('addressComplement', ''),
-                'neighborhood': student_data.get('neighborhood', ''),
-                'city': student_data.get('city', ''),
-                'state': student_data.get('state', 'SP'),
-                'chosenCourseName': student_data.get('chosenCourseName', ''),
-                'facCode': student_data.get('facCode', ''),
-                'paymentMethod': student_data.get('paymentMethod', 'BOLETO'),
-                'totalInstallments': int(student_data.get('totalInstallments', 10)),
-                'courseFee': float(student_data.get('courseFee', 0)),
-                'boletoDueDate': student_data.get('boletoDueDate', '10'),
-                'howFound': student_data.get('howFound', 'Internet'),
-                'enrollmentStatus': student_data.get('enrollmentStatus', 'Matriculado'),
-                'data_cadastro': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Adicionar ao DataFrame
-            new_student = pd.DataFrame([complete_student])
-            self.students_df = pd.concat([self.students_df, new_student], ignore_index=True)
-            
-            # Gerar parcelas de pagamento
-            self._generate_payment_installments(complete_student)
-            
-            self.logger.info(f"Aluno {complete_student['fullName']} adicionado com sucesso")
+            self.logger.info(f"Aluno {student_data.get('fullName')} adicionado com sucesso")
             return True
             
         except Exception as e:
             self.logger.error(f"Erro ao adicionar aluno: {str(e)}")
             return False
     
+    def add_students_bulk(self, records: List[Dict]) -> Dict:
+        """
+        Adiciona vários alunos de uma vez.
+        
+        A validação é feita por coluna para todo o lote. Os registros válidos
+        são gravados no banco em uma única transação e entram no buffer de
+        inclusões, que é incorporado aos DataFrames em blocos.
+        
+        Args:
+            records: Lista de dicionários com dados dos alunos
+            
+        Returns:
+            Dicionário com 'added' (IDs incluídos) e 'errors'
+            (lista de {'record': posição, 'error': mensagem})
+        """
+        if not records:
+            return {'added': [], 'errors': []}
+        
+        raw = pd.DataFrame.from_records(records)
+        errors = pd.Series('', index=raw.index)
+        
+        def field(name: str, default) -> pd.Series:
+            if name not in raw.columns:
+                return pd.Series(default, index=raw.index)
+            return raw[name].where(raw[name].notna(), default)
+        
+        # Campos obrigatórios
+        for name in ['fullName', 'email', 'phone']:
+            values = field(name, '')
+            missing = values.astype(str) == ''
+            errors[missing] += f"Campo obrigatório '{name}' não fornecido; "
+        
+        # Campos numéricos
+        total_installments = pd.to_numeric(field('totalInstallments', 10), errors='coerce')
+        course_fee = pd.to_numeric(field('courseFee', 0), errors='coerce')
+        errors[~(total_installments >= 1)] += "Valor inválido para 'totalInstallments'; "
+        errors[course_fee.isna()] += "Valor inválido para 'courseFee'; "
+        
+        valid = errors == ''
+        invalid_records = [
+            {'record': int(position), 'error': message.rstrip('; ')}
+            for position, message in errors[~valid].items()
+        ]
+        
+        if not valid.any():
+            return {'added': [], 'errors': invalid_records}
+        
+        now = datetime.now()
+        full_name = field('fullName', '')
+        phone = field('phone', '')
+        
+        new_students = pd.DataFrame({
+            'id': [self._generate_student_id() for _ in range(int(valid.sum()))],
+            'fullName': full_name[valid],
+            'email': field('email', '')[valid],
+            'cpfCnpj': field('cpfCnpj', '')[valid],
+            'certificateName': field('certificateName', None).fillna(full_name)[valid],
+            'profession': field('profession', '')[valid],
+            'phone': phone[valid],
+            'whatsapp': field('whatsapp', None).fillna(phone)[valid],
+            'cep': field('cep', '')[valid],
+            'address': field('address', '')[valid],
+            'addressNumber': field('addressNumber', '')[valid],
+            'addressComplement': field('addressComplement', '')[valid],
+            'neighborhood': field('neighborhood', '')[valid],
+            'city': field('city', '')[valid],
+            'state': field('state', 'SP')[valid],
+            'chosenCourseName': field('chosenCourseName', '')[valid],
+            'facCode': field('facCode', '')[valid],
+            'paymentMethod': field('paymentMethod', 'BOLETO')[valid],
+            'totalInstallments': total_installments[valid].astype(int),
+            'courseFee': course_fee[valid].astype(float),
+            'boletoDueDate': field('boletoDueDate', '10')[valid],
+            'howFound': field('howFound', 'Internet')[valid],
+            'enrollmentStatus': field('enrollmentStatus', 'Matriculado')[valid],
+            'data_cadastro': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': now.isoformat()
+        }).reset_index(drop=True)
+        
+        new_payments = self._build_payment_installments(new_students)
+        
+        with self._lock:
+            self._reload_if_external_change()
+            
+            # Persistir alunos e parcelas na mesma transação
+            self.store.insert_students(new_students, new_payments)
+            
+            # Enfileirar para os DataFrames
+            self._student_buffer.append(new_students)
+            self._payment_buffer.append(new_payments)
+            self._buffered_rows += len(new_students)
+            if self._buffered_rows >= self.APPEND_CHUNK_SIZE:
+                self._flush_append_buffer()
+        
+        self.logger.info(f"{len(new_students)} alunos adicionados ({len(new_payments)} parcelas geradas)")
+        if invalid_records:
+            self.logger.warning(f"{len(invalid_records)} registros rejeitados na validação")
+        
+        return {'added': new_students['id'].tolist(), 'errors': invalid_records}
+    
     def update_student(self, student_id: str, updated_data: Dict) -> bool:
         """
         Atualiza dados de um aluno existente.
@@ -389,22 +572,31 @@ class AdvancedDataHandler:
             True se atualizado com sucesso
         """
         try:
-            # Verificar se aluno existe
-            student_idx = self.students_df[self.students_df['id'] == student_id].index
-            
-            if len(student_idx) == 0:
-                raise ValueError(f"Aluno com ID {student_id} não encontrado")
-            
-            # Atualizar dados
-            for field, value in updated_data.items():
-                if field in self.students_df.columns:
-                    self.students_df.loc[student_idx[0], field] = value
-            
-            # Atualizar timestamp
-            self.students_df.loc[student_idx[0], 'timestamp'] = datetime.now().isoformat()
-            
-            self.logger.info(f"Aluno {student_id} atualizado com sucesso")
-            return True
+            with self._lock:
+                self._refresh_if_changed()
+                
+                # Atualizar no banco (colunas desconhecidas são ignoradas)
+                fields = {field: value for field, value in updated_data.items() if field != 'id'}
+                fields['timestamp'] = datetime.now().isoformat()
+                
+                if self.store.update_row('students', 'id', student_id, fields) == 0:
+                    raise ValueError(f"Aluno com ID {student_id} não encontrado")
+                
+                # Atualizar dados
+                label = self._student_rows[student_id]
+                previous_fac = self.students_df.at[label, 'facCode']
+                for field, value in fields.items():
+                    if field in self.students_df.columns:
+                        self.students_df.at[label, field] = value
+                
+                # Manter índice por turma
+                new_fac = self.students_df.at[label, 'facCode']
+                if new_fac != previous_fac:
+                    self._unindex_fac(previous_fac, label)
+                    self._student_rows_by_fac.setdefault(new_fac, []).append(label)
+                
+                self.logger.info(f"Aluno {student_id} atualizado com sucesso")
+                return True
             
         except Exception as e:
             self.logger.error(f"Erro ao atualizar aluno: {str(e)}")
@@ -421,20 +613,26 @@ class AdvancedDataHandler:
             True se removido com sucesso
         """
         try:
-            # Verificar se aluno existe
-            student_exists = self.students_df['id'] == student_id
-            
-            if not student_exists.any():
-                raise ValueError(f"Aluno com ID {student_id} não encontrado")
-            
-            # Remover aluno
-            self.students_df = self.students_df[~student_exists]
-            
-            # Remover parcelas relacionadas
-            self.payments_df = self.payments_df[self.payments_df['student_id'] != student_id]
-            
-            self.logger.info(f"Aluno {student_id} removido com sucesso")
-            return True
+            with self._lock:
+                self._refresh_if_changed()
+                
+                # Remover do banco (parcelas removidas em cascata)
+                if self.store.delete_student(student_id) == 0:
+                    raise ValueError(f"Aluno com ID {student_id} não encontrado")
+                
+                # Remover aluno
+                label = self._student_rows.pop(student_id)
+                self._unindex_fac(self.students_df.at[label, 'facCode'], label)
+                self.students_df = self.students_df.drop(index=label)
+                
+                # Remover parcelas relacionadas
+                payment_labels = self._payment_rows_by_student.pop(student_id, [])
+                for payment_id in self.payments_df.loc[payment_labels, 'id']:
+                    del self._payment_rows[payment_id]
+                self.payments_df = self.payments_df.drop(index=payment_labels)
+                
+                self.logger.info(f"Aluno {student_id} removido com sucesso")
+                return True
             
         except Exception as e:
             self.logger.error(f"Erro ao remover aluno: {str(e)}")
@@ -451,20 +649,36 @@ class AdvancedDataHandler:
             Dicionário com dados do aluno ou None
         """
         try:
-            student_data = self.students_df[self.students_df['id'] == student_id]
-            
-            if student_data.empty:
-                return None
-            
-            return student_data.iloc[0].to_dict()
+            with self._lock:
+                self._refresh_if_changed()
+                label = self._student_rows.get(student_id)
+                
+                if label is None:
+                    return None
+                
+                return self.students_df.loc[label].to_dict()
             
         except Exception as e:
             self.logger.error(f"Erro ao buscar aluno: {str(e)}")
             return None
     
+    def data_version(self) -> tuple:
+        """
+        Versão dos dados de alunos e parcelas, igual em todas as sessões.
+        
+        Muda a cada inclusão, alteração ou exclusão de alunos e a cada
+        alteração de parcelas; usada como chave de caches de resultados.
+        
+        Returns:
+            Tupla (caminho_do_banco, revisão)
+        """
+        return (os.path.abspath(self.store.db_path), self.store.revision())
+    
     def get_all_students(self) -> pd.DataFrame:
         """Retorna todos os alunos."""
-        return self.students_df.copy()
+        with self._lock:
+            self._refresh_if_changed()
+            return self.students_df.copy()
     
     def get_students_by_fac(self, fac_code: str) -> pd.DataFrame:
         """
@@ -474,9 +688,11 @@ class AdvancedDataHandler:
             fac_code: Código da turma
             
         Returns:
-            DataFrame com alunos da turma
+            DataFrame com alunos da turma (seleção pelo índice, sem varrer a tabela)
         """
-        return self.students_df[self.students_df['facCode'] == fac_code].copy()
+        with self._lock:
+            self._refresh_if_changed()
+            return self._select_rows(self.students_df, self._student_rows_by_fac.get(fac_code, []))
     
     def get_payment_installments(self, student_id: str) -> pd.DataFrame:
         """
@@ -486,9 +702,11 @@ class AdvancedDataHandler:
             student_id: ID do aluno
             
         Returns:
-            DataFrame com parcelas
+            DataFrame com parcelas (fatia da tabela pelo índice, sem varrer nem copiar)
         """
-        return self.payments_df[self.payments_df['student_id'] == student_id].copy()
+        with self._lock:
+            self._refresh_if_changed()
+            return self._select_rows(self.payments_df, self._payment_rows_by_student.get(student_id, []))
     
     def update_payment_status(self, payment_id: str, status: str, payment_date: Optional[str] = None) -> bool:
         """
@@ -503,18 +721,24 @@ class AdvancedDataHandler:
             True se atualizado com sucesso
         """
         try:
-            payment_idx = self.payments_df[self.payments_df['id'] == payment_id].index
-            
-            if len(payment_idx) == 0:
-                raise ValueError(f"Pagamento {payment_id} não encontrado")
-            
-            self.payments_df.loc[payment_idx[0], 'status'] = status
-            
-            if payment_date:
-                self.payments_df.loc[payment_idx[0], 'payment_date'] = payment_date
-            
-            self.logger.info(f"Status do pagamento {payment_id} atualizado para {status}")
-            return True
+            with self._lock:
+                self._refresh_if_changed()
+                
+                fields = {'status': status}
+                if payment_date:
+                    fields['payment_date'] = payment_date
+                
+                if self.store.update_row('payments', 'id', payment_id, fields) == 0:
+                    raise ValueError(f"Pagamento {payment_id} não encontrado")
+                
+                label = self._payment_rows[payment_id]
+                self.payments_df.at[label, 'status'] = status
+                
+                if payment_date:
+                    self.payments_df.at[label, 'payment_date'] = payment_date
+                
+                self.logger.info(f"Status do pagamento {payment_id} atualizado para {status}")
+                return True
             
         except Exception as e:
             self.logger.error(f"Erro ao atualizar pagamento: {str(e)}")
@@ -523,30 +747,32 @@ class AdvancedDataHandler:
     def get_financial_summary(self) -> Dict:
         """Retorna resumo financeiro geral."""
         try:
-            total_students = len(self.students_df)
-            total_revenue = self.payments_df['amount'].sum()
-            paid_payments = self.payments_df[self.payments_df['status'] == 'Pago']
-            total_paid = paid_payments['amount'].sum()
-            pending_payments = self.payments_df[self.payments_df['status'] == 'Pendente']
-            total_pending = pending_payments['amount'].sum()
-            
-            # Calcular inadimplência (pagamentos em atraso)
-            today = datetime.now().strftime('%Y-%m-%d')
-            overdue_payments = self.payments_df[
-                (self.payments_df['status'] == 'Pendente') & 
-                (self.payments_df['due_date'] < today)
-            ]
-            total_overdue = overdue_payments['amount'].sum()
-            
-            return {
-                'total_students': total_students,
-                'total_revenue': total_revenue,
-                'total_paid': total_paid,
-                'total_pending': total_pending,
-                'total_overdue': total_overdue,
-                'payment_rate': (total_paid / total_revenue * 100) if total_revenue > 0 else 0,
-                'overdue_rate': (total_overdue / total_revenue * 100) if total_revenue > 0 else 0
-            }
+            with self._lock:
+                self._refresh_if_changed()
+                total_students = len(self.students_df)
+                total_revenue = self.payments_df['amount'].sum()
+                paid_payments = self.payments_df[self.payments_df['status'] == 'Pago']
+                total_paid = paid_payments['amount'].sum()
+                pending_payments = self.payments_df[self.payments_df['status'] == 'Pendente']
+                total_pending = pending_payments['amount'].sum()
+                
+                # Calcular inadimplência (pagamentos em atraso)
+                today = datetime.now().strftime('%Y-%m-%d')
+                overdue_payments = self.payments_df[
+                    (self.payments_df['status'] == 'Pendente') & 
+                    (self.payments_df['due_date'] < today)
+                ]
+                total_overdue = overdue_payments['amount'].sum()
+                
+                return {
+                    'total_students': total_students,
+                    'total_revenue': total_revenue,
+                    'total_paid': total_paid,
+                    'total_pending': total_pending,
+                    'total_overdue': total_overdue,
+                    'payment_rate': (total_paid / total_revenue * 100) if total_revenue > 0 else 0,
+                    'overdue_rate': (total_overdue / total_revenue * 100) if total_revenue > 0 else 0
+                }
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar resumo financeiro: {str(e)}")
@@ -554,11 +780,15 @@ class AdvancedDataHandler:
     
     def get_courses(self) -> pd.DataFrame:
         """Retorna lista de cursos."""
-        return self.courses_df.copy()
+        with self._lock:
+            self._refresh_if_changed()
+            return self.courses_df.copy()
     
     def get_facs(self) -> pd.DataFrame:
         """Retorna lista de turmas (FACs)."""
-        return self.facs_df.copy()
+        with self._lock:
+            self._refresh_if_changed()
+            return self.facs_df.copy()
     
     def export_students_to_excel(self, file_path: str) -> bool:
         """
@@ -571,14 +801,16 @@ class AdvancedDataHandler:
             True se exportado com sucesso
         """
         try:
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                self.students_df.to_excel(writer, sheet_name='Alunos', index=False)
-                self.payments_df.to_excel(writer, sheet_name='Pagamentos', index=False)
-                self.facs_df.to_excel(writer, sheet_name='Turmas', index=False)
-                self.courses_df.to_excel(writer, sheet_name='Cursos', index=False)
-            
-            self.logger.info(f"Dados exportados para {file_path}")
-            return True
+            with self._lock:
+                self._refresh_if_changed()
+                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+                    self.students_df.to_excel(writer, sheet_name='Alunos', index=False)
+                    self.payments_df.to_excel(writer, sheet_name='Pagamentos', index=False)
+                    self.facs_df.to_excel(writer, sheet_name='Turmas', index=False)
+                    self.courses_df.to_excel(writer, sheet_name='Cursos', index=False)
+                
+                self.logger.info(f"Dados exportados para {file_path}")
+                return True
             
         except Exception as e:
             self.logger.error(f"Erro ao exportar dados: {str(e)}")
@@ -1,30 +1,147 @@
 import sqlite3
+import os
+import time
 import pandas as pd
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import json
 
+class MigrationCheckpoint:
+    """
+    Arquivo de checkpoint (SQLite) de uma migração em lotes.
+    
+    Guarda os alunos já transformados, o último id migrado (com o tipo
+    original, para a paginação por chave comparar como no banco de origem) e
+    as estatísticas de cada lote. Lote e checkpoint são gravados na mesma transação, então uma
+    migração interrompida retoma exatamente após o último lote concluído.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoint (
+            key TEXT PRIMARY KEY,
+            value
+        );
+        CREATE TABLE IF NOT EXISTS batches (
+            batch INTEGER PRIMARY KEY,
+            rows INTEGER,
+            first_id TEXT,
+            last_id TEXT,
+            seconds REAL,
+            rows_per_second REAL,
+            memory_bytes INTEGER
+        );
+    """
+    
+    def __init__(self, path: str, source_path: str):
+        """
+        Abre (ou cria) o checkpoint.
+        
+        Args:
+            path: Caminho do arquivo de checkpoint
+            source_path: Banco de origem; um checkpoint de outro banco é descartado
+        """
+        self.path = path
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+        
+        if self._get('source_path') not in (None, os.path.abspath(source_path)):
+            self.close()
+            os.remove(path)
+            self.conn = sqlite3.connect(path)
+            self.conn.executescript(self.SCHEMA)
+        
+        with self.conn:
+            self._set('source_path', os.path.abspath(source_path))
+    
+    @property
+    def last_id(self) -> Optional[Any]:
+        """Último id migrado, ou None se nenhum lote foi concluído."""
+        return self._get('last_id')
+    
+    def get_batches(self) -> List[Dict]:
+        """Estatísticas dos lotes já concluídos, em ordem."""
+        return pd.read_sql_query("SELECT * FROM batches ORDER BY batch", self.conn).to_dict('records')
+    
+    def save_batch(self, rows: pd.DataFrame, last_id: Any, stats: Dict):
+        """
+        Grava um lote transformado e avança o checkpoint atomicamente.
+        
+        Args:
+            rows: Alunos transformados do lote
+            last_id: Maior id do lote (int, float ou str, como lido da origem)
+            stats: Estatísticas do lote (colunas da tabela batches)
+        """
+        with self.conn:
+            rows.to_sql('students', self.conn, if_exists='append', index=False)
+            self.conn.execute(
+                "INSERT INTO batches VALUES (:batch, :rows, :first_id, :last_id, :seconds, :rows_per_second, :memory_bytes)",
+                stats
+            )
+            self._set('last_id', last_id)
+    
+    def load_rows(self) -> pd.DataFrame:
+        """Lê todos os alunos já migrados, na ordem em que foram gravados."""
+        tables = [row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        if 'students' not in tables:
+            return pd.DataFrame()
+        return pd.read_sql_query("SELECT * FROM students ORDER BY rowid", self.conn)
+    
+    def close(self):
+        """Fecha o arquivo de checkpoint."""
+        self.conn.close()
+    
+    def remove(self):
+        """Fecha e apaga o checkpoint (migração concluída)."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def _get(self, key: str) -> Optional[Any]:
+        row = self.conn.execute("SELECT value FROM checkpoint WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set(self, key: str, value: Any):
+        self.conn.execute("INSERT OR REPLACE INTO checkpoint (key, value) VALUES (?, ?)", (key, value))
+
+
 class BackendMigrator:
     """
     Migrador completo do backend Node.js/Express para Streamlit.
     Integra dados do SQLite e estrutura do projeto React original.
     """
     
-    def __init__(self, db_path: str):
+    DEFAULT_BATCH_SIZE = 5000
+    CHECKPOINT_DIR = 'data/migration_checkpoints'
+    
+    def __init__(self, db_path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 checkpoint_path: Optional[str] = None):
         """
         Inicializa o migrador.
         
         Args:
             db_path: Caminho para o banco SQLite do backend
+            batch_size: Número de alunos lidos por lote
+            checkpoint_path: Arquivo de checkpoint (padrão: um por banco em CHECKPOINT_DIR)
         """
         self.db_path = db_path
+        self.batch_size = max(int(batch_size), 1)
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            self.CHECKPOINT_DIR, f"{os.path.basename(db_path)}.checkpoint.db"
+        )
         self.logger = self._setup_logger()
         
         # Estruturas de dados migradas
         self.students_data = pd.DataFrame()
         self.users_data = pd.DataFrame()
         self.migration_report = {}
+        self.batch_stats: List[Dict] = []
+        self.resumed_from: Optional[str] = None
     
     def _setup_logger(self) -> logging.Logger:
         """Configura o sistema de logging."""
@@ -69,27 +186,90 @@ class BackendMigrator:
             return {'error': str(e)}
     
     def _migrate_students(self, conn: sqlite3.Connection):
-        """Migra dados da tabela students."""
+        """
+        Migra dados da tabela students em lotes ordenados por id.
+        
+        Usa paginação por chave (WHERE id > último_id) e grava cada lote
+        transformado no checkpoint; se uma execução anterior foi interrompida,
+        continua a partir do último lote concluído. Só os lotes das execuções
+        anteriores são lidos do checkpoint; os desta execução ficam em memória
+        e são concatenados uma vez ao final.
+        """
+        checkpoint = None
         try:
-            # Ler dados dos alunos
-            query = "SELECT * FROM students"
-            self.students_data = pd.read_sql_query(query, conn)
+            checkpoint = MigrationCheckpoint(self.checkpoint_path, self.db_path)
+            last_id = checkpoint.last_id
+            self.resumed_from = last_id
+            migrated = []
+            
+            if last_id is not None:
+                self.logger.info(f"Retomando migração de alunos após o id {last_id}")
+                migrated.append(checkpoint.load_rows())
+            
+            batch_number = len(checkpoint.get_batches())
+            while True:
+                started = time.perf_counter()
+                if last_id is None:
+                    batch = pd.read_sql_query(
+                        "SELECT * FROM students WHERE id IS NOT NULL ORDER BY id LIMIT ?",
+                        conn, params=(self.batch_size,)
+                    )
+                else:
+                    batch = pd.read_sql_query(
+                        "SELECT * FROM students WHERE id > ? ORDER BY id LIMIT ?",
+                        conn, params=(last_id, self.batch_size)
+                    )
+                
+                if batch.empty:
+                    break
+                
+                transformed = self._transform_students_data(batch)
+                batch_number += 1
+                elapsed = time.perf_counter() - started
+                # Tipo nativo (int, float ou str) para a próxima comparação id > ?
+                last_id = batch['id'].iloc[-1:].tolist()[0]
+                
+                checkpoint.save_batch(transformed, last_id, {
+                    'batch': batch_number,
+                    'rows': len(batch),
+                    'first_id': str(batch['id'].iloc[0]),
+                    'last_id': str(last_id),
+                    'seconds': round(elapsed, 4),
+                    'rows_per_second': round(len(batch) / elapsed, 1) if elapsed > 0 else None,
+                    'memory_bytes': int(batch.memory_usage(deep=True).sum() + transformed.memory_usage(deep=True).sum())
+                })
+                migrated.append(transformed)
+                
+                if len(batch) < self.batch_size:
+                    break
+            
+            # Alunos sem id não entram na paginação por chave; são poucos e lidos de uma vez
+            orphans = pd.read_sql_query("SELECT * FROM students WHERE id IS NULL", conn)
+            if not orphans.empty:
+                migrated.append(self._transform_students_data(orphans))
+            
+            self.batch_stats = checkpoint.get_batches()
+            migrated = [frame for frame in migrated if not frame.empty]
+            self.students_data = pd.concat(migrated, ignore_index=True) if migrated else pd.DataFrame()
+            checkpoint.remove()
             
             if self.students_data.empty:
                 self.logger.warning("Tabela de alunos está vazia no backend")
-                # Criar estrutura vazia baseada no schema
-                self.students_data = pd.DataFrame(columns=[
+                # Criar estrutura vazia no formato Streamlit
+                self.students_data = self._transform_students_data(pd.DataFrame(columns=[
                     'id', 'name', 'email', 'phone', 'birthDate', 'course'
-                ])
+                ]))
             else:
-                self.logger.info(f"Migrados {len(self.students_data)} alunos do backend")
-            
-            # Mapear campos para o formato Streamlit
-            self._transform_students_data()
+                self.students_data['migrated_from_backend'] = self.students_data['migrated_from_backend'].astype(bool)
+                self.logger.info(f"Migrados {len(self.students_data)} alunos do backend em {len(self.batch_stats)} lotes")
             
         except Exception as e:
             self.logger.error(f"Erro ao migrar alunos: {str(e)}")
             self.students_data = pd.DataFrame()
+        
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
     
     def _migrate_users(self, conn: sqlite3.Connection):
         """Migra dados da tabela users."""
@@ -104,55 +284,51 @@ class BackendMigrator:
             self.logger.error(f"Erro ao migrar usuários: {str(e)}")
             self.users_data = pd.DataFrame()
     
-    def _transform_students_data(self):
-        """Transforma dados dos alunos para formato compatível com Streamlit."""
-        if self.students_data.empty:
-            return
+    def _transform_students_data(self, students: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transforma um lote de alunos para o formato compatível com Streamlit.
         
-        try:
-            # Mapear campos do backend para formato Streamlit
-            transformed_data = []
-            
-            for _, student in self.students_data.iterrows():
-                transformed_student = {
-                    'id': student.get('id', ''),
-                    'fullName': student.get('name', ''),
-                    'email': student.get('email', ''),
-                    'cpfCnpj': '',  # Campo não existia no backend simples
-                    'certificateName': student.get('name', ''),
-                    'profession': '',  # Campo não existia no backend simples
-                    'phone': student.get('phone', ''),
-                    'whatsapp': student.get('phone', ''),  # Usar mesmo telefone
-                    'cep': '',
-                    'address': '',
-                    'addressNumber': '',
-                    'addressComplement': '',
-                    'neighborhood': '',
-                    'city': '',
-                    'state': 'SP',  # Valor padrão
-                    'chosenCourseName': student.get('course', ''),
-                    'facCode': 'FAC_17',  # Valor padrão para alunos migrados
-                    'paymentMethod': 'BOLETO',  # Valor padrão
-                    'totalInstallments': 10,  # Valor padrão
-                    'courseFee': 400.0,  # Valor padrão
-                    'boletoDueDate': '10',  # Valor padrão
-                    'howFound': 'Migração Backend',  # Identificar origem
-                    'enrollmentStatus': 'Matriculado',  # Valor padrão
-                    'birthDate': student.get('birthDate', ''),
-                    'data_cadastro': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'timestamp': datetime.now().isoformat(),
-                    'migrated_from_backend': True  # Flag para identificar origem
-                }
-                
-                transformed_data.append(transformed_student)
-            
-            # Substituir DataFrame original
-            self.students_data = pd.DataFrame(transformed_data)
-            
-            self.logger.info(f"Dados de {len(transformed_data)} alunos transformados para formato Streamlit")
+        Args:
+            students: Lote lido da tabela students do backend
             
-        except Exception as e:
-            self.logger.error(f"Erro ao transformar dados: {str(e)}")
+        Returns:
+            DataFrame no formato do AdvancedDataHandler
+        """
+        def column(name):
+            return students[name].to_numpy() if name in students.columns else ''
+        
+        now = datetime.now()
+        
+        # Mapear campos do backend para formato Streamlit
+        return pd.DataFrame({
+            'id': column('id'),
+            'fullName': column('name'),
+            'email': column('email'),
+            'cpfCnpj': '',  # Campo não existia no backend simples
+            'certificateName': column('name'),
+            'profession': '',  # Campo não existia no backend simples
+            'phone': column('phone'),
+            'whatsapp': column('phone'),  # Usar mesmo telefone
+            'cep': '',
+            'address': '',
+            'addressNumber': '',
+            'addressComplement': '',
+            'neighborhood': '',
+            'city': '',
+            'state': 'SP',  # Valor padrão
+            'chosenCourseName': column('course'),
+            'facCode': 'FAC_17',  # Valor padrão para alunos migrados
+            'paymentMethod': 'BOLETO',  # Valor padrão
+            'totalInstallments': 10,  # Valor padrão
+            'courseFee': 400.0,  # Valor padrão
+            'boletoDueDate': '10',  # Valor padrão
+            'howFound': 'Migração Backend',  # Identificar origem
+            'enrollmentStatus': 'Matriculado',  # Valor padrão
+            'birthDate': column('birthDate'),
+            'data_cadastro': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': now.isoformat(),
+            'migrated_from_backend': True  # Flag para identificar origem
+        }, index=pd.RangeIndex(len(students)))
     
     def _generate_migration_report(self):
         """Gera relatório da migração."""
@@ -167,6 +343,15 @@ class BackendMigrator:
                 'with_phone': len(self.students_data[self.students_data['phone'] != '']),
                 'courses': self.students_data['chosenCourseName'].value_counts().to_dict() if not self.students_data.empty else {}
             },
+            'batches': {
+                'batch_size': self.batch_size,
+                'count': len(self.batch_stats),
+                'resumed_from_id': self.resumed_from,
+                'total_seconds': round(sum(batch['seconds'] for batch in self.batch_stats), 4),
+                'rows_per_second': self._overall_throughput(),
+                'peak_memory_bytes': max((batch['memory_bytes'] for batch in self.batch_stats), default=0),
+                'details': self.batch_stats
+            },
             'users_details': {
                 'total': len(self.users_data),
                 'by_role': self.users_data['role'].value_counts().to_dict() if not self.users_data.empty else {}
@@ -185,6 +370,12 @@ class BackendMigrator:
             }
         }
     
+    def _overall_throughput(self) -> Optional[float]:
+        """Alunos migrados por segundo, somando todos os lotes."""
+        seconds = sum(batch['seconds'] for batch in self.batch_stats)
+        rows = sum(batch['rows'] for batch in self.batch_stats)
+        return round(rows / seconds, 1) if seconds > 0 else None
+    
     def get_migrated_students(self) -> pd.DataFrame:
         """Retorna dados dos alunos migrados."""
         return self.students_data.copy()
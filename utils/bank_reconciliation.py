@@ -1,10 +1,244 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Iterable, Iterator, Sequence
 import logging
 from dataclasses import dataclass
+from copy import copy
+from collections import defaultdict
 import re
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from utils.payment_schedule import PaymentScheduleBuilder
+from utils.reconciliation_state import ReconciliationState
+from utils.bank_statement_parsers import detect_statement_parser
+
+# datetime.toordinal() de 1970-01-01 (dias desde 01/01/0001)
+_EPOCH_ORDINAL = 719163
+
+# Transações por lote na leitura de extratos em partes
+DEFAULT_EXTRACT_BATCH_SIZE = 5000
+
+# CPF ou CNPJ, formatado ou só com dígitos, sem outros dígitos colados
+DOCUMENT_PATTERN = (
+    r'(?<!\d)(?:\d{3}\.?\d{3}\.?\d{3}-?\d{2}|\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2})(?!\d)'
+)
+
+
+def _expand_ranges(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expande intervalos [start, start + count) em posições individuais.
+    
+    Returns:
+        Vetores (intervalo_de_origem, posição), na ordem dos intervalos
+    """
+    total = int(counts.sum())
+    owners = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(starts, counts) + within
+
+
+def _unique_keys(keys: np.ndarray) -> np.ndarray:
+    """Chaves inteiras distintas, ordenadas (ordenação + comparação com a vizinha, mais rápido que np.unique)."""
+    keys = np.sort(keys)
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+def _fold_text(texts: pd.Series) -> pd.Series:
+    """Textos em maiúsculas e sem acentos."""
+    return (texts.fillna('').astype(str)
+            .str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('ascii')
+            .str.upper())
+
+
+@lru_cache(maxsize=16)
+def _compile_patterns(channel_patterns: Tuple[Tuple[str, str], ...], document_pattern: str) -> re.Pattern:
+    """
+    Junta os padrões de canal e de documento em uma única expressão.
+    
+    Cada canal vira um grupo nomeado de uma alternação; canal e documento são
+    procurados em lookaheads ancorados no início, então a ordem em que
+    aparecem na descrição não importa e basta uma busca por texto.
+    """
+    channels = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in channel_patterns)
+    return re.compile(
+        rf'^(?=(?:.*?(?<![A-Z])(?:{channels})(?![A-Z])(?:\D*?(?P<reference>\d+))?)?)'
+        rf'(?=(?:.*?(?P<document>{document_pattern}))?)'
+    )
+
+
+def _solve_assignment(cost: np.ndarray) -> np.ndarray:
+    """
+    Atribuição de custo mínimo (algoritmo húngaro) para matriz n x m com n <= m.
+    
+    Cada iteração do laço interno atualiza todas as colunas de uma vez.
+    
+    Returns:
+        Coluna atribuída a cada linha
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # linha (base 1) dona de cada coluna; 0 = livre
+    way = np.zeros(m + 1, dtype=np.int64)
+    
+    for row in range(1, n + 1):
+        owner[0] = row
+        col = 0
+        min_value = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        
+        while True:
+            used[col] = True
+            current = cost[owner[col] - 1] - u[owner[col]] - v[1:]
+            free = ~used[1:]
+            
+            improved = free & (current < min_value[1:])
+            min_value[1:][improved] = current[improved]
+            way[1:][improved] = col
+            
+            candidates = np.where(free, min_value[1:], np.inf)
+            next_col = int(np.argmin(candidates)) + 1
+            delta = candidates[next_col - 1]
+            
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_value[1:][free] -= delta
+            
+            col = next_col
+            if owner[col] == 0:
+                break
+        
+        while col:
+            previous = way[col]
+            owner[col] = owner[previous]
+            col = previous
+    
+    assignment = np.empty(n, dtype=np.int64)
+    assigned = owner[1:] > 0
+    assignment[owner[1:][assigned] - 1] = np.nonzero(assigned)[0]
+    return assignment
+
+
+def _solve_component(rows: np.ndarray, cols: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Emparelhamento de peso máximo de um componente do grafo de candidatos.
+    
+    Args:
+        rows: Transação de cada aresta
+        cols: Parcela de cada aresta
+        weights: Score de cada aresta (positivo)
+    
+    Returns:
+        Vetores (transações, parcelas) emparelhadas
+    """
+    row_ids, local_rows = np.unique(rows, return_inverse=True)
+    col_ids, local_cols = np.unique(cols, return_inverse=True)
+    
+    # Pares sem aresta valem 0, o mesmo que não emparelhar
+    cost = np.zeros((len(row_ids), len(col_ids)))
+    cost[local_rows, local_cols] = -weights
+    
+    transposed = len(row_ids) > len(col_ids)
+    if transposed:
+        cost = cost.T
+    
+    assignment = _solve_assignment(cost)
+    kept = cost[np.arange(len(assignment)), assignment] < 0
+    first, second = np.nonzero(kept)[0], assignment[kept]
+    
+    if transposed:
+        return row_ids[second], col_ids[first]
+    return row_ids[first], col_ids[second]
+
+
+def _reconcile_shard(settings: Dict, credits: List['BankTransaction'],
+                     payments: List['StudentPayment']) -> List[Tuple[int, int, float, str]]:
+    """
+    Concilia uma partição (executado nos processos do pool).
+    
+    Args:
+        settings: Tolerâncias e modo de correspondência do conciliador
+        credits: Créditos da partição
+        payments: Cópias das parcelas em aberto da partição
+    
+    Returns:
+        Lista (crédito, parcela, score, tipo) em posições locais da partição
+    """
+    reconciler = BankReconciliation()
+    reconciler.tolerance_amount = settings['tolerance_amount']
+    reconciler.tolerance_days = settings['tolerance_days']
+    reconciler.max_workers = 1  # Já roda dentro do pool
+    
+    if not credits or not payments:
+        return []
+    
+    positions = {id(payment): position for position, payment in enumerate(payments)}
+    matches = reconciler._match_credits(credits, payments, None, settings['matching_mode'])
+    return [
+        (credit_position, positions[id(payment)], score, match_type)
+        for credit_position, (payment, score, match_type) in sorted(matches.items())
+    ]
+
+
+class PaymentPatternEngine:
+    """
+    Identifica canal de pagamento e documento nas descrições do extrato.
+    
+    Todos os padrões são compilados em uma única expressão (em cache) e
+    aplicados de uma vez sobre a coluna inteira de descrições.
+    """
+    
+    CHANNEL_PATTERNS = {
+        'PIX': r'PIX',
+        'TED': r'TED',
+        'BOLETO': r'BOLETO',
+        'CARTAO': r'CARTAO',
+        'TRANSFERENCIA': r'TRANSFERENCIA|TRANSF',
+    }
+    
+    def __init__(self, channel_patterns: Optional[Dict[str, str]] = None,
+                 document_pattern: str = DOCUMENT_PATTERN):
+        """
+        Inicializa o motor de padrões.
+        
+        Args:
+            channel_patterns: Canal -> expressão regular (padrão: CHANNEL_PATTERNS)
+            document_pattern: Expressão de CPF/CNPJ
+        """
+        self.channel_patterns = dict(channel_patterns or self.CHANNEL_PATTERNS)
+        self.document_pattern = document_pattern
+    
+    @property
+    def compiled(self) -> re.Pattern:
+        """Expressão combinada, compilada uma vez por conjunto de padrões."""
+        return _compile_patterns(tuple(self.channel_patterns.items()), self.document_pattern)
+    
+    def extract(self, descriptions: Sequence[str]) -> pd.DataFrame:
+        """
+        Extrai canal, número de referência e documento de cada descrição.
+        
+        Args:
+            descriptions: Descrições do extrato
+        
+        Returns:
+            DataFrame com colunas channel, reference e document (só dígitos),
+            uma linha por descrição e '' quando não encontrado
+        """
+        texts = _fold_text(pd.Series(list(descriptions), dtype=object))
+        if texts.empty:
+            return pd.DataFrame(columns=['channel', 'reference', 'document'], dtype=object)
+        
+        groups = texts.str.extract(self.compiled)
+        channel_groups = groups[list(self.channel_patterns)]
+        found = channel_groups.notna()
+        
+        return pd.DataFrame({
+            'channel': found.idxmax(axis=1).where(found.any(axis=1), ''),
+            'reference': groups['reference'].fillna(''),
+            'document': groups['document'].fillna('').str.replace(r'\D', '', regex=True)
+        }, index=texts.index)
 
 @dataclass
 class BankTransaction:
@@ -27,6 +261,199 @@ class StudentPayment:
     payment_method: str
     status: str  # 'pending', 'paid', 'overdue'
 
+class BankTransactionTable(Sequence):
+    """
+    Tabela colunar de transações bancárias.
+    
+    Mantém o extrato em um DataFrame (colunas date, amount, description,
+    document, account, type) e só cria objetos BankTransaction quando um
+    item é acessado.
+    """
+    
+    COLUMNS = ['date', 'amount', 'description', 'document', 'account', 'type']
+    
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame.reset_index(drop=True)
+    
+    def __len__(self) -> int:
+        return len(self.frame)
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return BankTransactionTable(self.frame.iloc[position])
+        return self._to_transaction(self.frame.iloc[position])
+    
+    def __iter__(self) -> Iterator[BankTransaction]:
+        for row in self.frame.itertuples(index=False):
+            yield self._to_transaction(row)
+    
+    @staticmethod
+    def _to_transaction(row) -> BankTransaction:
+        """Converte uma linha da tabela em BankTransaction."""
+        return BankTransaction(
+            date=row.date,
+            amount=float(row.amount),
+            description=row.description,
+            document=row.document,
+            account=row.account,
+            type=row.type
+        )
+    
+    def credits(self) -> 'BankTransactionTable':
+        """Retorna apenas os créditos (recebimentos)."""
+        return BankTransactionTable(self.frame[self.frame['type'] == 'credit'])
+
+class NameTokenIndex:
+    """
+    Índice invertido palavra do nome -> aluno, montado uma vez por conciliação.
+    
+    Nomes e descrições são comparados por palavra inteira, sem acentos e sem
+    preposições (DA, DE, DOS...), de modo que "SILVA" não casa com "SILVANA"
+    nem "DA" casa com qualquer descrição. Palavras repetidas no nome contam
+    uma vez por ocorrência, como na comparação original.
+    """
+    
+    STOP_WORDS = {'DA', 'DAS', 'DE', 'DI', 'DO', 'DOS', 'DU', 'E'}
+    
+    def __init__(self, student_ids: Sequence[str], student_names: Sequence[str]):
+        """
+        Monta o índice.
+        
+        Args:
+            student_ids: Id de cada aluno (posição = código do aluno)
+            student_names: Nome de cada aluno, na mesma ordem
+        """
+        tokens = self.tokenize(pd.Series(list(student_names), dtype=object))
+        
+        words = pd.DataFrame({
+            'student': np.repeat(np.arange(len(tokens)), tokens.str.len().to_numpy()),
+            'token': np.concatenate(tokens.to_list()) if len(tokens) else np.empty(0, dtype=object)
+        })
+        pairs = words.groupby(['student', 'token'], sort=False).size().reset_index(name='weight')
+        
+        codes, vocabulary = pd.factorize(pairs['token'])
+        self.student_ids = list(student_ids)
+        self.vocabulary = pd.Index(vocabulary)
+        self.student_count = len(self.student_ids)
+        width = max(self.student_count, 1)
+        
+        # Postings ordenados pela chave palavra * n_alunos + aluno, com o número de ocorrências no nome
+        keys = codes.astype(np.int64) * width + pairs['student'].to_numpy()
+        order = np.argsort(keys, kind='stable')
+        self.postings = keys[order]
+        self.weights = pairs['weight'].to_numpy()[order]
+        self.token_count = np.bincount(words['student'].to_numpy(), minlength=self.student_count)
+        
+        # Palavras de cada aluno: fatia [student_bounds[s], student_bounds[s + 1]) de student_tokens
+        posting_students = self.postings % width
+        by_student = np.argsort(posting_students, kind='stable')
+        self.student_tokens = self.postings[by_student] // width
+        self.student_bounds = np.searchsorted(posting_students[by_student], np.arange(self.student_count + 1))
+        
+        # Prefixo de palavras mais raras de cada aluno: quem tem mais de 2/3 do
+        # nome na descrição compartilha pelo menos uma delas
+        frequency = np.bincount(self.postings // width, minlength=len(self.vocabulary))
+        prefix_order = np.lexsort((self.postings, frequency[self.postings // width], posting_students))
+        prefix_students = posting_students[prefix_order]
+        ordered_weights = self.weights[prefix_order]
+        weight_before = np.cumsum(ordered_weights) - ordered_weights
+        weight_before -= weight_before[np.searchsorted(prefix_students, prefix_students)]
+        needed = 3 * (self.token_count[prefix_students] - weight_before) > 2 * self.token_count[prefix_students]
+        self.prefix_postings = np.sort(self.postings[prefix_order][needed])
+        
+        self._last_descriptions = None
+        self._last_lookup = None
+    
+    @classmethod
+    def tokenize(cls, texts: pd.Series) -> pd.Series:
+        """Palavras de cada texto, em maiúsculas, sem acentos e sem preposições."""
+        return _fold_text(texts).str.findall(r'[A-Z]+').map(
+            lambda words: [word for word in words if word not in cls.STOP_WORDS]
+        )
+    
+    def lookup(self, descriptions: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokeniza as descrições uma única vez, mantendo só palavras do índice.
+        
+        O resultado da última lista consultada é reaproveitado, então geração
+        de candidatos e score tokenizam o extrato uma vez só.
+        
+        Returns:
+            Vetores (posição_da_descrição, código_da_palavra), sem repetições
+        """
+        if descriptions is self._last_descriptions:
+            return self._last_lookup
+        
+        tokens = self.tokenize(pd.Series(list(descriptions), dtype=object))
+        positions = np.repeat(np.arange(len(tokens)), tokens.str.len().to_numpy())
+        words = np.concatenate(tokens.to_list()) if len(tokens) else np.empty(0, dtype=object)
+        
+        codes = self.vocabulary.get_indexer(words) if len(words) else np.empty(0, dtype=np.int64)
+        known = codes >= 0
+        vocabulary_size = max(len(self.vocabulary), 1)
+        keys = _unique_keys(positions[known].astype(np.int64) * vocabulary_size + codes[known])
+        
+        self._last_descriptions = descriptions
+        self._last_lookup = (keys // vocabulary_size, keys % vocabulary_size)
+        return self._last_lookup
+    
+    def strong_candidates(self, descriptions: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares (descrição, aluno) com mais de 2/3 das palavras do nome na descrição.
+        
+        São os únicos pares que passam do threshold fora da tolerância de
+        data (valor 0.4 + nome 0.3 x fração > 0.6). Só os postings do prefixo
+        de palavras raras de cada nome são percorridos, então "SILVA" não
+        traz a escola inteira.
+        
+        Returns:
+            Vetores (posição_da_descrição, código_do_aluno), ordenados por descrição e aluno
+        """
+        if len(self.prefix_postings) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        token_desc, token_codes = self.lookup(descriptions)
+        width = max(self.student_count, 1)
+        starts = np.searchsorted(self.prefix_postings, token_codes * width)
+        counts = np.searchsorted(self.prefix_postings, (token_codes + 1) * width) - starts
+        
+        owners, positions = _expand_ranges(starts, counts)
+        keys = _unique_keys(token_desc[owners] * width + self.prefix_postings[positions] % width)
+        desc_idx, student_idx = keys // width, keys % width
+        
+        shared = self.shared_tokens(descriptions, desc_idx, student_idx)
+        strong = 3 * shared > 2 * self.token_count[student_idx]
+        return desc_idx[strong], student_idx[strong]
+    
+    def shared_tokens(self, descriptions: Sequence[str], desc_idx: np.ndarray, student_idx: np.ndarray) -> np.ndarray:
+        """
+        Conta, para cada par (descrição, aluno), as palavras do nome presentes na descrição.
+        
+        Só as palavras da descrição que existem em algum nome são consultadas
+        nos postings; alunos sem palavra em comum recebem 0.
+        """
+        counts = np.zeros(len(desc_idx), dtype=np.int64)
+        if len(desc_idx) == 0 or len(self.postings) == 0:
+            return counts
+        
+        token_desc, token_codes = self.lookup(descriptions)
+        if len(token_desc) == 0:
+            return counts
+        
+        # Palavras de cada descrição: fatia [start, end) de token_codes
+        bounds = np.searchsorted(token_desc, np.arange(len(descriptions) + 1))
+        per_pair = bounds[desc_idx + 1] - bounds[desc_idx]
+        
+        pair_rows, word_positions = _expand_ranges(bounds[desc_idx], per_pair)
+        words = token_codes[word_positions]
+        
+        keys = words * max(self.student_count, 1) + student_idx[pair_rows]
+        found = np.searchsorted(self.postings, keys)
+        hit = (found < len(self.postings)) & (self.postings[np.minimum(found, len(self.postings) - 1)] == keys)
+        
+        return np.bincount(pair_rows[hit], weights=self.weights[found[hit]], minlength=len(desc_idx)).astype(np.int64)
+
+
 class BankReconciliation:
     """
     Sistema de conciliação bancária para validar adimplência e inadimplência.
@@ -36,15 +463,23 @@ class BankReconciliation:
         self.logger = self._setup_logger()
         self.tolerance_amount = 5.0  # Tolerância de R$ 5,00 para diferenças
         self.tolerance_days = 3  # Tolerância de 3 dias para datas
+        self.matching_mode = 'greedy'  # 'greedy' (ordem do extrato) ou 'optimal' (atribuição global)
+        self.max_workers = None  # Processos para resolver componentes no modo 'optimal' (None = CPUs)
+        self.parallel_min_edges = 2000  # Arestas mínimas de um componente para ir ao pool de processos
+        self.parallel_min_credits = 20000  # Créditos mínimos para conciliar as partições em paralelo
+        self.schedule_builder = PaymentScheduleBuilder()
         
-        # Padrões para identificar pagamentos
-        self.payment_patterns = [
-            r'PIX.*?(\d{3}\.\d{3}\.\d{3}-\d{2})',  # PIX com CPF
-            r'TED.*?(\d+)',  # TED
-            r'BOLETO.*?(\d+)',  # Boleto
-            r'CARTAO.*?(\d+)',  # Cartão
-            r'TRANSFERENCIA.*?(\d+)',  # Transferência
-        ]
+        # Padrões para identificar canal e documento dos pagamentos
+        self.pattern_engine = PaymentPatternEngine()
+        
+        # Nomes de coluna aceitos para cada campo do extrato
+        self.extract_column_aliases = {
+            'date': ['data', 'Data', 'date'],
+            'amount': ['valor', 'Valor', 'amount'],
+            'description': ['descricao', 'Descricao', 'description'],
+            'document': ['documento', 'Documento', 'document'],
+            'account': ['conta', 'Conta', 'account'],
+        }
     
     def _setup_logger(self) -> logging.Logger:
         """Configura o sistema de logging."""
@@ -59,63 +494,222 @@ class BankReconciliation:
         
         return logger
     
-    def load_bank_extract(self, file_path: str = None, data: pd.DataFrame = None) -> List[BankTransaction]:
+    def load_bank_extract(self, file_path: str = None, data: pd.DataFrame = None) -> BankTransactionTable:
         """
         Carrega extrato bancário de arquivo ou DataFrame.
         
         Args:
-            file_path: Caminho para arquivo CSV/Excel do extrato
+            file_path: Caminho para arquivo CSV/Excel/OFX/CNAB do extrato
+            data: DataFrame com dados do extrato
+            
+        Returns:
+            Tabela de transações bancárias (convertidas em BankTransaction sob demanda)
+        """
+        return BankTransactionTable(self.load_bank_extract_frame(file_path=file_path, data=data))
+    
+    def load_bank_extract_frame(self, file_path: str = None, data: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Carrega extrato bancário em formato colunar.
+        
+        Os nomes de coluna são resolvidos uma única vez e datas e valores
+        (ex: "R$ 1.234,56") são convertidos por coluna inteira. Arquivos OFX
+        e CNAB são lidos em lotes (iter_bank_extract) e só as colunas já
+        convertidas são concatenadas.
+        
+        Args:
+            file_path: Caminho para arquivo CSV/Excel/OFX/CNAB do extrato
             data: DataFrame com dados do extrato
             
         Returns:
-            Lista de transações bancárias
+            DataFrame com colunas date, amount, description, document, account e type
         """
         try:
-            if file_path:
-                if file_path.endswith('.csv'):
-                    df = pd.read_csv(file_path)
+            if file_path and detect_statement_parser(file_path) is not None:
+                batches = [batch.frame for batch in self.iter_bank_extract(file_path)]
+                frame = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=BankTransactionTable.COLUMNS)
+            else:
+                if file_path:
+                    if file_path.endswith('.csv'):
+                        df = pd.read_csv(file_path)
+                    else:
+                        df = pd.read_excel(file_path)
+                elif data is not None:
+                    df = data
                 else:
-                    df = pd.read_excel(file_path)
-            elif data is not None:
-                df = data.copy()
+                    # Gerar dados de exemplo para demonstração
+                    df = self._generate_sample_bank_data()
+                
+                frame = self._normalize_extract(df)
+            
+            self.logger.info(f"Carregadas {len(frame)} transações bancárias")
+            return frame
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar extrato bancário: {e}")
+            return pd.DataFrame(columns=BankTransactionTable.COLUMNS)
+    
+    def iter_bank_extract(self, file, file_name: Optional[str] = None,
+                          batch_size: int = DEFAULT_EXTRACT_BATCH_SIZE) -> Iterator[BankTransactionTable]:
+        """
+        Lê o extrato em lotes de tamanho fixo, sem carregar o arquivo inteiro.
+        
+        OFX e CNAB 240/400 usam os leitores de utils.bank_statement_parsers;
+        CSV é lido com read_csv(chunksize). Excel não tem leitura em partes e
+        vira um único lote. Cada lote pode ir direto para reconcile_incremental,
+        que só processa os créditos ainda não vistos.
+        
+        Args:
+            file: Caminho ou objeto de arquivo (ex: upload do Streamlit)
+            file_name: Nome usado para identificar o formato (padrão: file ou file.name)
+            batch_size: Número de transações por lote
+            
+        Yields:
+            Tabelas de transações bancárias de até batch_size linhas
+        """
+        name = file_name or (file if isinstance(file, str) else getattr(file, 'name', ''))
+        parser = detect_statement_parser(name, batch_size)
+        
+        try:
+            if parser is not None:
+                for frame in parser.iter_batches(file):
+                    yield BankTransactionTable(frame)
+                return
+            
+            if str(name).lower().endswith('.csv'):
+                chunks = pd.read_csv(file, chunksize=batch_size)
             else:
-                # Gerar dados de exemplo para demonstração
-                df = self._generate_sample_bank_data()
+                chunks = [pd.read_excel(file)]
             
-            transactions = []
+            for chunk in chunks:
+                yield BankTransactionTable(self._normalize_extract(chunk))
+                
+        except Exception as e:
+            self.logger.error(f"Erro ao ler extrato bancário em lotes: {e}")
+    
+    def reconcile_stream(self, batches: Iterable[Sequence[BankTransaction]],
+                         expected_payments: List[StudentPayment],
+                         state: ReconciliationState,
+                         students_data: Optional[pd.DataFrame] = None,
+                         matching_mode: Optional[str] = None) -> Dict:
+        """
+        Concilia um extrato lote a lote sobre o estado persistido.
+        
+        O histórico é lido do estado uma única vez e mantido em memória
+        entre os lotes; cada lote concilia só os seus créditos novos contra
+        as parcelas ainda em aberto e grava apenas o que mudou antes da
+        leitura do próximo. O resultado é montado uma vez, no final. A
+        contagem de créditos repetidos continua entre os lotes, então um
+        crédito idêntico a outro de um lote anterior não é tomado como já
+        processado.
+        
+        Args:
+            batches: Lotes de transações (ex: iter_bank_extract)
+            expected_payments: Pagamentos esperados
+            state: Estado persistido da conciliação
+            students_data: DataFrame dos alunos (id, cpfCnpj) para a identificação por documento
+            matching_mode: 'greedy' ou 'optimal' (padrão: self.matching_mode)
             
-            for _, row in df.iterrows():
-                try:
-                    # Mapear colunas (ajustar conforme formato do banco)
-                    date = pd.to_datetime(row.get('data', row.get('Data', row.get('date'))))
-                    valor_raw = str(row.get('valor', row.get('Valor', row.get('amount', 0))))
-                    amount = float(valor_raw.replace('R$', '').replace(',', '.').strip())
-                    description = str(row.get('descricao', row.get('Descricao', row.get('description', ''))))
-                    document = str(row.get('documento', row.get('Documento', row.get('document', ''))))
-                    account = str(row.get('conta', row.get('Conta', row.get('account', ''))))
-                    tx_type = 'credit' if amount > 0 else 'debit'
-                    
-                    transaction = BankTransaction(
-                        date=date,
-                        amount=abs(amount),
-                        description=description,
-                        document=document,
-                        account=account,
-                        type=tx_type
-                    )
-                    
-                    transactions.append(transaction)
-                    
-                except Exception as e:
-                    self.logger.warning(f"Erro ao processar linha do extrato: {e}")
-                    continue
+        Returns:
+            Resultado da conciliação após o último lote, com a chave
+            'incremental' somando o que foi processado em todos os lotes
+        """
+        try:
+            occurrences = {}
             
-            self.logger.info(f"Carregadas {len(transactions)} transações bancárias")
-            return transactions
+            # O estado não muda por outra sessão enquanto o histórico está em memória
+            with state.lock:
+                session = self._start_incremental_session(expected_payments, state, matching_mode)
+                for batch in batches:
+                    self._reconcile_increment(batch, expected_payments, state, session, students_data, matching_mode, occurrences)
+            
+            if not session['batches']:
+                return {}
+            return self._finish_incremental_session(session, expected_payments)
             
         except Exception as e:
-            self.logger.error(f"Erro ao carregar extrato bancário: {e}")
-            return []
+            self.logger.error(f"Erro na conciliação incremental em lotes: {e}")
+            return {}
+    
+    def _normalize_extract(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Converte as colunas de um extrato (ou de um lote dele) para as de BankTransactionTable."""
+        columns = self._resolve_extract_columns(df)
+        
+        def text_column(field: str) -> pd.Series:
+            if columns[field] is None:
+                return pd.Series('', index=df.index)
+            return df[columns[field]].fillna('').astype(str)
+        
+        raw_dates = df[columns['date']] if columns['date'] else pd.Series(pd.NaT, index=df.index)
+        raw_amounts = df[columns['amount']] if columns['amount'] else pd.Series(0.0, index=df.index)
+        
+        signed_amount = self._parse_brl_amounts(raw_amounts)
+        
+        frame = pd.DataFrame({
+            'date': self._parse_extract_dates(raw_dates),
+            'amount': signed_amount.abs(),
+            'description': text_column('description'),
+            'document': text_column('document'),
+            'account': text_column('account'),
+            'type': np.where(signed_amount > 0, 'credit', 'debit')
+        })
+        
+        valid = frame['date'].notna() & signed_amount.notna()
+        invalid_count = int((~valid).sum())
+        if invalid_count:
+            self.logger.warning(f"Ignoradas {invalid_count} linhas do extrato com data ou valor inválido")
+        
+        return frame[valid].reset_index(drop=True)
+    
+    def _resolve_extract_columns(self, df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """Resolve qual coluna do extrato corresponde a cada campo."""
+        resolved = {}
+        for field, aliases in self.extract_column_aliases.items():
+            resolved[field] = next((alias for alias in aliases if alias in df.columns), None)
+        return resolved
+    
+    def _parse_brl_amounts(self, raw: pd.Series) -> pd.Series:
+        """
+        Converte uma coluna de valores para float.
+        
+        Aceita números, "R$ 1.234,56" (formato brasileiro) e "R$ 400.00".
+        Valores inválidos viram NaN.
+        """
+        if pd.api.types.is_numeric_dtype(raw):
+            return raw.astype(float)
+        
+        text = raw.astype(str).str.replace('R$', '', regex=False).str.replace(r'\s+', '', regex=True)
+        
+        # Com vírgula decimal o ponto é separador de milhar
+        has_comma = text.str.contains(',', regex=False)
+        brl_text = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        text = text.where(~has_comma, brl_text)
+        
+        return pd.to_numeric(text, errors='coerce')
+    
+    def _parse_extract_dates(self, raw: pd.Series) -> pd.Series:
+        """
+        Converte uma coluna de datas, linha a linha pelo formato de cada uma.
+        
+        Datas com barra são lidas como dd/mm/aaaa (ou dd/mm/aa) e as demais
+        como ISO 8601 (aaaa-mm-dd, com ou sem hora), então uma coluna que
+        mistura os dois formatos não tem dia e mês trocados. Datas inválidas
+        viram NaT.
+        """
+        if pd.api.types.is_datetime64_any_dtype(raw):
+            return raw
+        
+        text = raw.astype(str).str.strip()
+        slashed = text.str.contains('/', regex=False)
+        
+        # Nas datas com barra a hora, se houver, é descartada
+        day_month = text.where(slashed).str.split(' ', n=1).str[0]
+        parse = lambda values, date_format: pd.to_datetime(values, format=date_format, errors='coerce').astype('datetime64[ns]')
+        
+        iso = parse(text.where(~slashed), 'ISO8601')
+        brazilian = parse(day_month, '%d/%m/%Y')
+        short_year = parse(day_month.where(brazilian.isna()), '%d/%m/%y')
+        
+        return iso.where(~slashed, brazilian.fillna(short_year))
     
     def _generate_sample_bank_data(self) -> pd.DataFrame:
         """Gera dados bancários de exemplo para demonstração."""
@@ -164,54 +758,44 @@ class BankReconciliation:
         
         return pd.DataFrame(transactions)
     
-    def generate_expected_payments(self, students_data: pd.DataFrame) -> List[StudentPayment]:
+    def generate_expected_payments(self, students_data: pd.DataFrame,
+                                   reference_date: Optional[datetime] = None) -> List[StudentPayment]:
         """
         Gera lista de pagamentos esperados baseado nos dados dos alunos.
         
+        O cronograma é calculado pelo PaymentScheduleBuilder a partir da data
+        de matrícula de cada aluno, portanto é o mesmo a cada execução (alunos
+        sem data de matrícula ficam sem parcelas).
+        
         Args:
             students_data: DataFrame com dados dos alunos
+            reference_date: Data de referência para o status das parcelas (padrão: hoje)
             
         Returns:
             Lista de pagamentos esperados
         """
-        expected_payments = []
-        
         try:
-            for _, student in students_data.iterrows():
-                student_id = str(student.get('id', ''))
-                student_name = student.get('fullName', student.get('name', ''))
-                payment_method = student.get('paymentMethod', 'BOLETO')
-                course_fee = float(student.get('courseFee', 400))
-                total_installments = int(student.get('totalInstallments', 10))
-                boleto_due_date = int(student.get('boletoDueDate', 10))
-                
-                # Gerar parcelas esperadas
-                enrollment_date = datetime.now() - timedelta(days=np.random.randint(1, 90))
-                
-                for i in range(total_installments):
-                    # Calcular data de vencimento
-                    due_date = enrollment_date + timedelta(days=30*i)
-                    due_date = due_date.replace(day=boleto_due_date)
-                    
-                    # Determinar status baseado na data
-                    if due_date < datetime.now() - timedelta(days=5):
-                        status = 'overdue'
-                    elif due_date < datetime.now():
-                        status = 'paid' if np.random.random() > 0.3 else 'overdue'
-                    else:
-                        status = 'pending'
-                    
-                    payment = StudentPayment(
-                        student_id=student_id,
-                        student_name=student_name,
-                        installment_number=i + 1,
-                        due_date=due_date,
-                        amount=course_fee / total_installments,
-                        payment_method=payment_method,
-                        status=status
-                    )
-                    
-                    expected_payments.append(payment)
+            reference = pd.Timestamp(reference_date or datetime.now()).normalize()
+            schedule = self.schedule_builder.build(students_data)
+            
+            # Parcelas vencidas ficam em atraso até serem identificadas no extrato
+            statuses = np.where(schedule['due_date'] < reference, 'overdue', 'pending').tolist()
+            
+            expected_payments = [
+                StudentPayment(
+                    student_id=student_id,
+                    student_name=student_name,
+                    installment_number=int(installment_number),
+                    due_date=due_date,
+                    amount=float(amount),
+                    payment_method=payment_method,
+                    status=status
+                )
+                for student_id, student_name, installment_number, due_date, amount, payment_method, status in zip(
+                    schedule['student_id'], schedule['student_name'], schedule['installment_number'],
+                    schedule['due_date'], schedule['amount'], schedule['payment_method'], statuses
+                )
+            ]
             
             self.logger.info(f"Gerados {len(expected_payments)} pagamentos esperados")
             return expected_payments
@@ -220,120 +804,1109 @@ class BankReconciliation:
             self.logger.error(f"Erro ao gerar pagamentos esperados: {e}")
             return []
     
-    def reconcile_payments(self, bank_transactions: List[BankTransaction], 
-                          expected_payments: List[StudentPayment]) -> Dict:
+    def reconcile_payments(self, bank_transactions: Sequence[BankTransaction], 
+                          expected_payments: List[StudentPayment],
+                          students_data: Optional[pd.DataFrame] = None,
+                          matching_mode: Optional[str] = None) -> Dict:
         """
         Executa conciliação entre transações bancárias e pagamentos esperados.
         
+        Primeiro, transações cuja descrição traz o CPF/CNPJ de um aluno
+        (coluna cpfCnpj de students_data) são atribuídas diretamente à parcela
+        em aberto desse aluno com vencimento mais próximo, sem cálculo de score.
+        
+        Para as demais, os pares candidatos (transação, parcela) são os que
+        estão dentro de tolerance_amount e, além disso, dentro de
+        tolerance_days ou com palavra do nome do aluno na descrição (os únicos
+        que podem passar do threshold), e são pontuados todos de uma vez por
+        _score_pairs. No modo 'greedy', cada transação, na
+        ordem do extrato, fica com a parcela em aberto de maior score; no modo
+        'optimal', os pares acima do threshold são atribuídos de forma global
+        (soma de scores máxima), independente da ordem do extrato.
+        
         Args:
             bank_transactions: Lista de transações bancárias
             expected_payments: Lista de pagamentos esperados
+            students_data: DataFrame dos alunos (id, cpfCnpj) para a identificação por documento
+            matching_mode: 'greedy' ou 'optimal' (padrão: self.matching_mode)
             
         Returns:
             Resultado da conciliação
         """
         try:
             # Filtrar apenas créditos (recebimentos)
-            credits = [tx for tx in bank_transactions if tx.type == 'credit']
+            if isinstance(bank_transactions, BankTransactionTable):
+                credits = list(bank_transactions.credits())
+            else:
+                credits = [tx for tx in bank_transactions if tx.type == 'credit']
             
+            matches = self._match_credits(credits, expected_payments, students_data, matching_mode)
+            
+            # Resultados na ordem do extrato
             matched_payments = []
             unmatched_transactions = []
-            unpaid_installments = []
-            
-            # Tentar fazer correspondência de cada transação
-            for transaction in credits:
-                best_match = None
-                best_score = 0
-                
-                for payment in expected_payments:
-                    if payment.status == 'paid':
-                        continue
-                    
-                    score = self._calculate_match_score(transaction, payment)
-                    
-                    if score > best_score and score > 0.6:  # Threshold de 60%
-                        best_score = score
-                        best_match = payment
-                
-                if best_match:
+            for position, transaction in enumerate(credits):
+                if position in matches:
+                    payment, score, match_type = matches[position]
                     matched_payments.append({
                         'transaction': transaction,
-                        'payment': best_match,
-                        'match_score': best_score
+                        'payment': payment,
+                        'match_score': score,
+                        'match_type': match_type
                     })
-                    best_match.status = 'paid'
                 else:
                     unmatched_transactions.append(transaction)
             
-            # Identificar pagamentos não quitados
-            for payment in expected_payments:
-                if payment.status in ['pending', 'overdue']:
-                    unpaid_installments.append(payment)
+            return self._build_result(matched_payments, unmatched_transactions, expected_payments)
             
-            # Calcular métricas
-            total_expected = len(expected_payments)
-            total_paid = len(matched_payments)
-            total_overdue = len([p for p in expected_payments if p.status == 'overdue'])
+        except Exception as e:
+            self.logger.error(f"Erro na conciliação: {e}")
+            return {}
+    
+    def reconcile_incremental(self, bank_transactions: Sequence[BankTransaction],
+                              expected_payments: List[StudentPayment],
+                              state: ReconciliationState,
+                              students_data: Optional[pd.DataFrame] = None,
+                              matching_mode: Optional[str] = None,
+                              occurrences: Optional[Dict[int, int]] = None) -> Dict:
+        """
+        Conciliação incremental a partir do estado persistido.
+        
+        Créditos já processados (mesmo hash de conteúdo) não são reprocessados
+        e as parcelas que eles quitaram continuam quitadas, desde que a parcela
+        não tenha mudado (vencimento, valor ou aluno). Entram em
+        reconcile_payments apenas os créditos novos, os que estavam atribuídos
+        a parcelas alteradas ou removidas e, se alguma parcela mudou ou surgiu,
+        os créditos que ainda não tinham sido identificados. Mudar tolerâncias
+        ou modo de correspondência descarta o estado.
+        
+        Args:
+            bank_transactions: Transações do extrato (pode conter só as novas)
+            expected_payments: Pagamentos esperados da execução atual
+            state: Estado persistido da conciliação
+            students_data: DataFrame dos alunos (id, cpfCnpj) para a identificação por documento
+            matching_mode: 'greedy' ou 'optimal' (padrão: self.matching_mode)
+            occurrences: Contagem de créditos repetidos compartilhada entre os
+                lotes de um mesmo extrato (ver ReconciliationState.transaction_keys)
             
-            adimplencia_rate = (total_paid / total_expected * 100) if total_expected > 0 else 0
-            inadimplencia_rate = (total_overdue / total_expected * 100) if total_expected > 0 else 0
+        Returns:
+            Resultado da conciliação (histórico + novos créditos), com a chave
+            'incremental' resumindo o que foi reprocessado
+        """
+        try:
+            # Leitura e gravação do estado sem intercalar com outra sessão
+            with state.lock:
+                session = self._start_incremental_session(expected_payments, state, matching_mode)
+                self._reconcile_increment(
+                    bank_transactions, expected_payments, state, session, students_data, matching_mode, occurrences
+                )
+            return self._finish_incremental_session(session, expected_payments)
             
-            self.logger.info(f"Conciliação concluída: {total_paid}/{total_expected} pagamentos identificados")
+        except Exception as e:
+            self.logger.error(f"Erro na conciliação incremental: {e}")
+            return {}
+    
+    def _start_incremental_session(self, expected_payments: List[StudentPayment],
+                                   state: ReconciliationState,
+                                   matching_mode: Optional[str] = None) -> Dict:
+        """
+        Lê o estado uma vez e separa o histórico que vale para as parcelas atuais.
+        
+        Marca como pagas as parcelas quitadas por créditos do histórico e
+        guarda em memória o que os lotes seguintes precisam: chaves já
+        processadas, identificações mantidas, créditos a reprocessar e a
+        situação persistida de cada parcela.
+        
+        Args:
+            expected_payments: Pagamentos esperados da execução atual
+            state: Estado persistido da conciliação
+            matching_mode: 'greedy' ou 'optimal' (padrão: self.matching_mode)
             
-            return {
-                'matched_payments': matched_payments,
-                'unmatched_transactions': unmatched_transactions,
-                'unpaid_installments': unpaid_installments,
-                'metrics': {
-                    'total_expected': total_expected,
-                    'total_paid': total_paid,
-                    'total_overdue': total_overdue,
-                    'adimplencia_rate': adimplencia_rate,
-                    'inadimplencia_rate': inadimplencia_rate,
-                    'unmatched_transactions_count': len(unmatched_transactions),
-                    'total_amount_received': sum(tx.amount for tx in credits),
-                    'total_amount_expected': sum(p.amount for p in expected_payments),
-                    'total_amount_overdue': sum(p.amount for p in unpaid_installments if p.status == 'overdue')
-                }
+        Returns:
+            Sessão consumida por _reconcile_increment e _finish_incremental_session
+        """
+        state.ensure_settings({
+            'tolerance_amount': float(self.tolerance_amount),
+            'tolerance_days': int(self.tolerance_days),
+            'matching_mode': matching_mode or self.matching_mode
+        })
+        stored = state.load_transactions()
+        stored_installments = state.load_installments()
+        
+        # Parcelas da execução atual x parcelas conhecidas
+        schedule = pd.DataFrame({
+            'student_id': [payment.student_id for payment in expected_payments],
+            'student_name': [payment.student_name for payment in expected_payments],
+            'installment_number': [payment.installment_number for payment in expected_payments],
+            'due_date': [payment.due_date for payment in expected_payments],
+            'amount': [payment.amount for payment in expected_payments],
+        })
+        schedule['fingerprint'] = ReconciliationState.installment_fingerprints(schedule)
+        installment_keys = pd.MultiIndex.from_frame(schedule[['student_id', 'installment_number']])
+        
+        previous_fingerprints = stored_installments['fingerprint'].reindex(installment_keys).to_numpy()
+        unchanged = previous_fingerprints == schedule['fingerprint'].to_numpy()
+        removed = stored_installments.index.difference(installment_keys)
+        
+        # Atribuições anteriores só valem para parcelas que não mudaram
+        matched = stored[stored['student_id'].notna()]
+        matched_keys = pd.MultiIndex.from_arrays([matched['student_id'], matched['installment_number'].astype('int64')])
+        kept = matched[matched_keys.isin(installment_keys[unchanged])]
+        released = matched.drop(kept.index)
+        unmatched = stored[stored['student_id'].isna()]
+        
+        kept_positions = installment_keys.get_indexer(
+            pd.MultiIndex.from_arrays([kept['student_id'], kept['installment_number'].astype('int64')])
+        )
+        for position in kept_positions:
+            expected_payments[position].status = 'paid'
+        
+        retry_unmatched = bool((~unchanged).any() or len(released))
+        reprocessed = pd.concat([released, unmatched] if retry_unmatched else [released])
+        untouched = unmatched.iloc[0:0] if retry_unmatched else unmatched
+        
+        kept_table = BankTransactionTable(kept[BankTransactionTable.COLUMNS[:-1]].assign(type='credit'))
+        kept_matches = [
+            {
+                'transaction': transaction,
+                'payment': expected_payments[position],
+                'match_score': float(score),
+                'match_type': match_type
+            }
+            for transaction, position, score, match_type in zip(
+                kept_table, kept_positions, kept['match_score'], kept['match_type']
+            )
+        ]
+        
+        return {
+            'known_keys': set(stored.index),
+            'schedule': schedule,
+            'positions': {id(payment): position for position, payment in enumerate(expected_payments)},
+            'unchanged': unchanged,
+            'previous_paid': stored_installments['paid'].reindex(installment_keys).to_numpy(),
+            'removed': [(str(student_id), int(installment_number)) for student_id, installment_number in removed],
+            'reprocessed': reprocessed,
+            'matches': kept_matches,
+            'unmatched': list(BankTransactionTable(untouched[BankTransactionTable.COLUMNS[:-1]].assign(type='credit'))),
+            'batches': 0,
+            'summary': {
+                'new_transactions': 0,
+                'reprocessed_transactions': len(reprocessed),
+                'kept_matches': len(kept_matches),
+                'changed_installments': int((~unchanged).sum()),
+                'removed_installments': len(removed)
+            }
+        }
+    
+    def _reconcile_increment(self, bank_transactions: Sequence[BankTransaction],
+                             expected_payments: List[StudentPayment],
+                             state: ReconciliationState,
+                             session: Dict,
+                             students_data: Optional[pd.DataFrame] = None,
+                             matching_mode: Optional[str] = None,
+                             occurrences: Optional[Dict[int, int]] = None):
+        """
+        Concilia os créditos novos de um lote e grava só o que mudou.
+        
+        O primeiro lote da sessão leva junto os créditos do histórico a
+        reprocessar e grava a situação de todas as parcelas alteradas; os
+        seguintes gravam apenas os créditos do lote e as parcelas que eles
+        quitaram.
+        
+        Args:
+            bank_transactions: Transações do lote
+            expected_payments: Pagamentos esperados (os mesmos da sessão)
+            state: Estado persistido da conciliação
+            session: Sessão de _start_incremental_session (atualizada no lugar)
+            students_data: DataFrame dos alunos (id, cpfCnpj) para a identificação por documento
+            matching_mode: 'greedy' ou 'optimal' (padrão: self.matching_mode)
+            occurrences: Contagem de créditos repetidos compartilhada entre os lotes
+        """
+        if isinstance(bank_transactions, BankTransactionTable):
+            credits = bank_transactions.credits().frame
+        else:
+            credits = pd.DataFrame(
+                [vars(tx) for tx in bank_transactions if tx.type == 'credit'],
+                columns=BankTransactionTable.COLUMNS
+            )
+        credits = credits.reset_index(drop=True).assign(key=lambda df: ReconciliationState.transaction_keys(df, occurrences))
+        
+        known_keys = session['known_keys']
+        is_new = np.fromiter((key not in known_keys for key in credits['key']), dtype=bool, count=len(credits))
+        new_credits = credits[is_new]
+        first_batch = session['batches'] == 0
+        
+        parts = [new_credits.set_index('key')[BankTransactionTable.COLUMNS[:-1]]]
+        if first_batch:
+            parts.append(session['reprocessed'][BankTransactionTable.COLUMNS[:-1]])
+        pending = pd.concat(parts).assign(type='credit')
+        
+        pending_credits = list(BankTransactionTable(pending.reset_index(drop=True)))
+        matches = (
+            self._match_credits(pending_credits, expected_payments, students_data, matching_mode)
+            if pending_credits else {}
+        )
+        
+        # Atribuições deste lote, na ordem de pending
+        matched_positions = sorted(matches)
+        processed = pending.reset_index(drop=True).assign(
+            key=pending.index.to_numpy(), student_id=None, installment_number=None, match_score=None, match_type=None
+        )
+        processed.loc[matched_positions, 'student_id'] = [matches[position][0].student_id for position in matched_positions]
+        processed.loc[matched_positions, 'installment_number'] = [matches[position][0].installment_number for position in matched_positions]
+        processed.loc[matched_positions, 'match_score'] = [matches[position][1] for position in matched_positions]
+        processed.loc[matched_positions, 'match_type'] = [matches[position][2] for position in matched_positions]
+        
+        # Parcelas a gravar: no primeiro lote as alteradas ou com quitação
+        # diferente da gravada; depois, só as quitadas neste lote
+        schedule = session['schedule']
+        if first_batch:
+            paid_now = np.array([payment.status == 'paid' for payment in expected_payments], dtype=bool)
+            changed = np.flatnonzero(~session['unchanged'] | (session['previous_paid'] != paid_now))
+        else:
+            changed = np.array(sorted(session['positions'][id(matches[position][0])] for position in matched_positions), dtype=np.int64)
+        
+        state.save(
+            processed,
+            schedule.iloc[changed][['student_id', 'installment_number', 'fingerprint']].assign(paid=[
+                int(expected_payments[position].status == 'paid') for position in changed
+            ]),
+            session['removed'] if first_batch else None
+        )
+        
+        known_keys.update(processed['key'])
+        session['matches'].extend(
+            {
+                'transaction': pending_credits[position],
+                'payment': matches[position][0],
+                'match_score': matches[position][1],
+                'match_type': matches[position][2]
+            }
+            for position in matched_positions
+        )
+        session['unmatched'].extend(transaction for position, transaction in enumerate(pending_credits) if position not in matches)
+        session['summary']['new_transactions'] += len(new_credits)
+        session['batches'] += 1
+    
+    def _finish_incremental_session(self, session: Dict, expected_payments: List[StudentPayment]) -> Dict:
+        """Monta o resultado (histórico + créditos processados na sessão) uma única vez."""
+        combined = self._build_result(session['matches'], session['unmatched'], expected_payments)
+        combined['incremental'] = dict(session['summary'])
+        
+        self.logger.info(
+            f"Conciliação incremental: {combined['incremental']['new_transactions']} créditos novos, "
+            f"{combined['incremental']['reprocessed_transactions']} reprocessados"
+        )
+        return combined
+    
+    def reconcile_partitioned(self, bank_transactions: Sequence[BankTransaction],
+                              expected_payments: List[StudentPayment],
+                              students_data: Optional[pd.DataFrame] = None,
+                              matching_mode: Optional[str] = None) -> Dict:
+        """
+        Conciliação particionada por conta e mês, executada em um pool de processos.
+        
+        A identificação por CPF/CNPJ roda antes, sobre o extrato inteiro. Os
+        créditos restantes são divididos por (conta, mês da data). Cada partição
+        recebe as parcelas com vencimento no mês (ampliado pela tolerância de
+        data) e as dos alunos citados nas suas descrições, e é conciliada de
+        forma independente (max_workers processos; com menos de
+        parallel_min_credits créditos, no processo atual). As partições são combinadas sempre na mesma
+        ordem: se duas partições atribuírem a mesma parcela, fica o maior score
+        (empate: partição e posição no extrato menores) e os créditos
+        preteridos são conciliados de novo contra as parcelas que sobraram.
+        
+        Args:
+            bank_transactions: Lista de transações bancárias
+            expected_payments: Lista de pagamentos esperados
+            students_data: DataFrame dos alunos (id, cpfCnpj) para a identificação por documento
+            matching_mode: 'greedy' ou 'optimal' (padrão: self.matching_mode)
+            
+        Returns:
+            Resultado da conciliação, no mesmo formato de reconcile_payments
+        """
+        try:
+            if isinstance(bank_transactions, BankTransactionTable):
+                credits = list(bank_transactions.credits())
+            else:
+                credits = [tx for tx in bank_transactions if tx.type == 'credit']
+            
+            # 1ª etapa (global): identificação direta pelo CPF/CNPJ na descrição
+            matches = self._match_by_document(credits, expected_payments, students_data)
+            remaining = [position for position in range(len(credits)) if position not in matches]
+            
+            # 2ª etapa: score por partição, com posições relativas a remaining
+            fuzzy_credits = [credits[position] for position in remaining]
+            shards = self._build_partitions(fuzzy_credits, expected_payments)
+            settings = {
+                'tolerance_amount': self.tolerance_amount,
+                'tolerance_days': self.tolerance_days,
+                'matching_mode': matching_mode or self.matching_mode
             }
             
+            shard_results = [None] * len(shards)
+            workers = min(self.max_workers or os.cpu_count() or 1, len(shards))
+            if workers > 1 and len(fuzzy_credits) >= self.parallel_min_credits:
+                try:
+                    # Maiores primeiro, para equilibrar a carga entre os processos
+                    order = sorted(range(len(shards)), key=lambda position: -len(shards[position][0]))
+                    arguments = [
+                        (settings,
+                         [fuzzy_credits[i] for i in shards[position][0]],
+                         [expected_payments[i] for i in shards[position][1]])
+                        for position in order
+                    ]
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        solved = executor.map(_reconcile_shard, *zip(*arguments))
+                        for position, result in zip(order, solved):
+                            shard_results[position] = result
+                except Exception as e:
+                    self.logger.warning(f"Erro ao conciliar partições em paralelo, conciliando em sequência: {e}")
+            
+            for position, (credit_positions, payment_positions) in enumerate(shards):
+                if shard_results[position] is None:
+                    shard_results[position] = _reconcile_shard(
+                        settings,
+                        [fuzzy_credits[i] for i in credit_positions],
+                        [copy(expected_payments[i]) for i in payment_positions]
+                    )
+            
+            # Combinação determinística: maior score primeiro, depois partição e posição
+            claims = sorted(
+                (-score, shard, shards[shard][0][credit], shards[shard][1][payment], match_type)
+                for shard, result in enumerate(shard_results)
+                for credit, payment, score, match_type in result
+            )
+            fuzzy_matches = {}
+            for negative_score, _, credit_position, payment_position, match_type in claims:
+                payment = expected_payments[payment_position]
+                if payment.status != 'paid':
+                    payment.status = 'paid'
+                    fuzzy_matches[credit_position] = (payment, -negative_score, match_type)
+            
+            # Créditos que perderam a parcela para outra partição
+            claimed = {claim[2] for claim in claims}
+            retry = [position for position in sorted(claimed) if position not in fuzzy_matches]
+            if retry:
+                retried = self._match_credits([fuzzy_credits[i] for i in retry], expected_payments, None, matching_mode)
+                for local_position, match in retried.items():
+                    fuzzy_matches[retry[local_position]] = match
+            
+            for fuzzy_position, match in fuzzy_matches.items():
+                matches[remaining[fuzzy_position]] = match
+            
+            self.logger.info(f"Conciliação particionada: {len(shards)} partições, {len(retry)} créditos reprocessados")
+            
+            matched_payments = []
+            unmatched_transactions = []
+            for position, transaction in enumerate(credits):
+                if position in matches:
+                    payment, score, match_type = matches[position]
+                    matched_payments.append({
+                        'transaction': transaction,
+                        'payment': payment,
+                        'match_score': score,
+                        'match_type': match_type
+                    })
+                else:
+                    unmatched_transactions.append(transaction)
+            
+            return self._build_result(matched_payments, unmatched_transactions, expected_payments)
+            
         except Exception as e:
-            self.logger.error(f"Erro na conciliação: {e}")
+            self.logger.error(f"Erro na conciliação particionada: {e}")
             return {}
     
-    def _calculate_match_score(self, transaction: BankTransaction, payment: StudentPayment) -> float:
+    def _build_partitions(self, credits: List[BankTransaction],
+                          expected_payments: List[StudentPayment]) -> List[Tuple[List[int], List[int]]]:
         """
-        Calcula score de correspondência entre transação e pagamento.
+        Divide créditos por (conta, mês) e seleciona as parcelas de cada partição.
+        
+        Cada partição recebe as parcelas com vencimento no mês, ampliado pela
+        tolerância de data, e as parcelas dos alunos com mais de 2/3 do nome
+        em alguma descrição da partição (esses pares não têm limite de data).
+        Assim cada crédito vê na sua partição as mesmas parcelas candidatas
+        que veria na conciliação completa.
         
         Returns:
-            Score de 0 a 1
+            Lista ordenada por (conta, mês) de tuplas (posições dos créditos,
+            posições das parcelas em aberto)
         """
-        score = 0.0
+        if not credits:
+            return []
         
-        # Score por valor (40% do peso)
-        amount_diff = abs(transaction.amount - payment.amount)
-        if amount_diff <= self.tolerance_amount:
-            score += 0.4 * (1 - amount_diff / self.tolerance_amount)
+        _, days_width = self._get_bucket_widths()
+        overlap = pd.Timedelta(days=days_width)
         
-        # Score por data (30% do peso)
-        date_diff = abs((transaction.date - payment.due_date).days)
-        if date_diff <= self.tolerance_days:
-            score += 0.3 * (1 - date_diff / self.tolerance_days)
+        frame = pd.DataFrame({
+            'account': [str(tx.account or '') for tx in credits],
+            'month': pd.to_datetime(pd.Series([tx.date for tx in credits], dtype=object)).dt.to_period('M')
+        })
         
-        # Score por nome/descrição (30% do peso)
-        name_words = payment.student_name.upper().split()
-        description_upper = transaction.description.upper()
+        due_dates = pd.to_datetime(pd.Series([payment.due_date for payment in expected_payments], dtype=object)).to_numpy(dtype='datetime64[ns]')
+        due_order = np.argsort(due_dates, kind='stable')
+        sorted_due = due_dates[due_order]
         
-        name_matches = sum(1 for word in name_words if word in description_upper)
-        if name_matches > 0:
-            score += 0.3 * (name_matches / len(name_words))
+        # Alunos com a maior parte do nome em cada descrição -> parcelas desses alunos
+        payment_arrays = self._build_payment_arrays(expected_payments)
+        name_credits, name_students = payment_arrays['name_index'].strong_candidates([str(tx.description) for tx in credits])
+        student_order = np.argsort(payment_arrays['student_code'], kind='stable')
+        student_bounds = np.searchsorted(
+            payment_arrays['student_code'][student_order], np.arange(payment_arrays['name_index'].student_count + 1)
+        )
+        partition_of_credit = frame.groupby(['account', 'month'], sort=True).ngroup().to_numpy()
+        
+        partitions = []
+        for partition, ((_, month), group) in enumerate(frame.groupby(['account', 'month'], sort=True)):
+            start = np.datetime64(month.start_time - overlap, 'ns')
+            end = np.datetime64(month.end_time + overlap, 'ns')
+            window = due_order[np.searchsorted(sorted_due, start, side='left'):np.searchsorted(sorted_due, end, side='right')]
+            
+            students = np.unique(name_students[partition_of_credit[name_credits] == partition])
+            _, positions = _expand_ranges(student_bounds[students], student_bounds[students + 1] - student_bounds[students])
+            candidates = np.union1d(window, student_order[positions])
+            
+            payment_positions = [i for i in candidates.tolist() if expected_payments[i].status != 'paid']
+            partitions.append((group.index.tolist(), payment_positions))
         
-        return min(score, 1.0)
+        return partitions
+    
+    def _match_credits(self, credits: List[BankTransaction], expected_payments: List[StudentPayment],
+                       students_data: Optional[pd.DataFrame] = None,
+                       matching_mode: Optional[str] = None) -> Dict[int, Tuple[StudentPayment, float, str]]:
+        """
+        Identifica a parcela de cada crédito (documento e depois score).
+        
+        As parcelas atribuídas são marcadas como 'paid'.
+        
+        Returns:
+            Dicionário posição_do_crédito -> (parcela, score, tipo)
+        """
+        # 1ª etapa: identificação direta pelo CPF/CNPJ na descrição
+        matches = self._match_by_document(credits, expected_payments, students_data)
+        remaining = [position for position in range(len(credits)) if position not in matches]
+        
+        # 2ª etapa: score para as transações restantes
+        fuzzy_credits = [credits[position] for position in remaining]
+        transaction_arrays = self._build_transaction_arrays(fuzzy_credits)
+        payment_arrays = self._build_payment_arrays(expected_payments)
+        
+        # Gerar e pontuar todos os pares candidatos de uma vez
+        (tx_idx, pay_idx), window = self._build_candidate_pairs(transaction_arrays, payment_arrays)
+        paid = payment_arrays['paid']
+        
+        if (matching_mode or self.matching_mode) == 'optimal':
+            group_tx, group_pay = self._expand_window_groups(window, paid)
+            width = len(expected_payments)
+            keys = _unique_keys(np.concatenate([tx_idx * width + pay_idx, group_tx * width + group_pay]))
+            tx_idx, pay_idx = keys // width, keys % width
+            scores = self._score_pairs(transaction_arrays, payment_arrays, tx_idx, pay_idx)
+            
+            for fuzzy_position, payment_position, score in self._assign_optimal(transaction_arrays, tx_idx, pay_idx, scores, paid):
+                best_match = expected_payments[payment_position]
+                matches[remaining[fuzzy_position]] = (best_match, score, 'score')
+                best_match.status = 'paid'
+                paid[payment_position] = True
+        else:
+            scores = self._score_pairs(transaction_arrays, payment_arrays, tx_idx, pay_idx)
+            
+            # Pares ordenados por transação: fronteiras de cada transação no vetor de pares
+            bounds = np.searchsorted(tx_idx, np.arange(len(fuzzy_credits) + 1))
+            group_bounds = np.searchsorted(window['tx'], np.arange(len(fuzzy_credits) + 1))
+            members, member_bounds = window['members'], window['bounds']
+            next_member = member_bounds[:-1].copy()
+            
+            for fuzzy_position, position in enumerate(remaining):
+                start, end = bounds[fuzzy_position], bounds[fuzzy_position + 1]
+                candidates = pay_idx[start:end]
+                candidate_scores = np.where(paid[candidates], -1.0, scores[start:end])
+                
+                best_score, best_payment = -1.0, -1
+                if len(candidates):
+                    best = int(np.argmax(candidate_scores))
+                    best_score, best_payment = float(candidate_scores[best]), int(candidates[best])
+                
+                # Grupos de mesmo valor e vencimento: vale a parcela em aberto de
+                # menor posição (a que o laço par a par escolheria no empate)
+                group_start, group_end = group_bounds[fuzzy_position], group_bounds[fuzzy_position + 1]
+                for group, group_score in zip(window['group'][group_start:group_end], window['score'][group_start:group_end]):
+                    member = next_member[group]
+                    while member < member_bounds[group + 1] and paid[members[member]]:
+                        member += 1
+                    next_member[group] = member
+                    if member == member_bounds[group + 1]:
+                        continue
+                    
+                    payment_position = int(members[member])
+                    if group_score > best_score or (group_score == best_score and payment_position < best_payment):
+                        best_score, best_payment = float(group_score), payment_position
+                
+                if best_score > 0.6:  # Threshold de 60%
+                    best_match = expected_payments[best_payment]
+                    matches[position] = (best_match, best_score, 'score')
+                    best_match.status = 'paid'
+                    paid[best_payment] = True
+        
+        return matches
+    
+    RESULT_COLUMNS = [
+        'status', 'student_id', 'student_name', 'installment_number', 'due_date', 'expected_amount',
+        'transaction_date', 'received_amount', 'match_score', 'match_type', 'description'
+    ]
+    
+    def _build_result(self, matched_payments: List[Dict], unmatched_transactions: List[BankTransaction],
+                      expected_payments: List[StudentPayment]) -> Dict:
+        """
+        Monta o resultado da conciliação e calcula as métricas.
+        
+        O resultado traz uma tabela colunar ('table', ver build_result_table)
+        da qual as métricas, o relatório e as prévias da página são derivados.
+        """
+        table = self.build_result_table(matched_payments, unmatched_transactions, expected_payments)
+        
+        # Identificar pagamentos não quitados
+        unpaid_installments = [payment for payment in expected_payments if payment.status in ['pending', 'overdue']]
+        
+        # Calcular métricas
+        status = table['status']
+        installments = table['student_id'].notna()
+        overdue = status == 'overdue'
+        
+        total_expected = int(installments.sum())
+        total_paid = int((status == 'matched').sum())
+        total_overdue = int(overdue.sum())
+        
+        adimplencia_rate = (total_paid / total_expected * 100) if total_expected > 0 else 0
+        inadimplencia_rate = (total_overdue / total_expected * 100) if total_expected > 0 else 0
+        
+        self.logger.info(f"Conciliação concluída: {total_paid}/{total_expected} pagamentos identificados")
+        
+        return {
+            'matched_payments': matched_payments,
+            'unmatched_transactions': unmatched_transactions,
+            'unpaid_installments': unpaid_installments,
+            'table': table,
+            'metrics': {
+                'total_expected': total_expected,
+                'total_paid': total_paid,
+                'total_overdue': total_overdue,
+                'adimplencia_rate': adimplencia_rate,
+                'inadimplencia_rate': inadimplencia_rate,
+                'unmatched_transactions_count': int((status == 'unmatched').sum()),
+                'total_amount_received': float(table['received_amount'].sum()),
+                'total_amount_expected': float(table.loc[installments, 'expected_amount'].sum()),
+                'total_amount_overdue': float(table.loc[overdue, 'expected_amount'].sum())
+            }
+        }
+    
+    def build_result_table(self, matched_payments: List[Dict], unmatched_transactions: List[BankTransaction],
+                           expected_payments: List[StudentPayment]) -> pd.DataFrame:
+        """
+        Tabela colunar do resultado, com uma linha por parcela e por crédito não identificado.
+        
+        status é 'matched' (parcela + crédito), 'overdue', 'pending' ou 'paid'
+        (parcela sem crédito nesta execução) ou 'unmatched' (crédito sem parcela).
+        
+        Args:
+            matched_payments: Correspondências (transaction, payment, match_score, match_type)
+            unmatched_transactions: Créditos não identificados
+            expected_payments: Todas as parcelas esperadas
+            
+        Returns:
+            DataFrame com as colunas RESULT_COLUMNS, valores sem formatação
+        """
+        matched_ids = {id(match['payment']) for match in matched_payments}
+        
+        records = [
+            ('matched', match['payment'].student_id, match['payment'].student_name,
+             match['payment'].installment_number, match['payment'].due_date, match['payment'].amount,
+             match['transaction'].date, match['transaction'].amount, match['match_score'],
+             match.get('match_type', 'score'), match['transaction'].description)
+            for match in matched_payments
+        ]
+        records.extend(
+            (payment.status, payment.student_id, payment.student_name, payment.installment_number,
+             payment.due_date, payment.amount, None, 0.0, np.nan, None, None)
+            for payment in expected_payments if id(payment) not in matched_ids
+        )
+        records.extend(
+            ('unmatched', None, None, None, None, 0.0, transaction.date, transaction.amount,
+             np.nan, None, transaction.description)
+            for transaction in unmatched_transactions
+        )
+        
+        table = pd.DataFrame.from_records(records, columns=self.RESULT_COLUMNS)
+        table['due_date'] = pd.to_datetime(table['due_date'])
+        table['transaction_date'] = pd.to_datetime(table['transaction_date'])
+        table['installment_number'] = table['installment_number'].astype('Int64')
+        table['expected_amount'] = table['expected_amount'].astype(float)
+        table['received_amount'] = table['received_amount'].astype(float)
+        table['match_score'] = table['match_score'].astype(float)
+        return table
+    
+    def _assign_optimal(self, transactions: Dict[str, np.ndarray], tx_idx: np.ndarray, pay_idx: np.ndarray,
+                        scores: np.ndarray, paid: np.ndarray) -> List[Tuple[int, int, float]]:
+        """
+        Atribuição global de peso máximo sobre o grafo esparso de candidatos.
+        
+        Só entram arestas acima do threshold com parcela em aberto. O grafo é
+        dividido em componentes conexos, resolvidos de forma independente
+        (em paralelo quando há mais de um componente grande). As transações
+        são numeradas pelo conteúdo (data, valor, descrição), então empates
+        são desfeitos da mesma forma qualquer que seja a ordem do extrato.
+        
+        Returns:
+            Lista (transação, parcela, score) ordenada por transação
+        """
+        valid = (scores > 0.6) & ~paid[pay_idx]
+        tx_idx, pay_idx, scores = tx_idx[valid], pay_idx[valid], scores[valid]
+        if len(tx_idx) == 0:
+            return []
+        
+        description_codes = pd.factorize(pd.Series(transactions['description'], dtype=object), sort=True)[0]
+        canonical = np.lexsort((description_codes, transactions['amount'], transactions['date']))
+        rank = np.empty_like(canonical)
+        rank[canonical] = np.arange(len(canonical))
+        tx_idx = rank[tx_idx]
+        
+        labels = self._connected_components(tx_idx, pay_idx)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        components = [
+            (tx_idx[edges], pay_idx[edges], scores[edges])
+            for edges in np.split(order, bounds)
+        ]
+        
+        results = self._solve_components(components)
+        
+        matched_tx = np.concatenate([rows for rows, _ in results])
+        matched_pay = np.concatenate([cols for _, cols in results])
+        score_by_pair = pd.Series(scores, index=pd.MultiIndex.from_arrays([tx_idx, pay_idx]))
+        matched_scores = score_by_pair.reindex(pd.MultiIndex.from_arrays([matched_tx, matched_pay])).to_numpy()
+        
+        matched_tx = canonical[matched_tx]
+        sequence = np.argsort(matched_tx, kind='stable')
+        return [
+            (int(matched_tx[i]), int(matched_pay[i]), float(matched_scores[i]))
+            for i in sequence
+        ]
+    
+    @staticmethod
+    def _connected_components(tx_idx: np.ndarray, pay_idx: np.ndarray) -> np.ndarray:
+        """
+        Componente conexo de cada aresta (propagação do menor rótulo com pointer jumping).
+        
+        Returns:
+            Rótulo do componente de cada aresta
+        """
+        tx_nodes, tx_local = np.unique(tx_idx, return_inverse=True)
+        pay_local = np.unique(pay_idx, return_inverse=True)[1] + len(tx_nodes)
+        
+        labels = np.arange(pay_local.max() + 1)
+        while True:
+            updated = labels.copy()
+            np.minimum.at(updated, tx_local, labels[pay_local])
+            np.minimum.at(updated, pay_local, labels[tx_local])
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                return labels[tx_local]
+            labels = updated
+    
+    def _solve_components(self, components: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Resolve cada componente; componentes grandes vão para um pool de processos.
+        
+        Componentes de uma aresta são resolvidos direto. O pool só é criado
+        quando há ao menos dois componentes com parallel_min_edges arestas ou
+        mais (abaixo disso o custo de iniciar os processos supera o ganho); os
+        demais componentes são resolvidos no processo atual, assim como os
+        restantes em caso de falha do pool.
+        """
+        results = [None] * len(components)
+        large = []
+        for position, (rows, cols, weights) in enumerate(components):
+            if len(rows) == 1:
+                results[position] = (rows, cols)
+            else:
+                large.append(position)
+        
+        pooled = [position for position in large if len(components[position][0]) >= self.parallel_min_edges]
+        workers = min(self.max_workers or os.cpu_count() or 1, len(pooled))
+        if workers > 1:
+            try:
+                # Maiores primeiro, para equilibrar a carga entre os processos
+                pooled.sort(key=lambda position: -len(components[position][0]))
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    solved = executor.map(_solve_component, *zip(*(components[position] for position in pooled)))
+                    for position, result in zip(pooled, solved):
+                        results[position] = result
+            except Exception as e:
+                self.logger.warning(f"Erro ao resolver componentes em paralelo, resolvendo em sequência: {e}")
+        
+        for position in large:
+            if results[position] is None:
+                results[position] = _solve_component(*components[position])
+        
+        return results
+    
+    def _match_by_document(self, credits: List[BankTransaction], expected_payments: List[StudentPayment],
+                           students_data: Optional[pd.DataFrame]) -> Dict[int, Tuple[StudentPayment, float, str]]:
+        """
+        Atribui transações ao aluno cujo CPF/CNPJ aparece na descrição.
+        
+        Os documentos das descrições são extraídos de uma vez e cruzados com
+        um dicionário documento -> aluno (documentos repetidos entre alunos são
+        ignorados). Cada transação fica com a parcela em aberto do aluno de
+        vencimento mais próximo da data do crédito.
+        
+        Returns:
+            Dicionário posição_da_transação -> (parcela, score, tipo)
+        """
+        if students_data is None or students_data.empty or 'cpfCnpj' not in students_data.columns or not credits:
+            return {}
+        
+        student_documents = students_data['cpfCnpj'].fillna('').astype(str).str.replace(r'\D', '', regex=True)
+        valid = student_documents.str.len().isin([11, 14]) & ~student_documents.duplicated(keep=False)
+        student_by_document = pd.Series(
+            students_data.loc[valid, 'id'].astype(str).to_numpy(),
+            index=student_documents[valid].to_numpy()
+        )
+        
+        documents = self.pattern_engine.extract([tx.description for tx in credits])['document']
+        credit_students = documents.map(student_by_document)
+        
+        positions_by_student = defaultdict(list)
+        for position, payment in enumerate(expected_payments):
+            positions_by_student[payment.student_id].append(position)
+        
+        matches = {}
+        for position, student_id in credit_students.dropna().items():
+            transaction = credits[position]
+            open_installments = [
+                expected_payments[index] for index in positions_by_student.get(student_id, ())
+                if expected_payments[index].status != 'paid'
+            ]
+            if not open_installments:
+                continue
+            
+            payment = min(open_installments, key=lambda item: abs((transaction.date - item.due_date).days))
+            payment.status = 'paid'
+            matches[position] = (payment, 1.0, 'documento')
+        
+        return matches
+    
+    def _build_transaction_arrays(self, transactions: List[BankTransaction]) -> Dict[str, np.ndarray]:
+        """Converte as transações em vetores (valor, data e descrição em maiúsculas)."""
+        return {
+            'amount': np.array([tx.amount for tx in transactions], dtype=float),
+            'date': pd.to_datetime(pd.Series([tx.date for tx in transactions], dtype=object)).to_numpy(dtype='datetime64[ns]'),
+            'description': [str(tx.description) for tx in transactions]
+        }
+    
+    def _build_payment_arrays(self, expected_payments: List[StudentPayment]) -> Dict[str, np.ndarray]:
+        """
+        Converte as parcelas em vetores e indexa as palavras dos nomes dos alunos.
+        
+        Cada aluno recebe um código (student_code) que aponta para o
+        NameTokenIndex da conciliação.
+        """
+        student_ids = pd.Series([payment.student_id for payment in expected_payments], dtype=object)
+        student_codes, unique_ids = pd.factorize(student_ids)
+        
+        # Nome do aluno = nome da primeira parcela dele
+        first_positions = pd.Series(np.arange(len(student_codes))).groupby(student_codes).first().to_numpy()
+        names = [expected_payments[position].student_name for position in first_positions]
+        
+        return {
+            'amount': np.array([payment.amount for payment in expected_payments], dtype=float),
+            'due_date': pd.to_datetime(pd.Series([payment.due_date for payment in expected_payments], dtype=object)).to_numpy(dtype='datetime64[ns]'),
+            'paid': np.array([payment.status == 'paid' for payment in expected_payments], dtype=bool),
+            'student_code': student_codes,
+            'name_index': NameTokenIndex(list(unique_ids), names)
+        }
+    
+    def _get_bucket_widths(self) -> Tuple[int, int]:
+        """
+        Retorna a largura das faixas de valor (centavos) e de data (dias) do índice.
+        
+        Cada largura é a tolerância mais uma unidade de arredondamento (valor
+        em centavos, diferença de datas truncada em dias), de modo que todo
+        par dentro das tolerâncias está no mesmo bucket ou em um vizinho,
+        qualquer que seja a posição do vencimento dentro do bucket.
+        """
+        amount_width = int(np.ceil(max(float(self.tolerance_amount), 0.0) * 100)) + 1
+        days_width = max(int(self.tolerance_days), 0) + 1
+        return amount_width, days_width
+    
+    def _bucket_keys(self, amounts: np.ndarray, dates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Faixa de valor (centavos // largura) e janela de data (ordinal do dia // largura) de cada linha."""
+        amount_width, days_width = self._get_bucket_widths()
+        cents = np.rint(amounts * 100).astype(np.int64)
+        ordinals = dates.astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+        return cents // amount_width, ordinals // days_width
+    
+    def _pair_differences(self, transactions: Dict[str, np.ndarray], payments: Dict[str, np.ndarray],
+                          tx_idx: np.ndarray, pay_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Diferença absoluta de valor (R$) e de data (dias inteiros, como timedelta.days) de cada par."""
+        amount_diff = np.abs(transactions['amount'][tx_idx] - payments['amount'][pay_idx])
+        date_diff = np.abs((transactions['date'][tx_idx] - payments['due_date'][pay_idx]) // np.timedelta64(1, 'D'))
+        return amount_diff, date_diff
+    
+    def _build_window_pairs(self, transactions: Dict[str, np.ndarray], payments: Dict[str, np.ndarray],
+                            open_positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares (transação, parcela em aberto) dentro das duas tolerâncias.
+        
+        Os buckets vizinhos só reduzem a busca; a tolerância de valor e a de
+        data são conferidas explicitamente em cada par.
+        """
+        pay_amount, pay_date = self._bucket_keys(payments['amount'][open_positions], payments['due_date'][open_positions])
+        tx_amount, tx_date = self._bucket_keys(transactions['amount'], transactions['date'])
+        
+        # Chave única por bucket; parcelas ordenadas por chave para busca binária
+        pay_keys = (pay_amount << 32) + pay_date
+        order = np.argsort(pay_keys, kind='stable')
+        sorted_keys = pay_keys[order]
+        
+        tx_parts, pay_parts = [], []
+        for amount_offset in (-1, 0, 1):
+            for date_offset in (-1, 0, 1):
+                keys = ((tx_amount + amount_offset) << 32) + tx_date + date_offset
+                left = np.searchsorted(sorted_keys, keys, side='left')
+                counts = np.searchsorted(sorted_keys, keys, side='right') - left
+                
+                owners, positions = _expand_ranges(left, counts)
+                tx_parts.append(owners)
+                pay_parts.append(open_positions[order[positions]])
+        
+        tx_idx = np.concatenate(tx_parts)
+        pay_idx = np.concatenate(pay_parts)
+        amount_diff, date_diff = self._pair_differences(transactions, payments, tx_idx, pay_idx)
+        inside = (amount_diff <= self.tolerance_amount) & (date_diff <= self.tolerance_days)
+        return tx_idx[inside], pay_idx[inside]
+    
+    def _build_window_groups(self, transactions: Dict[str, np.ndarray], payments: Dict[str, np.ndarray],
+                             open_positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Agrupa as parcelas em aberto por (valor, vencimento) e cruza os grupos com a janela de cada transação.
+        
+        Sem palavra do nome em comum o score de um par só depende do valor e do
+        vencimento da parcela, então as parcelas de um grupo são equivalentes
+        para a transação e basta considerar uma por grupo, em vez do produto
+        de todas as parcelas da janela.
+        
+        Returns:
+            Dicionário com members (parcelas em aberto ordenadas por grupo e
+            posição), bounds (fatia de members de cada grupo) e os pares
+            tx/group dentro das duas tolerâncias com score (valor + data)
+            acima de 0.3, o mínimo para passar do threshold com o nome
+        """
+        keys = pd.DataFrame({'amount': payments['amount'][open_positions], 'due_date': payments['due_date'][open_positions]})
+        codes = keys.groupby(['amount', 'due_date'], sort=False).ngroup().to_numpy()
+        order = np.argsort(codes, kind='stable')
+        members = open_positions[order]
+        bounds = np.searchsorted(codes[order], np.arange(codes.max() + 2))
+        
+        first = members[bounds[:-1]]
+        groups = {'amount': payments['amount'][first], 'due_date': payments['due_date'][first]}
+        tx_idx, group_idx = self._build_window_pairs(transactions, groups, np.arange(len(first)))
+        scores = self._window_scores(*self._pair_differences(transactions, groups, tx_idx, group_idx))
+        
+        kept = scores > 0.3
+        pair_order = np.lexsort((group_idx[kept], tx_idx[kept]))
+        return {
+            'members': members,
+            'bounds': bounds,
+            'tx': tx_idx[kept][pair_order],
+            'group': group_idx[kept][pair_order],
+            'score': scores[kept][pair_order]
+        }
+    
+    def _build_window_name_pairs(self, transactions: Dict[str, np.ndarray], payments: Dict[str, np.ndarray],
+                                 window: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares dentro das tolerâncias em que o aluno tem palavra do nome na descrição.
+        
+        Os postings (grupo, palavra) -> parcela são cruzados só com os grupos
+        da janela de cada transação e com as palavras da sua descrição.
+        """
+        name_index = payments['name_index']
+        token_desc, token_codes = name_index.lookup(transactions['description'])
+        vocabulary_size = max(len(name_index.vocabulary), 1)
+        
+        # Uma entrada por (parcela em aberto, palavra do nome do aluno)
+        member_groups = np.repeat(np.arange(len(window['bounds']) - 1), np.diff(window['bounds']))
+        member_students = payments['student_code'][window['members']]
+        starts = name_index.student_bounds[member_students]
+        owners, positions = _expand_ranges(starts, name_index.student_bounds[member_students + 1] - starts)
+        posting_keys = member_groups[owners] * vocabulary_size + name_index.student_tokens[positions]
+        posting_order = np.argsort(posting_keys, kind='stable')
+        posting_keys = posting_keys[posting_order]
+        posting_payments = window['members'][owners[posting_order]]
+        
+        # Palavras da descrição de cada par (transação, grupo)
+        desc_bounds = np.searchsorted(token_desc, np.arange(len(transactions['amount']) + 1))
+        pair_rows, word_positions = _expand_ranges(
+            desc_bounds[window['tx']], desc_bounds[window['tx'] + 1] - desc_bounds[window['tx']]
+        )
+        queries = window['group'][pair_rows] * vocabulary_size + token_codes[word_positions]
+        left = np.searchsorted(posting_keys, queries, side='left')
+        owners, positions = _expand_ranges(left, np.searchsorted(posting_keys, queries, side='right') - left)
+        
+        return window['tx'][pair_rows[owners]], posting_payments[positions]
+    
+    def _build_name_pairs(self, transactions: Dict[str, np.ndarray], payments: Dict[str, np.ndarray],
+                          open_positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares com mais de 2/3 do nome do aluno na descrição, sem limite de data.
+        
+        Fora da tolerância de data o score é valor + nome, que só passa do
+        threshold com mais de 2/3 das palavras do nome
+        (NameTokenIndex.strong_candidates); entram as parcelas em aberto
+        desses alunos dentro da tolerância de valor.
+        """
+        desc_idx, student_idx = payments['name_index'].strong_candidates(transactions['description'])
+        
+        open_codes = payments['student_code'][open_positions]
+        order = np.argsort(open_codes, kind='stable')
+        bounds = np.searchsorted(open_codes[order], np.arange(payments['name_index'].student_count + 1))
+        
+        owners, positions = _expand_ranges(bounds[student_idx], bounds[student_idx + 1] - bounds[student_idx])
+        tx_idx = desc_idx[owners]
+        pay_idx = open_positions[order[positions]]
+        
+        amount_diff, _ = self._pair_differences(transactions, payments, tx_idx, pay_idx)
+        inside = amount_diff <= self.tolerance_amount
+        return tx_idx[inside], pay_idx[inside]
+    
+    def _build_candidate_pairs(self, transactions: Dict[str, np.ndarray],
+                               payments: Dict[str, np.ndarray]) -> Tuple[Tuple[np.ndarray, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Gera os candidatos que podem passar do threshold.
+        
+        Sem a tolerância de valor o score fica em no máximo 0.6, então todo
+        candidato está dentro dela. Os pares com palavra do nome em comum são
+        gerados pelos postings do NameTokenIndex: os que estão dentro da
+        tolerância de data (_build_window_name_pairs) e os que têm mais de 2/3
+        do nome (_build_name_pairs). Os demais só dependem de valor e data e
+        ficam representados pelos grupos de _build_window_groups. O custo é
+        proporcional à sobreposição de palavras dentro da janela, não ao
+        número de parcelas com o mesmo valor e vencimento.
+        
+        Returns:
+            Tupla ((posição_transação, posição_parcela) dos pares por nome,
+            ordenados por transação e posição da parcela; grupos da janela)
+        """
+        open_positions = np.flatnonzero(~payments['paid'])
+        if len(transactions['amount']) == 0 or len(open_positions) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            window = {'members': empty, 'bounds': np.zeros(1, dtype=np.int64), 'tx': empty, 'group': empty,
+                      'score': np.empty(0, dtype=float)}
+            return (empty, empty), window
+        
+        window = self._build_window_groups(transactions, payments, open_positions)
+        window_tx, window_pay = self._build_window_name_pairs(transactions, payments, window)
+        name_tx, name_pay = self._build_name_pairs(transactions, payments, open_positions)
+        
+        width = len(payments['paid'])
+        keys = _unique_keys(np.concatenate([window_tx * width + window_pay, name_tx * width + name_pay]))
+        return (keys // width, keys % width), window
+    
+    @staticmethod
+    def _expand_window_groups(window: Dict[str, np.ndarray], paid: np.ndarray,
+                              threshold: float = 0.6) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares (transação, parcela) dos grupos acima do threshold, para a atribuição global.
+        
+        Cada grupo contribui com as k primeiras parcelas em aberto, onde k é o
+        número de transações que o alcançam: as parcelas de um grupo são
+        equivalentes, então nenhuma atribuição ótima precisa de mais que isso.
+        """
+        above = window['score'] > threshold
+        tx_idx, group_idx = window['tx'][above], window['group'][above]
+        
+        members = window['members']
+        member_groups = np.repeat(np.arange(len(window['bounds']) - 1), np.diff(window['bounds']))
+        open_members = ~paid[members]
+        members, member_groups = members[open_members], member_groups[open_members]
+        bounds = np.searchsorted(member_groups, np.arange(len(window['bounds'])))
+        
+        reach = np.minimum(np.bincount(group_idx, minlength=len(bounds) - 1), np.diff(bounds))
+        owners, positions = _expand_ranges(bounds[group_idx], reach[group_idx])
+        return tx_idx[owners], members[positions]
+    
+    def _score_pairs(self, transactions: Dict[str, np.ndarray], payments: Dict[str, np.ndarray],
+                     tx_idx: np.ndarray, pay_idx: np.ndarray) -> np.ndarray:
+        """
+        Calcula o score de correspondência de vários pares de uma vez.
+        
+        Pesos: valor 40%, data 30% e nome/descrição 30%. O componente de nome é
+        a fração das palavras do nome (NameTokenIndex) presentes na descrição.
+        
+        Args:
+            transactions: Vetores das transações (_build_transaction_arrays)
+            payments: Vetores das parcelas (_build_payment_arrays)
+            tx_idx: Posição da transação de cada par
+            pay_idx: Posição da parcela de cada par
+            
+        Returns:
+            Scores de 0 a 1, um por par
+        """
+        if len(tx_idx) == 0:
+            return np.empty(0, dtype=float)
+        
+        window_score = self._window_scores(*self._pair_differences(transactions, payments, tx_idx, pay_idx))
+        
+        # Score por nome/descrição (30% do peso): palavras do nome presentes na descrição
+        student_codes = payments['student_code'][pay_idx]
+        name_index = payments['name_index']
+        name_matches = name_index.shared_tokens(transactions['description'], tx_idx, student_codes)
+        token_counts = name_index.token_count[student_codes]
+        
+        name_ratio = np.divide(name_matches, token_counts, out=np.zeros(len(name_matches)), where=token_counts > 0)
+        name_score = np.where(name_matches > 0, 0.3 * name_ratio, 0.0)
+        
+        return np.minimum(window_score + name_score, 1.0)
+    
+    def _window_scores(self, amount_diff: np.ndarray, date_diff: np.ndarray) -> np.ndarray:
+        """Parte do score que vem do valor (40% do peso) e da data (30% do peso)."""
+        amount_ratio = amount_diff / self.tolerance_amount if self.tolerance_amount > 0 else np.zeros_like(amount_diff)
+        amount_score = np.where(amount_diff <= self.tolerance_amount, 0.4 * (1 - amount_ratio), 0.0)
+        
+        date_ratio = date_diff / self.tolerance_days if self.tolerance_days > 0 else np.zeros(len(date_diff))
+        date_score = np.where(date_diff <= self.tolerance_days, 0.3 * (1 - date_ratio), 0.0)
+        
+        return amount_score + date_score
+    
+    def _calculate_match_score(self, transaction: BankTransaction, payment: StudentPayment) -> float:
+        """
+        Calcula score de correspondência entre transação e pagamento.
+        
+        Returns:
+            Score de 0 a 1
+        """
+        pair = np.zeros(1, dtype=np.int64)
+        scores = self._score_pairs(
+            self._build_transaction_arrays([transaction]),
+            self._build_payment_arrays([payment]),
+            pair, pair
+        )
+        return float(scores[0])
+    
+    REPORT_TYPES = {
+        'matched': ('Pagamento Identificado', '✅ Pago'),
+        'overdue': ('Inadimplência', '❌ Atraso'),
+        'unmatched': ('Recebimento Não Identificado', '⚠️ Não Identificado'),
+    }
     
     def generate_reconciliation_report(self, reconciliation_result: Dict) -> pd.DataFrame:
         """
         Gera relatório detalhado da conciliação.
         
+        O relatório é derivado da tabela do resultado com operações vetorizadas
+        e mantém valores brutos (datas, números); use format_report só nas
+        linhas que serão exibidas ou exportadas.
+        
         Args:
             reconciliation_result: Resultado da conciliação
             
@@ -341,68 +1914,67 @@ class BankReconciliation:
             DataFrame com relatório
         """
         try:
-            report_data = []
-            
-            # Pagamentos identificados
-            for match in reconciliation_result.get('matched_payments', []):
-                transaction = match['transaction']
-                payment = match['payment']
-                
-                report_data.append({
-                    'Tipo': 'Pagamento Identificado',
-                    'Aluno': payment.student_name,
-                    'Parcela': f"{payment.installment_number}/{payment.amount:.2f}",
-                    'Data_Vencimento': payment.due_date.strftime('%d/%m/%Y'),
-                    'Data_Pagamento': transaction.date.strftime('%d/%m/%Y'),
-                    'Valor_Esperado': payment.amount,
-                    'Valor_Recebido': transaction.amount,
-                    'Diferenca': transaction.amount - payment.amount,
-                    'Score_Match': f"{match['match_score']:.2%}",
-                    'Status': '✅ Pago',
-                    'Observacoes': transaction.description[:50]
-                })
+            table = reconciliation_result.get('table')
+            if table is None:
+                table = self.build_result_table(
+                    reconciliation_result.get('matched_payments', []),
+                    reconciliation_result.get('unmatched_transactions', []),
+                    reconciliation_result.get('unpaid_installments', [])
+                )
             
-            # Pagamentos em atraso
-            for payment in reconciliation_result.get('unpaid_installments', []):
-                if payment.status == 'overdue':
-                    days_overdue = (datetime.now() - payment.due_date).days
-                    
-                    report_data.append({
-                        'Tipo': 'Inadimplência',
-                        'Aluno': payment.student_name,
-                        'Parcela': f"{payment.installment_number}/{payment.amount:.2f}",
-                        'Data_Vencimento': payment.due_date.strftime('%d/%m/%Y'),
-                        'Data_Pagamento': '',
-                        'Valor_Esperado': payment.amount,
-                        'Valor_Recebido': 0,
-                        'Diferenca': -payment.amount,
-                        'Score_Match': '',
-                        'Status': f'❌ Atraso ({days_overdue}d)',
-                        'Observacoes': f'Vencido há {days_overdue} dias'
-                    })
+            rows = table[table['status'].isin(list(self.REPORT_TYPES))]
+            rows = rows.iloc[np.argsort(rows['status'].map({'matched': 0, 'overdue': 1, 'unmatched': 2}).to_numpy(), kind='stable')]
             
-            # Transações não identificadas
-            for transaction in reconciliation_result.get('unmatched_transactions', []):
-                report_data.append({
-                    'Tipo': 'Recebimento Não Identificado',
-                    'Aluno': 'Não Identificado',
-                    'Parcela': '',
-                    'Data_Vencimento': '',
-                    'Data_Pagamento': transaction.date.strftime('%d/%m/%Y'),
-                    'Valor_Esperado': 0,
-                    'Valor_Recebido': transaction.amount,
-                    'Diferenca': transaction.amount,
-                    'Score_Match': '',
-                    'Status': '⚠️ Não Identificado',
-                    'Observacoes': transaction.description[:50]
-                })
+            today = pd.Timestamp(datetime.now())
+            overdue = rows['status'] == 'overdue'
             
-            return pd.DataFrame(report_data)
+            return pd.DataFrame({
+                'Tipo': rows['status'].map({status: labels[0] for status, labels in self.REPORT_TYPES.items()}),
+                'Aluno': rows['student_name'].fillna('Não Identificado'),
+                'Parcela': rows['installment_number'],
+                'Data_Vencimento': rows['due_date'],
+                'Data_Pagamento': rows['transaction_date'],
+                'Valor_Esperado': rows['expected_amount'],
+                'Valor_Recebido': rows['received_amount'],
+                'Diferenca': rows['received_amount'] - rows['expected_amount'],
+                'Score_Match': rows['match_score'],
+                'Status': rows['status'].map({status: labels[1] for status, labels in self.REPORT_TYPES.items()}),
+                'Dias_Atraso': (today - rows['due_date']).dt.days.where(overdue).astype('Int64'),
+                'Observacoes': rows['description'].str[:50]
+            }).reset_index(drop=True)
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar relatório: {e}")
             return pd.DataFrame()
     
+    @staticmethod
+    def format_report(report: pd.DataFrame) -> pd.DataFrame:
+        """
+        Formata linhas do relatório para exibição (datas, parcela, score, observações).
+        
+        Args:
+            report: Linhas de generate_reconciliation_report (ex.: a página visível)
+            
+        Returns:
+            Cópia com as colunas de texto formatadas
+        """
+        formatted = report.copy()
+        has_installment = formatted['Parcela'].notna()
+        late = formatted['Dias_Atraso'].notna()
+        
+        formatted['Parcela'] = (
+            formatted['Parcela'].astype(str) + '/' + formatted['Valor_Esperado'].map('{:.2f}'.format)
+        ).where(has_installment, '')
+        formatted['Data_Vencimento'] = formatted['Data_Vencimento'].dt.strftime('%d/%m/%Y').fillna('')
+        formatted['Data_Pagamento'] = formatted['Data_Pagamento'].dt.strftime('%d/%m/%Y').fillna('')
+        formatted['Score_Match'] = formatted['Score_Match'].map('{:.2%}'.format).where(formatted['Score_Match'].notna(), '')
+        
+        days = formatted['Dias_Atraso'].astype(str)
+        formatted['Status'] = formatted['Status'].where(~late, formatted['Status'] + ' (' + days + 'd)')
+        formatted['Observacoes'] = formatted['Observacoes'].where(~late, 'Vencido há ' + days + ' dias').fillna('')
+        
+        return formatted.drop(columns=['Dias_Atraso'])
+    
     def generate_dashboard_metrics(self, reconciliation_result: Dict) -> Dict:
         """
         Gera métricas para dashboard de adimplência.
@@ -420,7 +1992,7 @@ class BankReconciliation:
                 'adimplencia': {
                     'rate': metrics.get('adimplencia_rate', 0),
                     'count': metrics.get('total_paid', 0),
-                    'amount': sum(match['transaction'].amount for match in reconciliation_result.get('matched_payments', []))
+                    'amount': self._matched_amount(reconciliation_result)
                 },
                 'inadimplencia': {
                     'rate': metrics.get('inadimplencia_rate', 0),
@@ -443,4 +2015,12 @@ class BankReconciliation:
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar métricas: {e}")
-            return {}
\ No newline at end of file
+            return {}
+    
+    @staticmethod
+    def _matched_amount(reconciliation_result: Dict) -> float:
+        """Total recebido nos créditos identificados."""
+        table = reconciliation_result.get('table')
+        if table is not None:
+            return float(table.loc[table['status'] == 'matched', 'received_amount'].sum())
+        return sum(match['transaction'].amount for match in reconciliation_result.get('matched_payments', []))
\ No newline at end of file
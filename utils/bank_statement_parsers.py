@@ -0,0 +1,383 @@
+import io
+import logging
+from abc import ABC, abstractmethod
+import os
+import re
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+class _StatementParser(ABC):
+    """
+    Base dos leitores de arquivos bancários em lotes.
+    
+    O arquivo é percorrido uma vez; o Python só separa os registros brutos
+    (blocos OFX ou linhas CNAB) e cada grupo de registros é convertido de
+    uma vez, com operações de texto por coluna. A memória usada depende do
+    tamanho do lote e não do tamanho do arquivo.
+    """
+    
+    DEFAULT_BATCH_SIZE = 5000
+    
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Inicializa o leitor.
+        
+        Args:
+            batch_size: Número de transações por lote
+        """
+        self.batch_size = max(int(batch_size), 1)
+        self.logger = self._setup_logger()
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger(type(self).__name__)
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    def iter_batches(self, file) -> Iterator[pd.DataFrame]:
+        """
+        Lê o arquivo em lotes de transações.
+        
+        Todos os lotes têm batch_size transações, exceto o último.
+        
+        Args:
+            file: Caminho ou objeto de arquivo (texto ou binário)
+        
+        Yields:
+            DataFrames com as colunas de BankTransactionTable
+        """
+        pending: List[pd.DataFrame] = []
+        pending_rows = 0
+        
+        with self._open_text(file) as stream:
+            for records in self._iter_chunks(stream):
+                frame = self._to_frame(self._extract_fields(records))
+                pending.append(frame)
+                pending_rows += len(frame)
+                
+                # Registros descartados (ex: baixas sem pagamento) deixam grupos menores
+                while pending_rows >= self.batch_size:
+                    merged = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+                    yield merged.iloc[:self.batch_size].reset_index(drop=True)
+                    rest = merged.iloc[self.batch_size:]
+                    pending = [rest] if len(rest) else []
+                    pending_rows = len(rest)
+        
+        if pending_rows:
+            yield pd.concat(pending, ignore_index=True)
+    
+    @abstractmethod
+    def _iter_chunks(self, stream) -> Iterator[list]:
+        """Gera grupos de até batch_size registros brutos."""
+    
+    @abstractmethod
+    def _extract_fields(self, records: list) -> pd.DataFrame:
+        """Colunas de texto date, amount, description, document e account de um grupo."""
+    
+    def _to_frame(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """Converte as colunas de texto de um grupo para as de BankTransactionTable."""
+        signed = self._parse_amounts(raw['amount'])
+        
+        frame = pd.DataFrame({
+            'date': self._parse_dates(raw['date']),
+            'amount': signed.abs(),
+            'description': raw['description'].str.strip(),
+            'document': raw['document'].str.strip(),
+            'account': raw['account'].str.strip(),
+            'type': np.where(signed > 0, 'credit', 'debit')
+        })
+        
+        valid = frame['date'].notna() & signed.notna()
+        if not valid.all():
+            self.logger.warning(f"Ignoradas {int((~valid).sum())} transações com data ou valor inválido")
+        return frame[valid].reset_index(drop=True)
+    
+    @abstractmethod
+    def _parse_amounts(self, raw: pd.Series) -> pd.Series:
+        """Converte os valores de texto do grupo em float com sinal."""
+    
+    @abstractmethod
+    def _parse_dates(self, raw: pd.Series) -> pd.Series:
+        """Converte as datas de texto do grupo."""
+    
+    def _detect_encoding(self, head: bytes) -> str:
+        """Codificação do arquivo a partir dos primeiros bytes."""
+        return 'latin-1'
+    
+    def _open_text(self, file) -> '_TextStream':
+        """Abre caminho ou objeto de arquivo (ex: upload do Streamlit) para leitura de texto."""
+        if isinstance(file, (str, os.PathLike)):
+            stream = open(file, 'rb')
+            owned = True
+        else:
+            if hasattr(file, 'seek'):
+                file.seek(0)
+            if isinstance(file, io.TextIOBase):
+                return _TextStream(file, close=False)
+            stream = file
+            owned = False
+        
+        head = stream.read(1024)
+        stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=self._detect_encoding(head), errors='replace', newline='')
+        return _TextStream(text, close=owned, detach=not owned)
+
+
+class _TextStream:
+    """Contexto que fecha o arquivo aberto pelo leitor ou só desacopla o do usuário."""
+    
+    def __init__(self, stream, close: bool, detach: bool = False):
+        self.stream = stream
+        self.close = close
+        self.detach = detach
+    
+    def __enter__(self):
+        return self.stream
+    
+    def __exit__(self, *exc_info):
+        if self.close:
+            self.stream.close()
+        elif self.detach:
+            # Fechar o wrapper de texto fecharia também o upload
+            self.stream.detach()
+        return False
+
+
+class OFXParser(_StatementParser):
+    """
+    Leitor de extratos OFX (1.x em SGML e 2.x em XML).
+    
+    Cada bloco <STMTTRN> vira uma transação e a conta é o último <ACCTID>
+    lido antes dele. O arquivo é lido em blocos de texto (o OFX 2.x pode
+    vir em uma única linha) e as tags de cada bloco lido são extraídas com
+    uma única expressão regular; a montagem das transações é feita por coluna.
+    """
+    
+    READ_SIZE = 1 << 20
+    
+    FIELDS = ['DTPOSTED', 'TRNAMT', 'NAME', 'MEMO', 'FITID', 'CHECKNUM', 'REFNUM']
+    TOKEN_PATTERN = re.compile(
+        r'<(/?STMTTRN|ACCTID|' + '|'.join(FIELDS) + r')>([^<\r\n]*)',
+        re.IGNORECASE
+    )
+    
+    def __init__(self, batch_size: int = _StatementParser.DEFAULT_BATCH_SIZE):
+        super().__init__(batch_size)
+        self.account = ''
+    
+    def _detect_encoding(self, head: bytes) -> str:
+        """UTF-8 quando o cabeçalho (SGML ou XML) declara, senão Windows-1252."""
+        if b'UTF-8' in head.upper():
+            return 'utf-8'
+        return 'cp1252'
+    
+    def _iter_chunks(self, stream) -> Iterator[list]:
+        """Gera as tags (nome, valor) de cada trecho lido, sempre terminando em um bloco fechado."""
+        self.account = ''
+        buffer = ''
+        
+        while True:
+            data = stream.read(self.READ_SIZE)
+            buffer += data
+            
+            # Só o texto até o último </STMTTRN> é processado; o resto espera a próxima leitura
+            end = len(buffer) if not data else buffer.upper().rfind('</STMTTRN>')
+            if end >= 0:
+                if data:
+                    end += len('</STMTTRN>')
+                tokens = self.TOKEN_PATTERN.findall(buffer, 0, end)
+                if tokens:
+                    yield tokens
+                buffer = buffer[end:]
+            
+            if not data:
+                break
+    
+    def _extract_fields(self, records: list) -> pd.DataFrame:
+        """Monta uma linha por bloco <STMTTRN> a partir das tags do trecho."""
+        tokens = pd.DataFrame(records, columns=['tag', 'value'])
+        tag = tokens['tag'].str.upper()
+        value = tokens['value'].str.strip()
+        
+        opening = (tag == 'STMTTRN').to_numpy()
+        block_count = int(opening.sum())
+        
+        # Bloco de cada tag: número do <STMTTRN> aberto, -1 fora de um bloco
+        marker = pd.Series(np.nan, index=tokens.index)
+        marker[opening] = np.arange(block_count)
+        marker[(tag == '/STMTTRN').to_numpy()] = -1
+        block = marker.ffill().fillna(-1).astype(np.int64)
+        
+        # Conta vigente em cada tag, continuando a do trecho anterior
+        account = value.where(tag == 'ACCTID').ffill().fillna(self.account)
+        if len(account):
+            self.account = account.iloc[-1]
+        
+        fields = tokens[(block >= 0).to_numpy() & tag.isin(self.FIELDS).to_numpy()].assign(
+            tag=tag, value=value, block=block
+        ).drop_duplicates(['block', 'tag'])
+        table = fields.pivot(index='block', columns='tag', values='value').reindex(
+            index=range(block_count), columns=self.FIELDS
+        ).fillna('')
+        
+        document = table['CHECKNUM']
+        document = document.where(document != '', table['REFNUM'])
+        document = document.where(document != '', table['FITID'])
+        
+        return pd.DataFrame({
+            'date': table['DTPOSTED'],
+            'amount': table['TRNAMT'],
+            'description': (table['NAME'] + ' ' + table['MEMO']).str.strip(),
+            'document': document,
+            'account': account[opening].to_numpy()
+        }).reset_index(drop=True)
+    
+    def _parse_amounts(self, raw: pd.Series) -> pd.Series:
+        """TRNAMT com ponto ou vírgula decimal."""
+        return pd.to_numeric(raw.str.replace(',', '.', regex=False), errors='coerce')
+    
+    def _parse_dates(self, raw: pd.Series) -> pd.Series:
+        """DTPOSTED no formato AAAAMMDD[HHMMSS[.XXX][fuso]]."""
+        return pd.to_datetime(raw.str[:8], format='%Y%m%d', errors='coerce')
+
+
+class CNABParser(_StatementParser):
+    """
+    Leitor de arquivos de retorno de cobrança CNAB 240 e CNAB 400.
+    
+    O layout é detectado pelo tamanho da primeira linha. Só entram as
+    liquidações (códigos de ocorrência em LIQUIDATION_CODES), como créditos
+    com o valor pago e a data de crédito.
+    
+    As posições seguem o CNAB 240 FEBRABAN (segmentos T e U) e o CNAB 400
+    de retorno no padrão Bradesco/Itaú; bancos com outras posições podem
+    ajustar LAYOUT_240 e LAYOUT_400 em uma subclasse.
+    """
+    
+    LIQUIDATION_CODES = ['06', '17']
+    
+    # Campos: (início, fim) em posições de string Python (base 0, fim exclusivo)
+    LAYOUT_240 = {
+        'agency': (52, 57),
+        'account': (58, 70),
+        'record_type': (7, 8),
+        'segment': (13, 14),
+        'occurrence': (15, 17),
+        'our_number': (37, 57),
+        'document': (58, 73),
+        'payer_name': (148, 188),
+        'paid_amount': (77, 92),
+        'occurrence_date': (137, 145),
+        'credit_date': (145, 153),
+    }
+    
+    LAYOUT_400 = {
+        'account': (26, 46),
+        'record_type': (0, 1),
+        'our_number': (62, 70),
+        'occurrence': (108, 110),
+        'occurrence_date': (110, 116),
+        'document': (116, 126),
+        'paid_amount': (253, 266),
+        'credit_date': (295, 301),
+    }
+    
+    def _iter_chunks(self, stream) -> Iterator[list]:
+        """Gera grupos de linhas de detalhe; no CNAB 240 um grupo nunca separa o segmento T do U."""
+        header = stream.readline().rstrip('\r\n')
+        if not header:
+            return
+        
+        if len(header) >= 400:
+            self.layout = self.LAYOUT_400
+            start, end = self.layout['account']
+            self.account = header[start:end].strip()
+            detail_type, limit, segment_position = '1', self.batch_size, None
+        elif len(header) >= 240:
+            self.layout = self.LAYOUT_240
+            agency, account = (header[start:end].lstrip('0') for start, end in (self.layout['agency'], self.layout['account']))
+            self.account = f"{agency}/{account}"
+            detail_type, limit, segment_position = '3', 2 * self.batch_size, self.layout['segment'][0]
+        else:
+            raise ValueError(f"Linha com {len(header)} posições: arquivo não é CNAB 240 nem CNAB 400")
+        
+        type_position = self.layout['record_type'][0]
+        lines = []
+        
+        for line in stream:
+            if line[type_position:type_position + 1] != detail_type:
+                continue
+            lines.append(line)
+            
+            if len(lines) >= limit and (segment_position is None or line[segment_position] == 'U'):
+                yield lines
+                lines = []
+        
+        if lines:
+            yield lines
+    
+    def _extract_fields(self, records: list) -> pd.DataFrame:
+        """Recorta as posições de todas as linhas do grupo de uma vez."""
+        lines = pd.Series(records, dtype=object)
+        field = lambda rows, name: rows.str.slice(*self.layout[name])
+        
+        if 'segment' in self.layout:
+            # Cada segmento U traz os valores do segmento T imediatamente anterior
+            segment = field(lines, 'segment').to_numpy()
+            values_at = np.flatnonzero((segment[1:] == 'U') & (segment[:-1] == 'T')) + 1
+            titles = lines.iloc[values_at - 1].reset_index(drop=True)
+            values = lines.iloc[values_at].reset_index(drop=True)
+            description = (
+                'BOLETO LIQUIDADO ' + field(titles, 'our_number').str.strip() + ' ' + field(titles, 'payer_name').str.strip()
+            )
+        else:
+            titles = values = lines
+            description = 'BOLETO LIQUIDADO ' + field(lines, 'our_number').str.strip()
+        
+        credit_date = field(values, 'credit_date')
+        credit_date = credit_date.where(credit_date.str.strip('0 ') != '', field(values, 'occurrence_date'))
+        
+        liquidated = field(titles, 'occurrence').isin(self.LIQUIDATION_CODES).to_numpy()
+        return pd.DataFrame({
+            'date': credit_date,
+            'amount': field(values, 'paid_amount'),
+            'description': description,
+            'document': field(titles, 'document'),
+            'account': self.account
+        })[liquidated].reset_index(drop=True)
+    
+    def _parse_amounts(self, raw: pd.Series) -> pd.Series:
+        """Valores numéricos com duas casas decimais implícitas."""
+        return pd.to_numeric(raw.str.strip(), errors='coerce') / 100
+    
+    def _parse_dates(self, raw: pd.Series) -> pd.Series:
+        """Datas DDMMAAAA (CNAB 240) ou DDMMAA (CNAB 400)."""
+        date_format = '%d%m%Y' if 'segment' in self.layout else '%d%m%y'
+        return pd.to_datetime(raw.str.strip(), format=date_format, errors='coerce')
+
+
+def detect_statement_parser(file_name: str, batch_size: int = _StatementParser.DEFAULT_BATCH_SIZE) -> Optional[_StatementParser]:
+    """
+    Escolhe o leitor pela extensão do arquivo.
+    
+    Args:
+        file_name: Nome do arquivo
+        batch_size: Número de transações por lote
+    
+    Returns:
+        OFXParser, CNABParser ou None (CSV/Excel)
+    """
+    extension = os.path.splitext(file_name or '')[1].lower()
+    if extension in ('.ofx', '.qfx'):
+        return OFXParser(batch_size)
+    if extension in ('.ret', '.cnab', '.txt'):
+        return CNABParser(batch_size)
+    return None
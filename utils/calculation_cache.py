@@ -0,0 +1,92 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+class CalculationCache:
+    """
+    Cache LRU de resultados do FinancialCalculator.
+    
+    A chave termina com a identidade do DataHandler e a versão dos seus
+    dados (data_version), que muda a cada alteração; ao guardar um
+    resultado de uma versão nova, os resultados das versões anteriores do
+    mesmo DataHandler são descartados. As versões são contadores de cada
+    instância, então resultados de outros DataHandlers são mantidos.
+    """
+    
+    DEFAULT_MAX_ENTRIES = 128
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Inicializa o cache.
+        
+        Args:
+            max_entries: Número máximo de resultados guardados
+        """
+        self.max_entries = max(int(max_entries), 1)
+        self.logger = self._setup_logger()
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger('CalculationCache')
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Procura um resultado e o marca como o mais recente.
+        
+        Returns:
+            Tupla (encontrado, resultado); o resultado é compartilhado e não
+            deve ser alterado por quem o recebe
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key: Hashable, result: Any):
+        """
+        Guarda um resultado, descartando versões antigas do mesmo DataHandler e o menos usado.
+        
+        Args:
+            key: Chave (método, argumentos, DataHandler, versão dos dados)
+            result: Resultado do cálculo
+        """
+        handler, version = key[-2:]
+        with self._lock:
+            stale = [
+                entry for entry in self._entries
+                if entry[-2] == handler and entry[-1] != version
+            ]
+            for entry in stale:
+                del self._entries[entry]
+            
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Descarta todos os resultados (os contadores são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Entradas, acertos e falhas do cache."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -1,7 +1,8 @@
 import pandas as pd
+import numpy as np
 import json
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import logging
 
 class DataHandler:
@@ -10,13 +11,38 @@ class DataHandler:
     Manipula dados financeiros, de alunos e gera relatórios.
     """
     
-    def __init__(self):
-        """Inicializa o manipulador de dados."""
+    # Colunas somadas no cubo (Periodo, Tipo) usado por get_financial_summary
+    SUMMARY_COLUMNS = ['Receita_Bruta', 'Resultado_Liquido', 'Inadimplencia', 'Total_Despesas']
+    
+    COURSE_PERFORMANCE_COLUMNS = [
+        'codigo', 'nome', 'total_alunos', 'receita_realizada', 'resultado_liquido',
+        'inadimplencia', 'ticket_medio', 'status'
+    ]
+    
+    # Diretório onde as importações financeiras são gravadas (um CSV por importação)
+    DEFAULT_IMPORTS_DIR = 'data/financial_imports'
+    
+    def __init__(self, imports_dir: Optional[str] = DEFAULT_IMPORTS_DIR):
+        """
+        Inicializa o manipulador de dados.
+        
+        Args:
+            imports_dir: Diretório das importações financeiras gravadas; None
+                mantém as importações só em memória
+        """
+        self.imports_dir = imports_dir
+        self._financial_buffer: List[pd.DataFrame] = []
+        self._version = 0
+        self._course_performance: Optional[Tuple[int, pd.DataFrame]] = None
+        self._summary_cube: Dict[Tuple, np.ndarray] = {}
+        self._summary_totals: Dict[str, np.ndarray] = {}
+        self._summary_periods: set = set()
         self.financial_data = pd.DataFrame()
         self.student_data = pd.DataFrame()
         self.courses_data = pd.DataFrame()
         self.logger = self._setup_logger()
         self._load_sample_data()
+        self._load_imported_data()
     
     def _setup_logger(self) -> logging.Logger:
         """Configura o sistema de logging."""
@@ -31,6 +57,86 @@ class DataHandler:
         
         return logger
     
+    def data_version(self) -> int:
+        """
+        Versão dos dados: aumenta a cada alteração feita pelos métodos do DataHandler.
+        
+        Alterações feitas diretamente nos DataFrames (ex: df.loc[...] = ...)
+        não são percebidas; substitua o DataFrame pelo atributo.
+        
+        Returns:
+            Contador de alterações
+        """
+        return self._version
+    
+    def _bump_version(self):
+        """Registra uma alteração nos dados."""
+        self._version += 1
+    
+    @property
+    def financial_data(self) -> pd.DataFrame:
+        """Dados financeiros (uma linha por Periodo e Tipo)."""
+        if self._financial_buffer:
+            # Blocos acrescentados desde a última leitura entram com um único concat
+            self._financial_data = pd.concat([self._financial_data, *self._financial_buffer], ignore_index=True)
+            self._financial_buffer = []
+        return self._financial_data
+    
+    @financial_data.setter
+    def financial_data(self, df: pd.DataFrame):
+        """Substitui os dados financeiros e remonta o cubo de resumos."""
+        self._financial_data = df
+        self._financial_buffer = []
+        self._summary_cube = {}
+        self._summary_totals = {}
+        self._summary_periods = set()
+        self._update_summary_cube(df)
+        self._bump_version()
+    
+    @property
+    def student_data(self) -> pd.DataFrame:
+        """Dados dos alunos."""
+        return self._student_data
+    
+    @student_data.setter
+    def student_data(self, df: pd.DataFrame):
+        """Substitui os dados dos alunos."""
+        self._student_data = df
+        self._bump_version()
+    
+    @property
+    def courses_data(self) -> pd.DataFrame:
+        """Dados dos cursos (turmas FAC)."""
+        return self._courses_data
+    
+    @courses_data.setter
+    def courses_data(self, df: pd.DataFrame):
+        """Substitui os dados dos cursos."""
+        self._courses_data = df
+        self._bump_version()
+    
+    def _update_summary_cube(self, rows: pd.DataFrame):
+        """
+        Soma linhas financeiras ao cubo (Periodo, Tipo) -> totais de SUMMARY_COLUMNS.
+        
+        Só as linhas novas são agrupadas; o cubo guarda também o total de cada
+        Tipo, então o resumo geral não precisa somar os períodos.
+        
+        Args:
+            rows: Linhas acrescentadas aos dados financeiros
+        """
+        if rows is None or rows.empty or 'Periodo' not in rows.columns or 'Tipo' not in rows.columns:
+            return
+        
+        values = rows.reindex(columns=self.SUMMARY_COLUMNS).apply(pd.to_numeric, errors='coerce')
+        grouped = values.groupby([rows['Periodo'], rows['Tipo']], dropna=False).sum()
+        
+        for (period, kind), sums in zip(grouped.index, grouped.to_numpy(dtype=float)):
+            key = (period, kind)
+            self._summary_cube[key] = self._summary_cube.get(key, 0.0) + sums
+            self._summary_totals[kind] = self._summary_totals.get(kind, 0.0) + sums
+            self._summary_periods.add(period)
+    
     def _load_sample_data(self):
         """Carrega dados de exemplo baseados nos PDFs fornecidos."""
         try:
@@ -187,37 +293,47 @@ class DataHandler:
         
         return pd.DataFrame(courses_data)
     
-    def get_financial_summary(self, period: Optional[str] = None) -> Dict:
+    def get_financial_summary(self, period: Optional[Union[str, Iterable[str]]] = None) -> Dict:
         """
-        Retorna resumo financeiro para um período específico ou todos.
+        Retorna resumo financeiro para um período, uma combinação de períodos ou todos.
+        
+        Os totais vêm do cubo (Periodo, Tipo) mantido a cada alteração dos
+        dados financeiros, sem copiar nem filtrar o DataFrame.
         
         Args:
-            period: Período específico (ex: 'FAC_17') ou None para todos
+            period: Período específico (ex: 'FAC_17'), lista de períodos ou None/'' para todos
             
         Returns:
             Dicionário com resumo financeiro
         """
         try:
-            df = self.financial_data.copy()
+            empty = np.zeros(len(self.SUMMARY_COLUMNS))
             
-            if period:
-                df = df[df['Periodo'] == period]
-            
-            if df.empty:
-                return {'error': 'Nenhum dado encontrado para o período especificado'}
+            if not period:
+                if not self._summary_totals:
+                    return {'error': 'Nenhum dado encontrado para o período especificado'}
+                
+                realizados = self._summary_totals.get('Realizado', empty)
+                orcados = self._summary_totals.get('Orcamento', empty)
+            else:
+                periods = [period] if isinstance(period, str) else list(dict.fromkeys(period))
+                
+                if not any(current in self._summary_periods for current in periods):
+                    return {'error': 'Nenhum dado encontrado para o período especificado'}
+                
+                realizados = sum((self._summary_cube.get((current, 'Realizado'), empty) for current in periods), empty)
+                orcados = sum((self._summary_cube.get((current, 'Orcamento'), empty) for current in periods), empty)
             
-            # Separar dados realizados e orçados
-            realizados = df[df['Tipo'] == 'Realizado']
-            orcados = df[df['Tipo'] == 'Orcamento']
+            receita_realizada, resultado_realizado, inadimplencia, despesas = (float(value) for value in realizados)
             
             summary = {
-                'receita_realizada': realizados['Receita_Bruta'].sum(),
-                'receita_orcada': orcados['Receita_Bruta'].sum(),
-                'resultado_realizado': realizados['Resultado_Liquido'].sum(),
-                'resultado_orcado': orcados['Resultado_Liquido'].sum(),
-                'inadimplencia_total': realizados['Inadimplencia'].sum(),
-                'despesas_totais': realizados['Total_Despesas'].sum(),
-                'taxa_inadimplencia': (realizados['Inadimplencia'].sum() / realizados['Receita_Bruta'].sum() * 100) if realizados['Receita_Bruta'].sum() > 0 else 0
+                'receita_realizada': receita_realizada,
+                'receita_orcada': float(orcados[0]),
+                'resultado_realizado': resultado_realizado,
+                'resultado_orcado': float(orcados[1]),
+                'inadimplencia_total': inadimplencia,
+                'despesas_totais': despesas,
+                'taxa_inadimplencia': (inadimplencia / receita_realizada * 100) if receita_realizada > 0 else 0
             }
             
             return summary
@@ -263,35 +379,56 @@ class DataHandler:
             Dicionário com performance dos cursos
         """
         try:
-            # Combinar dados financeiros e de cursos
-            financial_df = self.financial_data[self.financial_data['Tipo'] == 'Realizado'].copy()
-            courses_df = self.courses_data.copy()
-            
-            performance = []
-            
-            for _, course in courses_df.iterrows():
-                codigo = course['Codigo']
-                financial_data = financial_df[financial_df['Periodo'] == codigo]
-                
-                if not financial_data.empty:
-                    perf = {
-                        'codigo': codigo,
-                        'nome': course['Nome'],
-                        'total_alunos': course['Total_Alunos'],
-                        'receita_realizada': financial_data['Receita_Bruta'].iloc[0],
-                        'resultado_liquido': financial_data['Resultado_Liquido'].iloc[0],
-                        'inadimplencia': financial_data['Inadimplencia'].iloc[0],
-                        'ticket_medio': financial_data['Receita_Bruta'].iloc[0] / course['Total_Alunos'] if course['Total_Alunos'] > 0 else 0,
-                        'status': course['Status']
-                    }
-                    performance.append(perf)
-            
-            return {'courses': performance}
+            performance = self.get_course_performance_frame()
+            return {'courses': performance.to_dict('records')}
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar performance dos cursos: {str(e)}")
             return {'error': str(e)}
     
+    def get_course_performance_frame(self) -> pd.DataFrame:
+        """
+        Performance dos cursos em formato de tabela, uma linha por curso com dados realizados.
+        
+        Cursos e dados financeiros realizados são unidos por um único merge
+        (Codigo = Periodo; vale a primeira linha realizada de cada período) e
+        ticket médio e inadimplência são calculados por coluna. O resultado
+        fica guardado até a próxima alteração dos dados (data_version).
+        
+        Returns:
+            DataFrame com as colunas de COURSE_PERFORMANCE_COLUMNS (cópia)
+        """
+        cached = self._course_performance
+        if cached is not None and cached[0] == self._version:
+            return cached[1].copy()
+        
+        if self.courses_data.empty or self.financial_data.empty:
+            performance = pd.DataFrame(columns=self.COURSE_PERFORMANCE_COLUMNS)
+        else:
+            realized = self.financial_data[self.financial_data['Tipo'] == 'Realizado']
+            realized = realized.drop_duplicates('Periodo')[['Periodo', 'Receita_Bruta', 'Resultado_Liquido', 'Inadimplencia']]
+            
+            merged = self.courses_data[['Codigo', 'Nome', 'Total_Alunos', 'Status']].merge(
+                realized, left_on='Codigo', right_on='Periodo', how='inner'
+            )
+            
+            students = merged['Total_Alunos']
+            ticket = (merged['Receita_Bruta'] / students.where(students > 0)).fillna(0.0)
+            
+            performance = pd.DataFrame({
+                'codigo': merged['Codigo'],
+                'nome': merged['Nome'],
+                'total_alunos': students,
+                'receita_realizada': merged['Receita_Bruta'],
+                'resultado_liquido': merged['Resultado_Liquido'],
+                'inadimplencia': merged['Inadimplencia'],
+                'ticket_medio': ticket,
+                'status': merged['Status']
+            })
+        
+        self._course_performance = (self._version, performance)
+        return performance.copy()
+    
     def add_student(self, student_data: Dict) -> Dict:
         """
         Adiciona um novo aluno ao sistema.
@@ -342,6 +479,78 @@ class DataHandler:
             self.logger.error(f"Erro ao adicionar aluno: {str(e)}")
             return {'error': str(e)}
     
+    def append_financial_data(self, df: pd.DataFrame, source: Optional[str] = None) -> int:
+        """
+        Acrescenta linhas financeiras já validadas aos dados do sistema.
+        
+        As linhas ficam em um buffer incorporado a financial_data com um
+        único concat na próxima leitura; o cubo de resumos recebe só as
+        linhas novas. Linhas sem 'Tipo' entram como 'Realizado'. Colunas que
+        os dados ainda não tinham são mantidas (ver unknown_financial_columns).
+        Com source e imports_dir, as linhas também são gravadas em
+        imports_dir/<source>.csv e voltam na próxima inicialização.
+        
+        Args:
+            df: DataFrame com dados financeiros (ver validate_financial_data)
+            source: Nome da importação a que as linhas pertencem
+        
+        Returns:
+            Número de linhas acrescentadas
+        """
+        try:
+            if df is None or df.empty:
+                return 0
+            
+            new_rows = df.reset_index(drop=True)
+            new_rows['Tipo'] = new_rows['Tipo'].fillna('Realizado') if 'Tipo' in new_rows.columns else 'Realizado'
+            
+            unknown = self.unknown_financial_columns(new_rows)
+            if unknown:
+                self.logger.warning(f"Colunas novas nos dados financeiros: {', '.join(unknown)}")
+            
+            if source and self.imports_dir:
+                os.makedirs(self.imports_dir, exist_ok=True)
+                path = os.path.join(self.imports_dir, f"{source}.csv")
+                new_rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+            
+            self._financial_buffer.append(new_rows)
+            self._update_summary_cube(new_rows)
+            self._bump_version()
+            
+            return len(new_rows)
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao acrescentar dados financeiros: {str(e)}")
+            return 0
+    
+    def unknown_financial_columns(self, df: pd.DataFrame) -> List[str]:
+        """
+        Colunas de df que os dados financeiros ainda não têm.
+        
+        Args:
+            df: DataFrame com dados financeiros
+        
+        Returns:
+            Nomes das colunas desconhecidas, na ordem de df
+        """
+        known = set(self._financial_data.columns)
+        for frame in self._financial_buffer:
+            known.update(frame.columns)
+        return [column for column in df.columns if column not in known]
+    
+    def _load_imported_data(self):
+        """Acrescenta as importações financeiras gravadas em imports_dir."""
+        if not self.imports_dir or not os.path.isdir(self.imports_dir):
+            return
+        
+        try:
+            for name in sorted(os.listdir(self.imports_dir)):
+                if name.endswith('.csv'):
+                    self.append_financial_data(pd.read_csv(os.path.join(self.imports_dir, name)))
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar importações financeiras: {str(e)}")
+    
     def export_data(self, data_type: str, format_type: str = 'csv') -> Tuple[bool, str]:
         """
         Exporta dados do sistema.
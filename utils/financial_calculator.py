@@ -2,7 +2,40 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple, Union
 import logging
+from copy import deepcopy
+from functools import wraps
 from datetime import datetime, timedelta
+from utils.calculation_cache import CalculationCache
+from utils.trend_engine import TrendEngine
+
+def _chronological_order(periods: pd.Index) -> np.ndarray:
+    """Posições que ordenam códigos de período pelo número final (FAC_9 antes de FAC_10), depois pelo texto."""
+    keys = periods.astype(str)
+    numbers = pd.to_numeric(keys.str.extract(r'(\d+)$')[0], errors='coerce').fillna(-1).to_numpy()
+    return np.lexsort((keys.to_numpy(), numbers))
+
+def _memoized(method):
+    """
+    Guarda o resultado do método por (método, argumentos, versão dos dados).
+    
+    Só memoiza quando o DataHandler informa data_version() e os argumentos
+    são hasheáveis (listas viram tuplas); resultados com 'error' não são
+    guardados. Quem chama recebe uma cópia, então pode alterá-la à vontade.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = self._cache_key(method.__name__, args, kwargs)
+        if key is None:
+            return method(self, *args, **kwargs)
+        
+        found, result = self.cache.get(key)
+        if not found:
+            result = method(self, *args, **kwargs)
+            if not (isinstance(result, dict) and 'error' in result):
+                self.cache.put(key, result)
+        return deepcopy(result)
+    
+    return wrapper
 
 class FinancialCalculator:
     """
@@ -10,14 +43,17 @@ class FinancialCalculator:
     Processa dados financeiros e gera métricas de performance.
     """
     
-    def __init__(self, data_handler=None):
+    def __init__(self, data_handler=None, cache: Optional[CalculationCache] = None):
         """
         Inicializa o calculador financeiro.
         
         Args:
             data_handler: Instância do DataHandler para acesso aos dados
+            cache: Cache de resultados (padrão: um novo CalculationCache)
         """
         self.data_handler = data_handler
+        self.cache = cache if cache is not None else CalculationCache()
+        self.trend_engine = TrendEngine()
         self.logger = self._setup_logger()
     
     def _setup_logger(self) -> logging.Logger:
@@ -33,6 +69,36 @@ class FinancialCalculator:
         
         return logger
     
+    def _cache_key(self, method_name: str, args: tuple, kwargs: Dict) -> Optional[tuple]:
+        """
+        Chave de memoização (método, argumentos, DataHandler e versão dos dados), ou None se não houver.
+        
+        A identidade do DataHandler entra na chave porque a versão é um
+        contador de cada instância: outro DataHandler atribuído a
+        self.data_handler pode estar na mesma versão com outros dados. Sem
+        DataHandler versionado ou com argumentos não hasheáveis (ex:
+        DataFrames) o cálculo é sempre refeito.
+        """
+        data_version = getattr(self.data_handler, 'data_version', None)
+        if data_version is None:
+            return None
+        
+        freeze = lambda value: (
+            tuple(value) if isinstance(value, list) else frozenset(value) if isinstance(value, set) else value
+        )
+        key = (
+            method_name,
+            tuple(freeze(value) for value in args),
+            tuple(sorted((name, freeze(value)) for name, value in kwargs.items())),
+            id(self.data_handler),
+            data_version()
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
     def calculate_roi(self, revenue: float, investment: float) -> float:
         """
         Calcula o Return on Investment (ROI).
@@ -257,6 +323,155 @@ class FinancialCalculator:
             self.logger.error(f"Erro ao calcular ponto de equilíbrio: {str(e)}")
             return 0
     
+    @staticmethod
+    def _masked_divide(numerator, denominator) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Divide elemento a elemento sem avisos de divisão por zero.
+        
+        Returns:
+            Tupla (quocientes, válidos); posições com denominador zero ou
+            valores ausentes ficam com quociente 0.0 e válido False
+        """
+        numerator, denominator = np.broadcast_arrays(
+            np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float)
+        )
+        valid = (denominator != 0) & ~np.isnan(denominator) & ~np.isnan(numerator)
+        quotient = np.zeros(numerator.shape)
+        np.divide(numerator, denominator, out=quotient, where=valid)
+        return quotient, valid
+    
+    @classmethod
+    def _masked_ratio(cls, numerator, denominator) -> np.ndarray:
+        """Percentual numerator / denominator * 100 com duas casas; 0.0 onde o denominador é zero."""
+        quotient, valid = cls._masked_divide(numerator, denominator)
+        return np.round(np.where(valid, quotient * 100, 0.0), 2)
+    
+    def calculate_roi_batch(self, revenue, investment) -> np.ndarray:
+        """
+        Versão vetorizada de calculate_roi.
+        
+        Args:
+            revenue: Receitas (array ou Series)
+            investment: Investimentos, mesmo formato
+            
+        Returns:
+            ROI em percentual de cada posição
+        """
+        return self._masked_ratio(np.subtract(revenue, investment, dtype=float), investment)
+    
+    def calculate_conversion_rate_batch(self, realized_revenue, budgeted_revenue) -> np.ndarray:
+        """Versão vetorizada de calculate_conversion_rate."""
+        return self._masked_ratio(realized_revenue, budgeted_revenue)
+    
+    def calculate_default_rate_batch(self, default_amount, gross_revenue) -> np.ndarray:
+        """Versão vetorizada de calculate_default_rate."""
+        return self._masked_ratio(default_amount, gross_revenue)
+    
+    def calculate_profit_margin_batch(self, net_result, gross_revenue) -> np.ndarray:
+        """Versão vetorizada de calculate_profit_margin."""
+        return self._masked_ratio(net_result, gross_revenue)
+    
+    def calculate_operational_efficiency_batch(self, net_revenue, total_expenses) -> np.ndarray:
+        """Versão vetorizada de calculate_operational_efficiency: (1 - despesas / receita) * 100."""
+        quotient, valid = self._masked_divide(total_expenses, net_revenue)
+        return np.round(np.where(valid, (1 - quotient) * 100, 0.0), 2)
+    
+    def calculate_growth_rate_batch(self, current_value, previous_value) -> np.ndarray:
+        """
+        Versão vetorizada de calculate_growth_rate.
+        
+        Sem valor anterior (zero), o crescimento é 0% se o atual também é
+        zero e 100% caso contrário.
+        """
+        current = np.asarray(current_value, dtype=float)
+        previous = np.asarray(previous_value, dtype=float)
+        growth = self._masked_ratio(current - previous, previous)
+        return np.where(previous == 0, np.where(current == 0, 0.0, 100.0), growth)
+    
+    def calculate_break_even_point_batch(self, fixed_costs, variable_cost_per_unit, price_per_unit) -> np.ndarray:
+        """
+        Versão vetorizada de calculate_break_even_point.
+        
+        Returns:
+            Unidades no ponto de equilíbrio (0 quando o preço não cobre o custo variável)
+        """
+        fixed, variable, price = np.broadcast_arrays(
+            np.asarray(fixed_costs, dtype=float),
+            np.asarray(variable_cost_per_unit, dtype=float),
+            np.asarray(price_per_unit, dtype=float)
+        )
+        margin = price - variable
+        valid = margin > 0
+        units = np.zeros(margin.shape)
+        np.divide(fixed, margin, out=units, where=valid)
+        return np.ceil(units).astype(np.int64)
+    
+    @_memoized
+    def calculate_metrics_table(self, financial_data: Optional[pd.DataFrame] = None, by: str = 'Periodo') -> pd.DataFrame:
+        """
+        Calcula todas as métricas para todos os grupos (períodos/FACs, turmas...) de uma vez.
+        
+        As linhas são somadas por grupo e Tipo (Realizado/Orcamento) e cada
+        métrica é calculada com uma operação por coluna. O crescimento de
+        receita compara cada grupo ao anterior, com os grupos ordenados pelo
+        número no final do código (FAC_9 antes de FAC_10).
+        
+        Args:
+            financial_data: Linhas financeiras (padrão: dados do DataHandler)
+            by: Coluna que define os grupos
+            
+        Returns:
+            DataFrame no formato longo com colunas [by, 'Metrica', 'Valor']
+        """
+        try:
+            if financial_data is None:
+                if not self.data_handler:
+                    return pd.DataFrame(columns=[by, 'Metrica', 'Valor'])
+                financial_data = self.data_handler.financial_data
+            
+            if financial_data.empty or by not in financial_data.columns:
+                return pd.DataFrame(columns=[by, 'Metrica', 'Valor'])
+            
+            columns = ['Receita_Bruta', 'Resultado_Liquido', 'Inadimplencia', 'Total_Despesas']
+            values = financial_data.reindex(columns=columns).apply(pd.to_numeric, errors='coerce')
+            kind = financial_data['Tipo'].fillna('Realizado') if 'Tipo' in financial_data.columns else pd.Series('Realizado', index=financial_data.index)
+            
+            totals = values.groupby([financial_data[by], kind]).sum().unstack(fill_value=0.0)
+            
+            totals = totals.iloc[_chronological_order(totals.index)]
+            
+            column = lambda name, kind_name: (
+                totals[(name, kind_name)].to_numpy() if (name, kind_name) in totals.columns else np.zeros(len(totals))
+            )
+            receita = column('Receita_Bruta', 'Realizado')
+            resultado = column('Resultado_Liquido', 'Realizado')
+            despesas = column('Total_Despesas', 'Realizado')
+            inadimplencia = column('Inadimplencia', 'Realizado')
+            receita_orcada = column('Receita_Bruta', 'Orcamento')
+            
+            previous_receita = np.concatenate([[np.nan], receita[:-1]])
+            crescimento = np.where(
+                np.isnan(previous_receita), 0.0, self.calculate_growth_rate_batch(receita, np.nan_to_num(previous_receita))
+            )
+            
+            metrics = pd.DataFrame({
+                'receita_realizada': receita,
+                'receita_orcada': receita_orcada,
+                'taxa_conversao': self.calculate_conversion_rate_batch(receita, receita_orcada),
+                'roi': self.calculate_roi_batch(resultado, despesas),
+                'margem_lucro': self.calculate_profit_margin_batch(resultado, receita),
+                'taxa_inadimplencia': self.calculate_default_rate_batch(inadimplencia, receita),
+                'eficiencia_operacional': self.calculate_operational_efficiency_batch(receita, despesas),
+                'crescimento_receita': crescimento
+            }, index=pd.Index(totals.index, name=by))
+            
+            return metrics.reset_index().melt(id_vars=by, var_name='Metrica', value_name='Valor')
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao calcular tabela de métricas: {str(e)}")
+            return pd.DataFrame(columns=[by, 'Metrica', 'Valor'])
+    
+    @_memoized
     def generate_financial_summary(self, period: Optional[str] = None) -> Dict:
         """
         Gera um resumo financeiro completo.
@@ -336,6 +551,9 @@ class FinancialCalculator:
         """
         Analisa a tendência de uma série de valores.
         
+        Para séries que recebem pontos aos poucos, use
+        trend_engine.update(série, valor), que atualiza a tendência em O(1).
+        
         Args:
             values: Lista de valores ordenados cronologicamente
             
@@ -343,53 +561,68 @@ class FinancialCalculator:
             Dicionário com análise de tendência
         """
         try:
-            if len(values) < 2:
+            result = TrendEngine.fit(np.asarray([values], dtype=float)).iloc[0]
+            
+            if result['points'] < 2:
                 return {'trend': 'Dados insuficientes', 'slope': 0.0, 'direction': 'Neutro'}
             
-            # Calcular tendência usando regressão linear simples
-            x = np.arange(len(values))
-            y = np.array(values)
+            return TrendEngine.describe(result['slope'], result['total_variation'], result['average_value'])
             
-            # Remover valores NaN
-            mask = ~np.isnan(y)
-            if np.sum(mask) < 2:
-                return {'trend': 'Dados insuficientes', 'slope': 0.0, 'direction': 'Neutro'}
+        except Exception as e:
+            self.logger.error(f"Erro ao analisar tendência: {str(e)}")
+            return {'trend': 'Erro na análise', 'slope': 0.0, 'direction': 'Neutro'}
+    
+    def analyze_trends(self, values, labels=None) -> pd.DataFrame:
+        """
+        Analisa a tendência de várias séries em uma única chamada vetorizada.
+        
+        Args:
+            values: Matriz (séries x pontos cronológicos) ou DataFrame com uma série por linha
+            labels: Rótulo de cada série (padrão: índice do DataFrame)
             
-            x_clean = x[mask]
-            y_clean = y[mask]
+        Returns:
+            DataFrame com trend, slope, direction, total_variation, average_value
+            e points por série (ver TrendEngine.fit)
+        """
+        try:
+            return TrendEngine.fit(values, labels)
             
-            # Calcular coeficiente angular
-            slope = np.polyfit(x_clean, y_clean, 1)[0]
+        except Exception as e:
+            self.logger.error(f"Erro ao analisar tendências: {str(e)}")
+            return pd.DataFrame()
+    
+    @_memoized
+    def analyze_financial_trends(self, kind: str = 'Realizado') -> pd.DataFrame:
+        """
+        Tendência de cada indicador financeiro ao longo dos períodos (FACs).
+        
+        Monta a matriz indicador x período (em ordem cronológica) a partir dos
+        dados do DataHandler e ajusta todas as séries de uma vez.
+        
+        Args:
+            kind: Tipo das linhas usadas ('Realizado' ou 'Orcamento')
             
-            # Determinar direção da tendência
-            if slope > 0.1:
-                direction = 'Crescente'
-                trend_emoji = '📈'
-            elif slope < -0.1:
-                direction = 'Declinante'
-                trend_emoji = '📉'
-            else:
-                direction = 'Estável'
-                trend_emoji = '➡️'
+        Returns:
+            DataFrame indexado pelo indicador (ver TrendEngine.fit)
+        """
+        try:
+            if not self.data_handler or self.data_handler.financial_data.empty:
+                return pd.DataFrame()
             
-            # Calcular variação percentual total
-            if y_clean[0] != 0:
-                total_variation = ((y_clean[-1] - y_clean[0]) / abs(y_clean[0])) * 100
-            else:
-                total_variation = 0.0
+            data = self.data_handler.financial_data
+            columns = [column for column in data.columns if column not in ('Periodo', 'Tipo')]
+            rows = data[data['Tipo'] == kind] if 'Tipo' in data.columns else data
             
-            return {
-                'trend': f'{trend_emoji} {direction}',
-                'slope': round(slope, 4),
-                'direction': direction,
-                'total_variation': round(total_variation, 2),
-                'average_value': round(np.mean(y_clean), 2)
-            }
+            matrix = rows[columns].apply(pd.to_numeric, errors='coerce').groupby(rows['Periodo']).sum(min_count=1)
+            matrix = matrix.iloc[_chronological_order(matrix.index)].T
+            
+            return TrendEngine.fit(matrix)
             
         except Exception as e:
-            self.logger.error(f"Erro ao analisar tendência: {str(e)}")
-            return {'trend': 'Erro na análise', 'slope': 0.0, 'direction': 'Neutro'}
+            self.logger.error(f"Erro ao analisar tendências financeiras: {str(e)}")
+            return pd.DataFrame()
     
+    @_memoized
     def calculate_customer_metrics(self) -> Dict:
         """
         Calcula métricas relacionadas aos clientes/alunos.
@@ -441,6 +674,7 @@ class FinancialCalculator:
             self.logger.error(f"Erro ao calcular métricas de clientes: {str(e)}")
             return {'error': str(e)}
     
+    @_memoized
     def generate_performance_score(self, period: Optional[str] = None) -> Dict:
         """
         Gera um score de performance geral.
@@ -0,0 +1,135 @@
+import pandas as pd
+import numpy as np
+import logging
+
+class PaymentScheduleBuilder:
+    """
+    Gera o cronograma de parcelas de todos os alunos de uma só vez.
+    
+    Compartilhado entre a conciliação bancária e o AdvancedDataHandler para que
+    ambos calculem exatamente as mesmas parcelas e vencimentos.
+    """
+    
+    SCHEDULE_COLUMNS = [
+        'student_id', 'student_name', 'installment_number', 'total_installments',
+        'amount', 'due_date', 'payment_method'
+    ]
+    
+    def __init__(self, default_fee: float = 400.0, default_installments: int = 10,
+                 default_due_day: int = 10):
+        """
+        Inicializa o gerador de cronogramas.
+        
+        Args:
+            default_fee: Valor do curso quando courseFee não é informado
+            default_installments: Parcelas quando totalInstallments não é informado
+            default_due_day: Dia de vencimento quando boletoDueDate não é informado
+        """
+        self.default_fee = default_fee
+        self.default_installments = default_installments
+        self.default_due_day = default_due_day
+        self.logger = self._setup_logger()
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger('PaymentScheduleBuilder')
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    def build(self, students: pd.DataFrame) -> pd.DataFrame:
+        """
+        Expande os alunos em uma linha por parcela.
+        
+        A primeira parcela vence no próximo dia de vencimento (boletoDueDate) a
+        partir da data de matrícula do aluno; as demais vencem no mesmo dia dos
+        meses seguintes. Em meses mais curtos o vencimento cai no último dia do
+        mês (dia 30 em fevereiro vira 28 ou 29). Alunos com totalInstallments
+        menor que 1 ou sem data de matrícula (data_cadastro ou timestamp)
+        ficam sem parcelas, com um aviso no log; assim o cronograma depende só
+        dos dados do aluno e não do dia em que é gerado.
+        
+        Args:
+            students: DataFrame com os alunos
+        
+        Returns:
+            DataFrame com uma linha por parcela (colunas SCHEDULE_COLUMNS)
+        """
+        if students is None or students.empty:
+            return pd.DataFrame(columns=self.SCHEDULE_COLUMNS)
+        
+        student_ids = self._column(students, ['id'], '').astype(str)
+        names = self._column(students, ['fullName', 'name'], '').astype(str)
+        methods = self._column(students, ['paymentMethod'], 'BOLETO').astype(str)
+        fees = pd.to_numeric(self._column(students, ['courseFee'], self.default_fee), errors='coerce')
+        fees = fees.fillna(self.default_fee).to_numpy(dtype=float)
+        counts = pd.to_numeric(self._column(students, ['totalInstallments'], self.default_installments), errors='coerce')
+        counts = counts.fillna(self.default_installments).to_numpy(dtype=np.int64)
+        
+        without_installments = counts < 1
+        if without_installments.any():
+            self.logger.warning(
+                f"{int(without_installments.sum())} alunos com totalInstallments menor que 1 ficaram fora do "
+                f"cronograma: {', '.join(student_ids[without_installments].tolist())}"
+            )
+        due_days = pd.to_numeric(self._column(students, ['boletoDueDate'], self.default_due_day), errors='coerce')
+        due_days = due_days.fillna(self.default_due_day).clip(1, 31).to_numpy(dtype=np.int64)
+        
+        # Data de matrícula: data_cadastro, depois timestamp
+        anchors = pd.Series(pd.NaT, index=students.index, dtype='datetime64[ns]')
+        for column in ('data_cadastro', 'timestamp'):
+            if column in students.columns:
+                parsed = pd.to_datetime(students[column], errors='coerce')
+                anchors = anchors.fillna(parsed.astype('datetime64[ns]'))
+        
+        without_anchor = (anchors.isna() & ~without_installments).to_numpy()
+        if without_anchor.any():
+            self.logger.warning(
+                f"{int(without_anchor.sum())} alunos sem data de matrícula ficaram fora do "
+                f"cronograma: {', '.join(student_ids[without_anchor].tolist())}"
+            )
+        counts = np.where(without_installments | without_anchor, 0, counts)
+        # Alunos sem parcelas não entram nas linhas; a data só evita NaT no cálculo abaixo
+        anchors = anchors.fillna(pd.Timestamp(0)).dt.normalize()
+        
+        # Mês (contado desde o ano 0) da primeira parcela de cada aluno
+        first_month = (anchors.dt.year.to_numpy() * 12 + anchors.dt.month.to_numpy() - 1
+                       + (anchors.dt.day.to_numpy() > due_days))
+        
+        # Uma linha por parcela
+        rows = np.repeat(np.arange(len(students)), counts)
+        starts = np.cumsum(counts) - counts
+        offsets = np.arange(len(rows)) - np.repeat(starts, counts)
+        
+        months = first_month[rows] + offsets
+        month_start = pd.to_datetime(pd.DataFrame({
+            'year': months // 12,
+            'month': months % 12 + 1,
+            'day': 1
+        }))
+        days = np.minimum(due_days[rows], month_start.dt.days_in_month.to_numpy())
+        due_dates = month_start.to_numpy() + (days - 1).astype('timedelta64[D]')
+        
+        return pd.DataFrame({
+            'student_id': student_ids.to_numpy()[rows],
+            'student_name': names.to_numpy()[rows],
+            'installment_number': offsets + 1,
+            'total_installments': counts[rows],
+            'amount': fees[rows] / counts[rows],
+            'due_date': due_dates,
+            'payment_method': methods.to_numpy()[rows]
+        })
+    
+    @staticmethod
+    def _column(students: pd.DataFrame, names, default) -> pd.Series:
+        """Retorna a primeira coluna existente entre os nomes dados, ou um valor padrão."""
+        for name in names:
+            if name in students.columns:
+                return students[name]
+        return pd.Series(default, index=students.index)
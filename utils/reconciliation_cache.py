@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+import pandas as pd
+
+class ReconciliationCache:
+    """
+    Cache LRU de resultados de conciliação, compartilhado entre sessões.
+    
+    A chave combina o hash do conteúdo do extrato, a versão dos dados de
+    alunos/parcelas (AdvancedDataHandler.data_version), os parâmetros do
+    conciliador e a data de referência. Quando os dados mudam, a versão
+    muda: resultados de versões anteriores da mesma base são descartados.
+    """
+    
+    DEFAULT_MAX_ENTRIES = 16
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Inicializa o cache.
+        
+        Args:
+            max_entries: Número máximo de resultados guardados
+        """
+        self.max_entries = max(int(max_entries), 1)
+        self.logger = self._setup_logger()
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger('ReconciliationCache')
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    @staticmethod
+    def extract_hash(extract: pd.DataFrame) -> str:
+        """
+        Hash do conteúdo do extrato (colunas e valores, independente do índice).
+        
+        Args:
+            extract: DataFrame do extrato
+        
+        Returns:
+            Hash hexadecimal
+        """
+        digest = hashlib.sha1('|'.join(map(str, extract.columns)).encode('utf-8'))
+        if not extract.empty:
+            digest.update(pd.util.hash_pandas_object(extract, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    
+    @classmethod
+    def make_key(cls, extract: pd.DataFrame, data_version: tuple, reconciler, reference_date) -> tuple:
+        """
+        Monta a chave de cache de uma conciliação.
+        
+        Args:
+            extract: DataFrame do extrato
+            data_version: Versão dos dados (fonte, revisão)
+            reconciler: BankReconciliation (tolerâncias e modo de correspondência)
+            reference_date: Data de referência dos status das parcelas
+        
+        Returns:
+            Tupla usada como chave
+        """
+        return (
+            cls.extract_hash(extract),
+            tuple(data_version),
+            float(reconciler.tolerance_amount),
+            int(reconciler.tolerance_days),
+            getattr(reconciler, 'matching_mode', 'greedy'),
+            pd.Timestamp(reference_date).strftime('%Y-%m-%d')
+        )
+    
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """
+        Retorna o resultado guardado (e o marca como o mais recente), ou None.
+        
+        O resultado é compartilhado e não deve ser alterado por quem o recebe.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key: Hashable, result: Dict):
+        """
+        Guarda um resultado, descartando versões antigas da mesma base e o menos usado.
+        
+        Args:
+            key: Chave de make_key
+            result: Resultado da conciliação
+        """
+        if not result:
+            return
+        
+        source, version = key[1]
+        with self._lock:
+            stale = [
+                entry for entry in self._entries
+                if entry[1][0] == source and entry[1][1] != version
+            ]
+            for entry in stale:
+                del self._entries[entry]
+            
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        if stale:
+            self.logger.info(f"{len(stale)} resultados descartados após alteração dos dados")
+    
+    def invalidate(self, source: Optional[str] = None):
+        """
+        Descarta resultados de uma base (ou todos).
+        
+        Args:
+            source: Caminho da base (primeiro item de data_version); None = tudo
+        """
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+            else:
+                for entry in [entry for entry in self._entries if entry[1][0] == source]:
+                    del self._entries[entry]
+    
+    def stats(self) -> Dict:
+        """Entradas, acertos e falhas do cache."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
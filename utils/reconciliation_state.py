@@ -0,0 +1,207 @@
+import sqlite3
+import os
+import threading
+import json
+import pandas as pd
+from typing import Dict, List, Optional
+
+class ReconciliationState:
+    """
+    Estado persistido (SQLite) da conciliação bancária incremental.
+    
+    Guarda cada crédito já processado, identificado por um hash do seu
+    conteúdo, com a parcela a que foi atribuído (ou nenhuma), e a impressão
+    digital de cada parcela (vencimento, valor, aluno) com a indicação de
+    quitação. Uma nova conciliação só processa créditos ainda não vistos e
+    parcelas que mudaram.
+    
+    A conexão é compartilhada entre threads (cache_resource do Streamlit):
+    toda leitura e escrita passa por lock, e quem precisa ler e gravar de
+    forma atômica (reconcile_incremental) segura o mesmo lock durante a
+    operação inteira.
+    """
+    
+    DEFAULT_PATH = 'data/reconciliation_state.db'
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            key TEXT PRIMARY KEY,
+            date TEXT,
+            amount REAL,
+            description TEXT,
+            document TEXT,
+            account TEXT,
+            student_id TEXT,
+            installment_number INTEGER,
+            match_score REAL,
+            match_type TEXT
+        );
+        CREATE TABLE IF NOT EXISTS installments (
+            student_id TEXT,
+            installment_number INTEGER,
+            fingerprint TEXT,
+            paid INTEGER,
+            PRIMARY KEY (student_id, installment_number)
+        );
+    """
+    
+    TRANSACTION_COLUMNS = [
+        'key', 'date', 'amount', 'description', 'document', 'account',
+        'student_id', 'installment_number', 'match_score', 'match_type'
+    ]
+    INSTALLMENT_COLUMNS = ['student_id', 'installment_number', 'fingerprint', 'paid']
+    
+    def __init__(self, path: str = DEFAULT_PATH):
+        """
+        Abre (ou cria) o arquivo de estado.
+        
+        Args:
+            path: Caminho do arquivo SQLite
+        """
+        self.path = path
+        self.lock = threading.RLock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # O Streamlit pode atender a sessão em threads diferentes
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+    
+    @staticmethod
+    def transaction_keys(frame: pd.DataFrame, occurrences: Optional[Dict[int, int]] = None) -> pd.Series:
+        """
+        Hash do conteúdo de cada transação (data, valor, descrição, documento, conta).
+        
+        Linhas idênticas no mesmo extrato recebem chaves diferentes pela
+        ordem de ocorrência, então créditos repetidos legítimos não se fundem.
+        Quando o extrato chega em lotes, o mesmo dicionário occurrences deve
+        ser passado para todos eles: a contagem continua de um lote para o
+        outro e as chaves ficam iguais às do extrato lido de uma vez.
+        
+        Args:
+            frame: Transações com as colunas de BankTransactionTable
+            occurrences: Ocorrências já vistas de cada conteúdo (atualizado no lugar)
+        
+        Returns:
+            Chave hexadecimal de cada linha
+        """
+        content = pd.DataFrame({
+            'date': pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d'),
+            'amount': frame['amount'].astype(float).round(2).map('{:.2f}'.format),
+            'description': frame['description'].fillna('').astype(str),
+            'document': frame['document'].fillna('').astype(str),
+            'account': frame['account'].fillna('').astype(str),
+        }).reset_index(drop=True)
+        occurrence = content.groupby(list(content.columns)).cumcount()
+        
+        if occurrences is not None:
+            content_hashes = pd.Series(pd.util.hash_pandas_object(content, index=False).to_numpy())
+            occurrence += content_hashes.map(occurrences).fillna(0).astype('int64')
+            for content_hash, count in content_hashes.value_counts().items():
+                occurrences[content_hash] = occurrences.get(content_hash, 0) + int(count)
+        
+        content['occurrence'] = occurrence
+        
+        hashes = pd.util.hash_pandas_object(content, index=False).to_numpy()
+        return pd.Series([f'{value:016x}' for value in hashes], index=frame.index, dtype=object)
+    
+    @staticmethod
+    def installment_fingerprints(schedule: pd.DataFrame) -> pd.Series:
+        """
+        Impressão digital de cada parcela: muda quando vencimento, valor ou aluno mudam.
+        
+        Args:
+            schedule: Parcelas com student_id, student_name, due_date e amount
+        
+        Returns:
+            Impressão digital hexadecimal de cada parcela
+        """
+        content = pd.DataFrame({
+            'student_name': schedule['student_name'].fillna('').astype(str),
+            'due_date': pd.to_datetime(schedule['due_date']).dt.strftime('%Y-%m-%d'),
+            'amount': schedule['amount'].astype(float).round(2).map('{:.2f}'.format),
+        }).reset_index(drop=True)
+        
+        hashes = pd.util.hash_pandas_object(content, index=False).to_numpy()
+        return pd.Series([f'{value:016x}' for value in hashes], index=schedule.index, dtype=object)
+    
+    def ensure_settings(self, settings: Dict) -> bool:
+        """
+        Descarta o estado se foi gerado com outros parâmetros de conciliação.
+        
+        Args:
+            settings: Parâmetros que influenciam as atribuições (tolerâncias, modo)
+        
+        Returns:
+            True se o estado foi descartado
+        """
+        value = json.dumps(settings, sort_keys=True)
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM settings WHERE key = 'reconciliation'").fetchone()
+            reset = row is not None and row[0] != value
+            
+            if reset:
+                self.clear()
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('reconciliation', ?)", (value,))
+        return reset
+    
+    def load_transactions(self) -> pd.DataFrame:
+        """Transações já processadas, indexadas pela chave."""
+        with self.lock:
+            df = pd.read_sql_query("SELECT * FROM transactions ORDER BY rowid", self.conn)
+        df['date'] = pd.to_datetime(df['date'])
+        return df.set_index('key')
+    
+    def load_installments(self) -> pd.DataFrame:
+        """Parcelas conhecidas, indexadas por (student_id, installment_number)."""
+        with self.lock:
+            df = pd.read_sql_query("SELECT * FROM installments", self.conn)
+        return df.set_index(['student_id', 'installment_number'])
+    
+    def save(self, transactions: pd.DataFrame, installments: pd.DataFrame, removed_installments: List[tuple] = None):
+        """
+        Grava transações processadas e parcelas alteradas em uma única transação.
+        
+        Args:
+            transactions: Linhas com TRANSACTION_COLUMNS (substituem as de mesma chave)
+            installments: Linhas com INSTALLMENT_COLUMNS (substituem as de mesma parcela)
+            removed_installments: Parcelas (student_id, installment_number) que deixaram de existir
+        """
+        transaction_rows = transactions[self.TRANSACTION_COLUMNS].copy()
+        transaction_rows['date'] = pd.to_datetime(transaction_rows['date']).dt.strftime('%Y-%m-%d')
+        transaction_rows = transaction_rows.astype(object).where(transaction_rows.notna(), None)
+        
+        installment_rows = installments[self.INSTALLMENT_COLUMNS].astype(object)
+        
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO transactions VALUES ({', '.join('?' * len(self.TRANSACTION_COLUMNS))})",
+                transaction_rows.itertuples(index=False, name=None)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO installments VALUES (?, ?, ?, ?)",
+                installment_rows.itertuples(index=False, name=None)
+            )
+            if removed_installments:
+                self.conn.executemany(
+                    "DELETE FROM installments WHERE student_id = ? AND installment_number = ?",
+                    removed_installments
+                )
+    
+    def clear(self):
+        """Apaga todo o estado (a próxima conciliação processa o extrato inteiro)."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM transactions")
+            self.conn.execute("DELETE FROM installments")
+    
+    def close(self):
+        """Fecha o arquivo de estado."""
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,16 @@
+import streamlit as st
+from utils.data_handler import DataHandler
+from utils.financial_calculator import FinancialCalculator
+
+# O cache_resource do Streamlit identifica o recurso pela função que o cria:
+# app.py e as páginas importam daqui para usar as mesmas instâncias.
+
+@st.cache_resource
+def init_data_handler() -> DataHandler:
+    """DataHandler único do processo, compartilhado por todas as páginas e sessões."""
+    return DataHandler()
+
+@st.cache_resource
+def init_calculator() -> FinancialCalculator:
+    """Calculador compartilhado: resultados memoizados até os dados mudarem."""
+    return FinancialCalculator(init_data_handler())
@@ -1,22 +1,124 @@
 import sqlite3
+import threading
+import queue
+import os
 import pandas as pd
 import logging
-from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from urllib.parse import quote
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class SQLiteConnectionPool:
+    """
+    Pool de conexões somente leitura para um banco SQLite.
+    
+    As conexões são abertas sob demanda (até max_connections), reutilizadas
+    entre chamadas e compartilháveis entre threads, uma de cada vez.
+    """
+    
+    def __init__(self, db_path: str, max_connections: int = 4):
+        """
+        Inicializa o pool.
+        
+        Args:
+            db_path: Caminho para o arquivo do banco de dados
+            max_connections: Número máximo de conexões abertas
+        """
+        self.db_path = db_path
+        self.max_connections = max(int(max_connections), 1)
+        self.journal_mode = None
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão do pool e a devolve ao final do bloco with."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+    
+    def close(self):
+        """Fecha todas as conexões ociosas."""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._opened -= 1
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Retorna uma conexão ociosa, abre uma nova ou espera uma ser devolvida."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_open = self._opened < self.max_connections
+            if can_open:
+                self._opened += 1
+        
+        if not can_open:
+            return self._idle.get()
+        
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre uma conexão em modo somente leitura (URI mode=ro).
+        
+        Em bancos WAL sem os arquivos -wal/-shm e em diretório sem permissão
+        de escrita o modo ro não consegue criar a memória compartilhada; nesse
+        caso a conexão é aberta normalmente com PRAGMA query_only.
+        """
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Banco de dados não encontrado: {self.db_path}")
+        
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        try:
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        except sqlite3.OperationalError:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        
+        self.journal_mode = journal_mode
+        return conn
+
 
 class SQLiteReader:
     """
     Classe para ler dados do banco SQLite existente do projeto anterior.
     """
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, max_connections: int = 4):
         """
         Inicializa o leitor SQLite.
         
         Args:
             db_path: Caminho para o arquivo do banco de dados
+            max_connections: Número máximo de conexões no pool
         """
         self.db_path = db_path
         self.logger = self._setup_logger()
+        self.pool = SQLiteConnectionPool(db_path, max_connections)
+        
+        # Catálogo de tabelas e esquemas, invalidado por PRAGMA schema_version
+        self._catalog_lock = threading.Lock()
+        self._catalog_version = None
+        self._tables: List[str] = []
+        self._schemas: Dict[str, List[Tuple]] = {}
     
     def _setup_logger(self) -> logging.Logger:
         """Configura o sistema de logging."""
@@ -31,6 +133,28 @@ class SQLiteReader:
         
         return logger
     
+    def _refresh_catalog(self, conn: sqlite3.Connection):
+        """Recarrega a lista de tabelas se o esquema do banco mudou."""
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        
+        with self._catalog_lock:
+            if version == self._catalog_version:
+                return
+            
+            cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            self._tables = [row[0] for row in cursor.fetchall()]
+            self._schemas = {}
+            self._catalog_version = version
+    
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        """Cita um nome de tabela para uso em SQL."""
+        return '"' + name.replace('"', '""') + '"'
+    
+    def close(self):
+        """Fecha as conexões do pool."""
+        self.pool.close()
+    
     def get_tables(self) -> List[str]:
         """
         Obtém lista de tabelas no banco.
@@ -39,14 +163,9 @@ class SQLiteReader:
             Lista com nomes das tabelas
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            conn.close()
-            return tables
+            with self.pool.connection() as conn:
+                self._refresh_catalog(conn)
+            return list(self._tables)
             
         except Exception as e:
             self.logger.error(f"Erro ao obter tabelas: {str(e)}")
@@ -63,14 +182,16 @@ class SQLiteReader:
             Lista com informações das colunas
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            schema = cursor.fetchall()
+            with self.pool.connection() as conn:
+                self._refresh_catalog(conn)
+                
+                schema = self._schemas.get(table_name)
+                if schema is None:
+                    schema = conn.execute(f"PRAGMA table_info({self._quote_identifier(table_name)})").fetchall()
+                    if table_name in self._tables:
+                        self._schemas[table_name] = schema
             
-            conn.close()
-            return schema
+            return list(schema)
             
         except Exception as e:
             self.logger.error(f"Erro ao obter esquema da tabela {table_name}: {str(e)}")
@@ -87,12 +208,9 @@ class SQLiteReader:
             DataFrame com dados da tabela
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            query = f"SELECT * FROM {table_name}"
-            df = pd.read_sql_query(query, conn)
-            
-            conn.close()
+            with self.pool.connection() as conn:
+                query = f"SELECT * FROM {self._quote_identifier(table_name)}"
+                df = pd.read_sql_query(query, conn)
             
             self.logger.info(f"Tabela {table_name} lida com sucesso: {len(df)} registros")
             return df
@@ -101,30 +219,74 @@ class SQLiteReader:
             self.logger.error(f"Erro ao ler tabela {table_name}: {str(e)}")
             return pd.DataFrame()
     
-    def get_database_summary(self) -> Dict:
+    def get_database_summary(self, include_sample: bool = False, sample_limit: int = 5) -> Dict:
         """
-        Obtém resumo completo do banco de dados.
+        Obtém resumo completo do banco de dados sem ler o conteúdo das tabelas.
+        
+        Usa apenas COUNT(*), PRAGMA table_info, a lista de índices e as
+        estatísticas de páginas do SQLite.
         
+        Args:
+            include_sample: Se deve incluir algumas linhas de exemplo por tabela
+            sample_limit: Número máximo de linhas de exemplo por tabela
+            
         Returns:
             Dicionário com informações do banco
         """
         try:
             tables = self.get_tables()
-            summary = {
-                'total_tables': len(tables),
-                'tables': {}
-            }
+            schemas = {table: self.get_table_schema(table) for table in tables}
             
-            for table in tables:
-                df = self.read_table(table)
-                schema = self.get_table_schema(table)
+            with self.pool.connection() as conn:
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                table_pages = self._get_table_pages(conn)
                 
-                summary['tables'][table] = {
-                    'rows': len(df),
-                    'columns': len(df.columns) if not df.empty else 0,
-                    'schema': schema,
-                    'column_names': df.columns.tolist() if not df.empty else []
+                summary = {
+                    'total_tables': len(tables),
+                    'page_size': page_size,
+                    'page_count': page_count,
+                    'freelist_count': freelist_count,
+                    'size_bytes': page_size * page_count,
+                    'journal_mode': self.pool.journal_mode,
+                    'tables': {}
                 }
+                
+                for table in tables:
+                    quoted = self._quote_identifier(table)
+                    schema = schemas[table]
+                    rows = conn.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()[0]
+                    
+                    indexes = [
+                        {
+                            'name': index[1],
+                            'unique': bool(index[2]),
+                            'columns': [
+                                column[2] for column in
+                                conn.execute(f"PRAGMA index_info({self._quote_identifier(index[1])})").fetchall()
+                            ]
+                        }
+                        for index in conn.execute(f"PRAGMA index_list({quoted})").fetchall()
+                    ]
+                    
+                    pages = table_pages.get(table)
+                    info = {
+                        'rows': rows,
+                        'columns': len(schema),
+                        'schema': schema,
+                        'column_names': [column[1] for column in schema],
+                        'indexes': indexes,
+                        'pages': pages,
+                        'size_bytes': pages * page_size if pages is not None else None
+                    }
+                    
+                    if include_sample:
+                        info['sample'] = pd.read_sql_query(
+                            f"SELECT * FROM {quoted} LIMIT ?", conn, params=(max(int(sample_limit), 0),)
+                        )
+                    
+                    summary['tables'][table] = info
             
             return summary
             
@@ -132,6 +294,27 @@ class SQLiteReader:
             self.logger.error(f"Erro ao gerar resumo do banco: {str(e)}")
             return {'error': str(e)}
     
+    def _get_table_pages(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """
+        Páginas ocupadas por tabela (tabela + índices) segundo a tabela virtual dbstat.
+        
+        Usa o modo agregado do dbstat (uma linha por b-tree, com o total de
+        páginas em pageno), que não gera uma linha por página do banco.
+        Retorna um dicionário vazio se o SQLite não foi compilado com dbstat
+        ou é anterior ao modo agregado (3.31).
+        """
+        try:
+            cursor = conn.execute("""
+                SELECT m.tbl_name, SUM(s.pageno)
+                FROM dbstat s
+                JOIN sqlite_master m ON m.name = s.name
+                WHERE s.aggregate = TRUE
+                GROUP BY m.tbl_name
+            """)
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        except sqlite3.DatabaseError:
+            return {}
+    
     def migrate_students_data(self) -> pd.DataFrame:
         """
         Migra dados de alunos do banco SQLite.
@@ -142,9 +325,10 @@ class SQLiteReader:
         try:
             # Tentar diferentes nomes de tabela possíveis
             possible_tables = ['students', 'alunos', 'student', 'aluno']
+            existing_tables = set(self.get_tables())
             
             for table_name in possible_tables:
-                if table_name in self.get_tables():
+                if table_name in existing_tables:
                     df = self.read_table(table_name)
                     if not df.empty:
                         self.logger.info(f"Dados de alunos encontrados na tabela: {table_name}")
@@ -168,10 +352,11 @@ class SQLiteReader:
             # Tentar diferentes nomes de tabela possíveis
             possible_tables = ['payments', 'pagamentos', 'financial', 'financeiro', 'expenses', 'despesas']
             
+            existing_tables = set(self.get_tables())
             migrated_data = []
             
             for table_name in possible_tables:
-                if table_name in self.get_tables():
+                if table_name in existing_tables:
                     df = self.read_table(table_name)
                     if not df.empty:
                         df['source_table'] = table_name
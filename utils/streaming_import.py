@@ -0,0 +1,286 @@
+import pandas as pd
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+class StreamingImporter:
+    """
+    Importa planilhas (CSV ou Excel) em blocos de tamanho fixo.
+    
+    Cada bloco é lido, validado e gravado antes do próximo ser lido, de modo
+    que o uso de memória não depende do tamanho do arquivo.
+    """
+    
+    DEFAULT_CHUNK_SIZE = 5000
+    
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Inicializa o importador.
+        
+        Args:
+            chunk_size: Número de linhas por bloco
+        """
+        self.chunk_size = max(int(chunk_size), 1)
+        self.logger = self._setup_logger()
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger('StreamingImporter')
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    def iter_chunks(self, file, file_name: str) -> Iterator[Tuple[pd.DataFrame, float]]:
+        """
+        Lê o arquivo bloco a bloco.
+        
+        Args:
+            file: Caminho ou objeto de arquivo (ex.: upload do Streamlit)
+            file_name: Nome do arquivo, usado para identificar o formato
+        
+        Yields:
+            Tuplas (bloco, fração_do_arquivo_já_lida)
+        """
+        if self._is_excel(file_name):
+            yield from self._iter_excel_chunks(file)
+        else:
+            yield from self._iter_csv_chunks(file)
+    
+    def preview(self, file, file_name: str, rows: int = 10) -> pd.DataFrame:
+        """
+        Lê apenas as primeiras linhas do arquivo.
+        
+        Args:
+            file: Caminho ou objeto de arquivo
+            file_name: Nome do arquivo
+            rows: Número de linhas da prévia
+        
+        Returns:
+            DataFrame com as primeiras linhas
+        """
+        try:
+            if self._is_excel(file_name):
+                with self._open_sheet(file) as sheet_rows:
+                    header = next(sheet_rows, None)
+                    if header is None:
+                        return pd.DataFrame()
+                    data = [row for _, row in zip(range(rows), sheet_rows)]
+                return self._to_frame(header, data)
+            
+            self._rewind(file)
+            df = pd.read_csv(file, nrows=rows)
+            self._rewind(file)
+            return df
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao gerar prévia: {str(e)}")
+            return pd.DataFrame()
+    
+    def count_rows(self, file, file_name: str) -> int:
+        """
+        Conta as linhas de dados do arquivo sem carregá-lo inteiro.
+        
+        Args:
+            file: Caminho ou objeto de arquivo
+            file_name: Nome do arquivo
+        
+        Returns:
+            Número de linhas (sem o cabeçalho)
+        """
+        try:
+            if self._is_excel(file_name):
+                with self._open_sheet(file) as sheet_rows:
+                    return max(sum(1 for _ in sheet_rows) - 1, 0)
+            
+            self._rewind(file)
+            with pd.read_csv(file, usecols=[0], chunksize=self.chunk_size) as reader:
+                total = sum(len(chunk) for chunk in reader)
+            self._rewind(file)
+            return total
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao contar linhas: {str(e)}")
+            return 0
+    
+    def import_financial_data(self, file, file_name: str, data_handler,
+                              progress_callback: Optional[Callable[[float, int], None]] = None) -> Dict:
+        """
+        Importa dados financeiros validando e gravando cada bloco.
+        
+        Blocos reprovados por DataHandler.validate_financial_data são
+        descartados e seus erros registrados; os demais são gravados com
+        DataHandler.append_financial_data, todos sob o mesmo nome de
+        importação. Colunas que os dados financeiros ainda não tinham são
+        mantidas e listadas em 'unknown_columns'.
+        
+        Args:
+            file: Caminho ou objeto de arquivo
+            file_name: Nome do arquivo
+            data_handler: Instância de DataHandler que recebe os dados
+            progress_callback: Função chamada após cada bloco com
+                (fração_lida, linhas_processadas)
+        
+        Returns:
+            Dicionário com linhas lidas, importadas, rejeitadas, colunas
+            desconhecidas e erros por bloco
+        """
+        result = {
+            'total_rows': 0,
+            'imported_rows': 0,
+            'rejected_rows': 0,
+            'chunks': 0,
+            'unknown_columns': [],
+            'errors': []
+        }
+        
+        base_name = os.path.splitext(os.path.basename(str(file_name)))[0]
+        source = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{re.sub(r'[^0-9A-Za-z_-]', '_', base_name)}"
+        
+        try:
+            for chunk, fraction in self.iter_chunks(file, file_name):
+                first_row = result['total_rows'] + 1
+                result['total_rows'] += len(chunk)
+                result['chunks'] += 1
+                
+                is_valid, errors = data_handler.validate_financial_data(chunk)
+                
+                if is_valid:
+                    for column in data_handler.unknown_financial_columns(chunk):
+                        if column not in result['unknown_columns']:
+                            result['unknown_columns'].append(column)
+                    result['imported_rows'] += data_handler.append_financial_data(chunk, source=source)
+                else:
+                    result['rejected_rows'] += len(chunk)
+                    result['errors'].append({
+                        'rows': f"{first_row}-{result['total_rows']}",
+                        'errors': errors
+                    })
+                
+                if progress_callback:
+                    progress_callback(fraction, result['total_rows'])
+            
+            self.logger.info(
+                f"Importação concluída: {result['imported_rows']} de {result['total_rows']} linhas"
+            )
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao importar dados financeiros: {str(e)}")
+            result['errors'].append({'rows': '-', 'errors': [str(e)]})
+        
+        return result
+    
+    def _iter_csv_chunks(self, file) -> Iterator[Tuple[pd.DataFrame, float]]:
+        """Lê um CSV em blocos com o leitor incremental do pandas."""
+        total_size = self._file_size(file)
+        self._rewind(file)
+        
+        with pd.read_csv(file, chunksize=self.chunk_size) as reader:
+            for chunk in reader:
+                yield chunk, self._fraction_read(file, total_size)
+        
+        self._rewind(file)
+    
+    def _iter_excel_chunks(self, file) -> Iterator[Tuple[pd.DataFrame, float]]:
+        """Lê uma planilha Excel linha a linha no modo somente leitura do openpyxl."""
+        with self._open_sheet(file) as sheet_rows:
+            header = next(sheet_rows, None)
+            if header is None:
+                return
+            
+            total_rows = max(getattr(sheet_rows, 'max_row', 0) - 1, 0)
+            read_rows = 0
+            batch: List[tuple] = []
+            
+            for row in sheet_rows:
+                batch.append(row)
+                if len(batch) == self.chunk_size:
+                    read_rows += len(batch)
+                    yield self._to_frame(header, batch), self._fraction(read_rows, total_rows)
+                    batch = []
+            
+            if batch:
+                read_rows += len(batch)
+                yield self._to_frame(header, batch), 1.0
+    
+    def _open_sheet(self, file) -> '_SheetRows':
+        """Abre a primeira aba da planilha para leitura linha a linha."""
+        import openpyxl
+        
+        self._rewind(file)
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        return _SheetRows(workbook)
+    
+    @staticmethod
+    def _to_frame(header: tuple, rows: List[tuple]) -> pd.DataFrame:
+        """Monta um bloco a partir das linhas brutas da planilha."""
+        columns = [str(name) if name is not None else f'Coluna_{i + 1}' for i, name in enumerate(header)]
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        return df.infer_objects()
+    
+    @staticmethod
+    def _is_excel(file_name: str) -> bool:
+        """Indica se o arquivo é uma planilha Excel."""
+        return os.path.splitext(file_name or '')[1].lower() in ('.xlsx', '.xlsm')
+    
+    @staticmethod
+    def _rewind(file):
+        """Volta ao início de objetos de arquivo (uploads são lidos mais de uma vez)."""
+        if hasattr(file, 'seek'):
+            file.seek(0)
+    
+    @staticmethod
+    def _file_size(file) -> int:
+        """Tamanho do arquivo em bytes, ou 0 se desconhecido."""
+        if hasattr(file, 'seek') and hasattr(file, 'tell'):
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            file.seek(0)
+            return size
+        if isinstance(file, str) and os.path.exists(file):
+            return os.path.getsize(file)
+        return 0
+    
+    @classmethod
+    def _fraction_read(cls, file, total_size: int) -> float:
+        """Fração do arquivo já consumida pelo leitor."""
+        if not total_size or not hasattr(file, 'tell'):
+            return 0.0
+        return cls._fraction(file.tell(), total_size)
+    
+    @staticmethod
+    def _fraction(done: int, total: int) -> float:
+        """Fração done/total limitada ao intervalo [0, 1]."""
+        if not total:
+            return 0.0
+        return min(max(done / total, 0.0), 1.0)
+
+
+class _SheetRows:
+    """Iterador sobre as linhas da primeira aba que fecha a planilha ao sair do bloco with."""
+    
+    def __init__(self, workbook):
+        self.workbook = workbook
+        sheet = workbook.worksheets[0]
+        self.max_row = sheet.max_row or 0
+        self._rows = sheet.iter_rows(values_only=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.workbook.close()
+        return False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        return next(self._rows)
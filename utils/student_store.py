@@ -0,0 +1,303 @@
+import sqlite3
+import threading
+import os
+import pandas as pd
+import logging
+from typing import Dict, List, Optional
+
+class StudentStore:
+    """
+    Armazenamento persistente em SQLite dos dados do AdvancedDataHandler.
+    
+    Guarda alunos, parcelas, turmas (FACs) e cursos em tabelas com chave
+    primária e índices, para que cada operação de CRUD seja um único
+    comando indexado.
+    """
+    
+    TABLE_COLUMNS = {
+        'students': [
+            'id', 'fullName', 'email', 'cpfCnpj', 'certificateName', 'profession',
+            'phone', 'whatsapp', 'cep', 'address', 'addressNumber', 'addressComplement',
+            'neighborhood', 'city', 'state', 'chosenCourseName', 'facCode',
+            'paymentMethod', 'totalInstallments', 'courseFee', 'boletoDueDate',
+            'howFound', 'enrollmentStatus', 'data_cadastro', 'timestamp'
+        ],
+        'payments': [
+            'id', 'student_id', 'installment_number', 'total_installments', 'amount',
+            'due_date', 'payment_date', 'status', 'payment_method', 'barcode',
+            'transaction_id', 'created_at'
+        ],
+        'facs': [
+            'code', 'name', 'startDate', 'endDate', 'status', 'maxStudents', 'currentStudents'
+        ],
+        'courses': [
+            'id', 'name', 'description', 'defaultFee', 'defaultInstallments',
+            'duration', 'modality', 'status'
+        ]
+    }
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS students (
+            id TEXT PRIMARY KEY,
+            fullName TEXT NOT NULL,
+            email TEXT,
+            cpfCnpj TEXT,
+            certificateName TEXT,
+            profession TEXT,
+            phone TEXT,
+            whatsapp TEXT,
+            cep TEXT,
+            address TEXT,
+            addressNumber TEXT,
+            addressComplement TEXT,
+            neighborhood TEXT,
+            city TEXT,
+            state TEXT,
+            chosenCourseName TEXT,
+            facCode TEXT,
+            paymentMethod TEXT,
+            totalInstallments INTEGER,
+            courseFee REAL,
+            boletoDueDate TEXT,
+            howFound TEXT,
+            enrollmentStatus TEXT,
+            data_cadastro TEXT,
+            timestamp TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_students_facCode ON students (facCode);
+        CREATE INDEX IF NOT EXISTS idx_students_status ON students (enrollmentStatus);
+        
+        CREATE TABLE IF NOT EXISTS payments (
+            id TEXT PRIMARY KEY,
+            student_id TEXT NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+            installment_number INTEGER,
+            total_installments INTEGER,
+            amount REAL,
+            due_date TEXT,
+            payment_date TEXT,
+            status TEXT,
+            payment_method TEXT,
+            barcode TEXT,
+            transaction_id TEXT,
+            created_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_payments_student_id ON payments (student_id);
+        CREATE INDEX IF NOT EXISTS idx_payments_status ON payments (status);
+        
+        CREATE TABLE IF NOT EXISTS facs (
+            code TEXT PRIMARY KEY,
+            name TEXT,
+            startDate TEXT,
+            endDate TEXT,
+            status TEXT,
+            maxStudents INTEGER,
+            currentStudents INTEGER
+        );
+        
+        CREATE TABLE IF NOT EXISTS courses (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            description TEXT,
+            defaultFee REAL,
+            defaultInstallments INTEGER,
+            duration INTEGER,
+            modality TEXT,
+            status TEXT
+        );
+        
+        CREATE TABLE IF NOT EXISTS store_metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Inicializa o armazenamento, criando o banco e as tabelas se necessário.
+        
+        Args:
+            db_path: Caminho para o arquivo do banco de dados
+        """
+        self.db_path = db_path
+        self.logger = self._setup_logger()
+        self._lock = threading.RLock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger('StudentStore')
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    def is_seeded(self) -> bool:
+        """Indica se os dados iniciais já foram gravados no banco."""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM store_metadata WHERE key = 'seeded'").fetchone()
+        return row is not None
+    
+    def seed(self, frames: Dict[str, pd.DataFrame]):
+        """
+        Grava os dados iniciais de todas as tabelas em uma única transação.
+        
+        Args:
+            frames: Dicionário nome_da_tabela -> DataFrame
+        """
+        with self._lock, self.conn:
+            for table, df in frames.items():
+                self._insert_rows(table, df)
+            self.conn.execute("INSERT OR REPLACE INTO store_metadata (key, value) VALUES ('seeded', '1')")
+            self._bump_revision()
+    
+    def data_version(self) -> int:
+        """
+        Retorna o contador de alterações feitas por outras conexões.
+        
+        Muda sempre que outro processo ou outra instância grava no banco.
+        """
+        with self._lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def revision(self) -> int:
+        """
+        Retorna o número de revisão dos dados gravado no próprio banco.
+        
+        É incrementado em toda gravação, por qualquer conexão, e é o mesmo
+        para todas as instâncias que abrem o banco; serve como versão dos
+        dados em caches compartilhados.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM store_metadata WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+    
+    def load_table(self, table: str) -> pd.DataFrame:
+        """
+        Lê uma tabela completa.
+        
+        Args:
+            table: Nome da tabela
+        
+        Returns:
+            DataFrame com os dados da tabela
+        """
+        columns = ', '.join(self.TABLE_COLUMNS[table])
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {columns} FROM {table} ORDER BY rowid", self.conn)
+    
+    def insert_rows(self, table: str, df: pd.DataFrame):
+        """
+        Insere linhas em uma tabela.
+        
+        Args:
+            table: Nome da tabela
+            df: DataFrame com as linhas a inserir
+        """
+        with self._lock, self.conn:
+            self._insert_rows(table, df)
+            self._bump_revision()
+    
+    def insert_students(self, students: pd.DataFrame, payments: pd.DataFrame):
+        """
+        Insere alunos e suas parcelas na mesma transação.
+        
+        Args:
+            students: DataFrame com as linhas dos alunos
+            payments: DataFrame com as parcelas dos alunos
+        """
+        with self._lock, self.conn:
+            self._insert_rows('students', students)
+            self._insert_rows('payments', payments)
+            self._bump_revision()
+    
+    def update_row(self, table: str, key: str, key_value: str, fields: Dict) -> int:
+        """
+        Atualiza campos de uma linha pela chave primária.
+        
+        Args:
+            table: Nome da tabela
+            key: Coluna da chave primária
+            key_value: Valor da chave
+            fields: Dicionário coluna -> novo valor (colunas desconhecidas são ignoradas)
+        
+        Returns:
+            Número de linhas alteradas
+        """
+        known = [column for column in fields if column in self.TABLE_COLUMNS[table] and column != key]
+        if not known:
+            return 0
+        
+        assignments = ', '.join(f"{column} = ?" for column in known)
+        values = [self._to_sql_value(fields[column]) for column in known] + [key_value]
+        
+        with self._lock, self.conn:
+            cursor = self.conn.execute(f"UPDATE {table} SET {assignments} WHERE {key} = ?", values)
+            if cursor.rowcount:
+                self._bump_revision()
+        return cursor.rowcount
+    
+    def delete_student(self, student_id: str) -> int:
+        """
+        Remove um aluno; as parcelas são removidas em cascata.
+        
+        Args:
+            student_id: ID do aluno
+        
+        Returns:
+            Número de alunos removidos
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM students WHERE id = ?", (student_id,))
+            if cursor.rowcount:
+                self._bump_revision()
+        return cursor.rowcount
+    
+    def close(self):
+        """Fecha a conexão com o banco."""
+        self.conn.close()
+    
+    def _bump_revision(self):
+        """Incrementa a revisão dentro da transação de gravação corrente."""
+        self.conn.execute(
+            "INSERT INTO store_metadata (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+    
+    def _insert_rows(self, table: str, df: pd.DataFrame):
+        """Insere linhas sem abrir transação própria."""
+        if df is None or df.empty:
+            return
+        
+        columns = [column for column in self.TABLE_COLUMNS[table] if column in df.columns]
+        placeholders = ', '.join('?' for _ in columns)
+        rows = [
+            [self._to_sql_value(value) for value in row]
+            for row in df[columns].itertuples(index=False, name=None)
+        ]
+        
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            rows
+        )
+    
+    @staticmethod
+    def _to_sql_value(value):
+        """Converte valores pandas/numpy para tipos aceitos pelo sqlite3."""
+        if value is None or pd.isna(value):
+            return None
+        if hasattr(value, 'item'):
+            return value.item()
+        return value
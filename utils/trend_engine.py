@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+import logging
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Optional, Sequence, Union
+
+# Inclinação mínima (em unidades por ponto) para a série não ser considerada estável
+SLOPE_THRESHOLD = 0.1
+
+@dataclass
+class TrendState:
+    """Estatísticas suficientes da regressão linear de uma série (x = posição do ponto)."""
+    count: int = 0          # pontos válidos
+    next_x: int = 0         # posição do próximo ponto (conta também os ausentes)
+    mean_x: float = 0.0
+    mean_y: float = 0.0
+    m2_x: float = 0.0       # soma dos quadrados dos desvios de x
+    c_xy: float = 0.0       # soma dos produtos dos desvios de x e y
+    first: float = np.nan   # primeiro valor válido
+    last: float = np.nan    # último valor válido
+
+class TrendEngine:
+    """
+    Tendência (regressão linear simples) de séries atualizadas ponto a ponto.
+    
+    Cada série guarda só médias e co-momentos (atualização de Welford), então
+    um novo ponto atualiza inclinação e variação em O(1), sem refazer o
+    ajuste. fit() ajusta muitas séries de uma vez (ex: cada KPI x cada FAC)
+    a partir de uma matriz, com operações por coluna.
+    """
+    
+    def __init__(self):
+        """Inicializa o motor sem séries."""
+        self.logger = self._setup_logger()
+        self.states: Dict[Hashable, TrendState] = {}
+    
+    def _setup_logger(self) -> logging.Logger:
+        """Configura o sistema de logging."""
+        logger = logging.getLogger('TrendEngine')
+        logger.setLevel(logging.INFO)
+        
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        
+        return logger
+    
+    def update(self, series_id: Hashable, value: Optional[float]) -> Dict[str, Union[str, float]]:
+        """
+        Acrescenta um ponto à série e retorna a tendência atualizada.
+        
+        Valores ausentes (None/NaN) ocupam a posição mas não entram no ajuste,
+        como em analyze_trend.
+        
+        Args:
+            series_id: Identificador da série (ex: ('Receita_Bruta', 'FAC_17'))
+            value: Novo valor
+        
+        Returns:
+            Dicionário no formato de trend()
+        """
+        state = self.states.setdefault(series_id, TrendState())
+        x = state.next_x
+        state.next_x += 1
+        
+        if value is None or np.isnan(value):
+            return self.trend(series_id)
+        
+        y = float(value)
+        state.count += 1
+        dx = x - state.mean_x
+        state.mean_x += dx / state.count
+        state.mean_y += (y - state.mean_y) / state.count
+        state.m2_x += dx * (x - state.mean_x)
+        state.c_xy += dx * (y - state.mean_y)
+        
+        if state.count == 1:
+            state.first = y
+        state.last = y
+        
+        return self.trend(series_id)
+    
+    def extend(self, series_id: Hashable, values: Iterable[Optional[float]]) -> Dict[str, Union[str, float]]:
+        """
+        Acrescenta vários pontos à série, em ordem cronológica.
+        
+        Returns:
+            Dicionário no formato de trend()
+        """
+        for value in values:
+            self.update(series_id, value)
+        return self.trend(series_id)
+    
+    def trend(self, series_id: Hashable) -> Dict[str, Union[str, float]]:
+        """
+        Tendência atual da série.
+        
+        Returns:
+            Dicionário com trend, slope, direction, total_variation e
+            average_value (ou só trend/slope/direction com menos de 2 pontos)
+        """
+        state = self.states.get(series_id)
+        if state is None or state.count < 2:
+            return {'trend': 'Dados insuficientes', 'slope': 0.0, 'direction': 'Neutro'}
+        
+        slope = state.c_xy / state.m2_x
+        variation = (state.last - state.first) / abs(state.first) * 100 if state.first != 0 else 0.0
+        
+        return self.describe(slope, variation, state.mean_y)
+    
+    def reset(self, series_id: Optional[Hashable] = None):
+        """
+        Descarta uma série (ou todas).
+        
+        Args:
+            series_id: Série a descartar; None = todas
+        """
+        if series_id is None:
+            self.states.clear()
+        else:
+            self.states.pop(series_id, None)
+    
+    @staticmethod
+    def describe(slope: float, variation: float, average: float) -> Dict[str, Union[str, float]]:
+        """Monta o dicionário de tendência (arredondado, com seta) a partir da inclinação, variação e média."""
+        if slope > SLOPE_THRESHOLD:
+            direction, trend_emoji = 'Crescente', '📈'
+        elif slope < -SLOPE_THRESHOLD:
+            direction, trend_emoji = 'Declinante', '📉'
+        else:
+            direction, trend_emoji = 'Estável', '➡️'
+        
+        return {
+            'trend': f'{trend_emoji} {direction}',
+            'slope': float(np.round(slope, 4)),
+            'direction': direction,
+            'total_variation': float(np.round(variation, 2)),
+            'average_value': float(np.round(average, 2))
+        }
+    
+    @staticmethod
+    def fit(values: Union[np.ndarray, pd.DataFrame], labels: Optional[Sequence[Hashable]] = None) -> pd.DataFrame:
+        """
+        Ajusta a tendência de várias séries de uma vez.
+        
+        Cada linha da matriz é uma série e cada coluna um ponto no tempo;
+        valores ausentes (NaN) são ignorados na sua série.
+        
+        Args:
+            values: Matriz (séries x pontos); um DataFrame usa o índice como rótulo
+            labels: Rótulo de cada série (padrão: índice do DataFrame ou posição)
+        
+        Returns:
+            DataFrame indexado pelas séries com colunas trend, slope, direction,
+            total_variation, average_value e points (valores sem arredondamento)
+        """
+        if isinstance(values, pd.DataFrame):
+            labels = values.index if labels is None else labels
+            values = values.to_numpy(dtype=float)
+        
+        y = np.atleast_2d(np.asarray(values, dtype=float))
+        valid = ~np.isnan(y)
+        count = valid.sum(axis=1)
+        x = np.broadcast_to(np.arange(y.shape[1], dtype=float), y.shape)
+        
+        # Médias e co-momentos só com os pontos válidos de cada série
+        safe_count = np.maximum(count, 1)
+        y_zero = np.where(valid, y, 0.0)
+        mean_x = np.where(valid, x, 0.0).sum(axis=1) / safe_count
+        mean_y = y_zero.sum(axis=1) / safe_count
+        dx = np.where(valid, x - mean_x[:, None], 0.0)
+        dy = np.where(valid, y - mean_y[:, None], 0.0)
+        m2_x = (dx * dx).sum(axis=1)
+        c_xy = (dx * dy).sum(axis=1)
+        
+        enough = count >= 2
+        slope = np.zeros(len(y))
+        np.divide(c_xy, m2_x, out=slope, where=enough & (m2_x > 0))
+        
+        # Primeiro e último valor válido de cada série
+        if y.shape[1]:
+            rows = np.arange(len(y))
+            first = y[rows, np.argmax(valid, axis=1)]
+            last = y[rows, y.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)]
+        else:
+            first = last = np.full(len(y), np.nan)
+        variation = np.zeros(len(y))
+        np.divide(last - first, np.abs(first), out=variation, where=enough & (first != 0))
+        variation *= 100
+        
+        direction = np.select(
+            [~enough, slope > SLOPE_THRESHOLD, slope < -SLOPE_THRESHOLD],
+            ['Neutro', 'Crescente', 'Declinante'],
+            default='Estável'
+        )
+        trend = pd.Series(direction).map({
+            'Neutro': 'Dados insuficientes',
+            'Crescente': '📈 Crescente',
+            'Declinante': '📉 Declinante',
+            'Estável': '➡️ Estável'
+        }).to_numpy()
+        
+        return pd.DataFrame({
+            'trend': trend,
+            'slope': slope,
+            'direction': direction,
+            'total_variation': np.where(enough, variation, np.nan),
+            'average_value': np.where(enough, mean_y, np.nan),
+            'points': count
+        }, index=pd.Index(labels) if labels is not None else None)